@@ -0,0 +1,304 @@
+"""离屏性能基准
+
+在 QT_QPA_PLATFORM=offscreen 下运行，测量：
+  - StretchlyStyleApp 构建耗时与托盘就绪耗时
+  - 休息开始到休息窗口首次绘制（首次/复用/内容已预取）
+  - 不透明合成方式下淡入的最大帧间隔和每帧绘制耗时
+  - 图片包把一张 4000x3000 的 JPEG 解码缩放到屏幕尺寸的耗时（首次/读磁盘缓存）
+  - update_style 切换主题、打开设置对话框的耗时
+  - 数千次强制工作/休息循环后的 RSS 与存活控件/QObject 增长
+  - 主窗口隐藏/显示时一段时间内的绘制和定时器事件数
+
+结果以 JSON 输出；给出 --baseline 时与基线比较，有指标回退则以非零状态退出。
+
+    python bench.py --output bench_output.txt
+    python bench.py --save-baseline bench_baseline.json
+    python bench.py --baseline bench_baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+DEFAULT_CYCLES = 2000
+DEFAULT_REPEAT = 20
+DEFAULT_TOLERANCE = 0.25  # 允许比基线差 25%
+EVENT_SPAN = 3.0  # 统计绘制/定时器事件的时长（秒）
+NOISE_FLOOR = {"ms": 1.0, "bytes": 64 * 1024, "count": 0}  # 小于该绝对差值不算回退
+
+# 指标名 -> 单位（所有指标都是越小越好）
+METRICS = {
+    "construct_ms": "ms",
+    "tray_ready_ms": "ms",
+    "break_first_paint_cold_ms": "ms",
+    "break_first_paint_ms": "ms",
+    "break_onset_prefetched_ms": "ms",
+    "fade_max_frame_interval_ms": "ms",
+    "fade_paint_ms": "ms",
+    "image_decode_ms": "ms",
+    "image_disk_cache_ms": "ms",
+    "update_style_ms": "ms",
+    "settings_dialog_ms": "ms",
+    "cycle_ms": "ms",
+    "rss_growth_per_cycle_bytes": "bytes",
+    "widget_growth": "count",
+    "qobject_growth": "count",
+    "hidden_paint_events": "count",
+    "hidden_timer_events": "count",
+    "visible_paint_events": "count",
+}
+
+
+def count_qobjects(app):
+    """存活的顶层控件及其全部子 QObject 数"""
+    from PyQt5.QtCore import QObject
+    return sum(1 + len(w.findChildren(QObject)) for w in app.topLevelWidgets())
+
+
+def median_ms(samples):
+    return round(statistics.median(samples), 3)
+
+
+def pump(app):
+    """处理待处理事件，包括 deleteLater（processEvents 在 exec_ 之外不会执行延迟删除）"""
+    from PyQt5.QtCore import QEvent
+    app.processEvents()
+    app.sendPostedEvents(None, QEvent.DeferredDelete)
+
+
+def process_until(app, predicate, timeout=2.0):
+    """处理事件直到条件满足或超时"""
+    deadline = time.perf_counter() + timeout
+    while not predicate() and time.perf_counter() < deadline:
+        pump(app)
+
+
+def run_benchmarks(cycles=DEFAULT_CYCLES, repeat=DEFAULT_REPEAT):
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    import main
+    from diagnostics import rss_bytes
+    from startup import StartupReport
+
+    results = {}
+
+    # 构建与托盘就绪
+    started_at = time.perf_counter()
+    window = main.StretchlyStyleApp(startup=StartupReport(started_at=started_at), idle_source="none")
+    results["construct_ms"] = round((time.perf_counter() - started_at) * 1000, 3)
+    results["tray_ready_ms"] = round(window.startup.elapsed("托盘就绪"), 3)
+    pump(app)
+
+    # 休息开始到首次绘制
+    def break_to_first_paint(prefetch=False):
+        if not window.engine.is_working:
+            window.skip_break()
+        if prefetch:
+            window.prefetch_next_break()
+            process_until(app, lambda: window.prefetcher.result is not None)
+        if window.break_win is not None:
+            window.break_win.last_time_to_visible = None
+        window.switch_mode()
+        process_until(app, lambda: window.break_win.last_time_to_visible is not None)
+        ms = window.break_win.last_time_to_visible
+        window.skip_break()
+        pump(app)
+        return ms
+
+    results["break_first_paint_cold_ms"] = round(break_to_first_paint(), 3)
+    results["break_first_paint_ms"] = median_ms([break_to_first_paint() for _ in range(repeat)])
+    results["break_onset_prefetched_ms"] = median_ms([break_to_first_paint(prefetch=True) for _ in range(repeat)])
+
+    # 淡入：离屏平台不能截屏，用同尺寸的纯色图代替桌面截图
+    from PyQt5.QtGui import QColor, QPixmap
+    from content import break_content
+    from overlay import BreakOverlay
+
+    fader = BreakOverlay(mode="opaque", fade_ms=200)
+    fader.set_content(seconds=20, **break_content("short"))
+    intervals, paints = [], []
+    for _ in range(max(1, repeat // 4)):
+        desktop = QPixmap(app.primaryScreen().size())
+        desktop.fill(QColor(40, 90, 160))
+        fader.canvas.base = desktop
+        fader.last_fade = None
+        fader.show_fullscreen()
+        process_until(app, lambda: fader.last_fade is not None)
+        intervals.append(fader.last_fade.max_interval_ms)
+        paints.append(fader.last_fade.mean_paint_ms)
+        fader.hide()
+        pump(app)
+    results["fade_max_frame_interval_ms"] = round(max(intervals), 3)
+    results["fade_paint_ms"] = median_ms(paints)
+    fader.deleteLater()
+    pump(app)
+
+    # 图片包：同步调用工作线程里的加载函数
+    from PIL import Image
+    from imagepack import PackEntry, cache_path, load_image
+
+    pack_dir = tempfile.mkdtemp(prefix="eyecare-bench-pack-")
+    try:
+        photo = os.path.join(pack_dir, "photo.jpg")
+        Image.effect_mandelbrot((4000, 3000), (-2.0, -1.5, 1.0, 1.5), 64).convert("RGB").save(photo, quality=92)
+        stat = os.stat(photo)
+        entry = PackEntry(photo, stat.st_mtime_ns, stat.st_size)
+        size = app.primaryScreen().size()
+        cache_dir = os.path.join(pack_dir, "cache")
+        decode, cached = [], []
+        for _ in range(max(1, repeat // 4)):
+            t = time.perf_counter()
+            load_image(entry, size.width(), size.height(), cache_dir)
+            decode.append((time.perf_counter() - t) * 1000)
+            t = time.perf_counter()
+            load_image(entry, size.width(), size.height(), cache_dir)
+            cached.append((time.perf_counter() - t) * 1000)
+            os.remove(cache_path(cache_dir, entry, size.width(), size.height()))
+        results["image_decode_ms"] = median_ms(decode)
+        results["image_disk_cache_ms"] = median_ms(cached)
+    finally:
+        shutil.rmtree(pack_dir, ignore_errors=True)
+
+    # 主题切换
+    window.ensure_ui()
+    samples = []
+    for _ in range(repeat):
+        window.is_dark = not window.is_dark
+        t = time.perf_counter()
+        window.update_style()
+        samples.append((time.perf_counter() - t) * 1000)
+    results["update_style_ms"] = median_ms(samples)
+
+    # 打开设置对话框：对话框进入自己的事件循环后立即关闭
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+
+        def close_dialog(t=t):
+            samples.append((time.perf_counter() - t) * 1000)
+            dialog = app.activeModalWidget()
+            if dialog is not None:
+                dialog.reject()
+
+        QTimer.singleShot(0, close_dialog)
+        window.show_settings()
+    results["settings_dialog_ms"] = median_ms(samples)
+
+    # 强制工作/休息循环的内存与对象增长（先跑几轮预热缓存）
+    for _ in range(10):
+        window.switch_mode()
+        pump(app)
+    rss_before = rss_bytes()
+    widgets_before = len(app.allWidgets())
+    qobjects_before = count_qobjects(app)
+    t = time.perf_counter()
+    for _ in range(cycles * 2):
+        window.switch_mode()
+        pump(app)
+    elapsed = time.perf_counter() - t
+    pump(app)
+    results["cycle_ms"] = round(elapsed * 1000 / max(1, cycles), 3)
+    results["rss_growth_per_cycle_bytes"] = round((rss_bytes() - rss_before) / max(1, cycles), 1)
+    results["widget_growth"] = len(app.allWidgets()) - widgets_before
+    results["qobject_growth"] = count_qobjects(app) - qobjects_before
+    results["rss_bytes"] = rss_bytes()
+
+    # 工作阶段中主窗口隐藏/显示时的绘制和定时器事件
+    from diagnostics import EventCounter
+
+    if not window.engine.is_working:
+        window.skip_break()
+    process_until(app, lambda: window.break_win is None or not window.break_win.isVisible())
+    counter = EventCounter()
+    counter.install()
+    for visible in (False, True):
+        window.setVisible(visible)
+        pump(app)
+        counter.reset()
+        process_until(app, lambda: False, EVENT_SPAN)
+        if visible:
+            results["visible_paint_events"] = counter.total("paint")
+        else:
+            results["hidden_paint_events"] = counter.total("paint")
+            results["hidden_timer_events"] = counter.total("timer")
+    counter.remove()
+
+    window.close()
+    pump(app)
+    return results
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """与基线比较，返回回退的指标列表 [(名称, 基线值, 当前值)]"""
+    regressions = []
+    for name, unit in METRICS.items():
+        if name not in baseline or name not in results:
+            continue
+        base, value = baseline[name], results[name]
+        if value - base > max(abs(base) * tolerance, NOISE_FLOOR[unit]):
+            regressions.append((name, base, value))
+    return regressions
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="bench", description="EyeCare 离屏性能基准")
+    parser.add_argument("--cycles", type=int, default=DEFAULT_CYCLES, help="强制工作/休息循环次数")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="单项计时的重复次数（取中位数）")
+    parser.add_argument("--output", help="结果 JSON 写入的文件（默认输出到标准输出）")
+    parser.add_argument("--baseline", help="与之比较的基线 JSON 文件")
+    parser.add_argument("--save-baseline", help="把本次结果保存为基线")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="允许的相对回退比例")
+    return parser.parse_args(argv[1:])
+
+
+def main(argv):
+    args = parse_args(argv)
+
+    # 设置和历史写到临时目录，不影响真实用户数据
+    config_dir = tempfile.mkdtemp(prefix="eyecare-bench-")
+    os.environ["EYECARE_CONFIG"] = os.path.join(config_dir, "settings.json")
+
+    try:
+        metrics = run_benchmarks(args.cycles, args.repeat)
+    finally:
+        shutil.rmtree(config_dir, ignore_errors=True)
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cycles": args.cycles,
+        "metrics": metrics,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(metrics, baseline.get("metrics", baseline), args.tolerance)
+        report["regressions"] = [{"metric": n, "baseline": b, "value": v} for n, b, v in regressions]
+        for name, base, value in regressions:
+            print(f"性能回退: {name} {base} -> {value}", file=sys.stderr)
+        exit_code = 1 if regressions else 0
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
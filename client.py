@@ -0,0 +1,193 @@
+"""共享调度守护进程的瘦客户端
+
+每个桌面会话只保留托盘图标；调度由守护进程（daemon.py）完成，收到休息开始的
+推送时才构建并显示休息窗口，倒计时按推送里的 ends_at 在本地计算。没有主窗口、
+设置存储的监视、历史记录线程和主题引擎。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from PyQt5.QtWidgets import QApplication, QSystemTrayIcon, QMenu
+from PyQt5.QtCore import QObject, QTimer, Qt
+from PyQt5.QtGui import QIcon
+from PyQt5.QtNetwork import QLocalSocket
+
+from daemon import default_socket_path
+from instance import local_remaining
+from scheduler import ms_until_change
+from settings import SettingsStore
+
+RECONNECT_DELAY_MS = 3000
+
+
+def session_name():
+    """当前桌面会话名"""
+    return os.environ.get("XDG_SESSION_ID") or os.environ.get("DISPLAY") or "default"
+
+
+def status_text(status):
+    """托盘提示文字"""
+    if status.get("off_duty"):
+        resumes_at = status.get("resumes_at")
+        if resumes_at is None:
+            return "EyeCare：不在提醒时段"
+        return f"EyeCare：不在提醒时段，{time.strftime('%m-%d %H:%M', time.localtime(resumes_at))} 恢复"
+    if status.get("paused"):
+        return "EyeCare：已暂停"
+    return f"EyeCare：{'休息中' if status.get('phase') == 'break' else '工作中'}"
+
+
+class DaemonClient(QObject):
+    """连接守护进程，按推送显示托盘状态和休息窗口"""
+
+    def __init__(self, path=None, session=None, parent=None):
+        super().__init__(parent)
+        self.path = path or default_socket_path()
+        self.session = session or session_name()
+        self.settings = SettingsStore().load()
+        self.status = {}
+        self.buffer = b""
+        self.break_win = None
+
+        self.socket = QLocalSocket(self)
+        self.socket.connected.connect(self.on_connected)
+        self.socket.readyRead.connect(self.on_ready_read)
+        self.socket.disconnected.connect(self.schedule_reconnect)
+        self.socket.errorOccurred.connect(self.schedule_reconnect)
+
+        self.reconnect_timer = QTimer(self)
+        self.reconnect_timer.setSingleShot(True)
+        self.reconnect_timer.timeout.connect(self.connect_to_daemon)
+
+        # 休息倒计时：仅在休息窗口显示时运行，在显示的秒数变化时唤醒
+        self.break_timer = QTimer(self)
+        self.break_timer.setSingleShot(True)
+        self.break_timer.setTimerType(Qt.PreciseTimer)
+        self.break_timer.timeout.connect(self.update_countdown)
+
+        self.init_tray()
+        self.connect_to_daemon()
+
+    def init_tray(self):
+        """托盘图标与菜单"""
+        self.tray = QSystemTrayIcon(self)
+        if os.path.exists("icon.png"):
+            self.tray.setIcon(QIcon("icon.png"))
+        menu = QMenu()
+        self.pause_action = menu.addAction("暂停")
+        self.pause_action.triggered.connect(self.toggle_pause)
+        skip_action = menu.addAction("跳过休息")
+        skip_action.triggered.connect(lambda: self.send({"commands": ["skip"]}))
+        exit_action = menu.addAction("退出")
+        exit_action.triggered.connect(QApplication.quit)
+        self.tray.setContextMenu(menu)
+        self.tray_menu = menu
+        if QSystemTrayIcon.isSystemTrayAvailable():
+            self.tray.show()
+        else:
+            print("托盘初始化失败: 系统托盘不可用")
+
+    # ---- 连接 ----
+
+    def connect_to_daemon(self):
+        self.buffer = b""
+        self.socket.abort()
+        self.socket.connectToServer(self.path)
+
+    def schedule_reconnect(self, *_):
+        if not self.reconnect_timer.isActive():
+            self.tray.setToolTip("EyeCare：未连接到调度服务")
+            self.reconnect_timer.start(RECONNECT_DELAY_MS)
+
+    def on_connected(self):
+        self.send({"request": "register", "session": self.session, "settings": self.settings.to_dict()})
+
+    def send(self, message):
+        if self.socket.state() == QLocalSocket.ConnectedState:
+            self.socket.write(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    def on_ready_read(self):
+        self.buffer += bytes(self.socket.readAll())
+        while b"\n" in self.buffer:
+            line, self.buffer = self.buffer.split(b"\n", 1)
+            try:
+                message = json.loads(line.decode("utf-8"))
+            except ValueError:
+                continue
+            if "status" in message:
+                self.on_status(message["status"])
+            elif not message.get("ok", True):
+                print(f"调度服务返回错误: {message.get('error')}")
+
+    # ---- 状态 ----
+
+    def on_status(self, status):
+        """守护进程推送/回复的状态"""
+        was_break = self.status.get("phase") == "break"
+        self.status = status
+        self.pause_action.setText("继续" if status.get("paused") else "暂停")
+        self.tray.setToolTip(status_text(status))
+
+        if status.get("phase") == "break" and not status.get("away") and not status.get("off_duty"):
+            if not was_break or self.break_win is None or not self.break_win.isVisible():
+                self.show_break(status)
+            self.update_countdown()
+        else:
+            self.close_break()
+
+    def toggle_pause(self):
+        self.send({"commands": ["resume" if self.status.get("paused") else "pause"]})
+
+    def show_break(self, status):
+        """显示休息窗口（首次使用时才构建）"""
+        requested_at = time.perf_counter()
+        from content import break_content
+        from overlay import BreakOverlay
+
+        if self.break_win is None:
+            self.break_win = BreakOverlay(mode=self.settings.overlay_mode, backdrop=self.settings.overlay_backdrop,
+                                          fade_ms=self.settings.overlay_fade_ms)
+            self.break_win.skip_requested.connect(lambda: self.send({"commands": ["skip"]}))
+        self.break_win.set_content(seconds=status.get("duration", 0), **break_content(status.get("kind")))
+        self.break_win.show_fullscreen(requested_at)
+
+    def update_countdown(self):
+        """刷新倒计时，并在显示的秒数下一次变化时再次唤醒（暂停时不唤醒）"""
+        if self.break_win is None or not self.break_win.isVisible():
+            self.break_timer.stop()
+            return
+        self.break_win.set_countdown(local_remaining(self.status))
+        ends_at = self.status.get("ends_at")
+        ms = ms_until_change(ends_at - time.time()) if ends_at is not None else None
+        if ms is None:
+            self.break_timer.stop()
+        else:
+            self.break_timer.start(ms)
+
+    def close_break(self):
+        self.break_timer.stop()
+        if self.break_win is not None:
+            self.break_win.dismiss()
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="eyecare --client", description="EyeCare 共享调度瘦客户端")
+    parser.add_argument("--client", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--socket", default=None, help="守护进程的 Unix 套接字路径")
+    parser.add_argument("--session", default=None, help="会话名（默认取 XDG_SESSION_ID）")
+    args, _ = parser.parse_known_args(argv[1:])
+
+    QApplication.setAttribute(Qt.AA_EnableHighDpiScaling)
+    QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps)
+    app = QApplication(argv)
+    app.setQuitOnLastWindowClosed(False)
+    app.setStyle("Fusion")
+    client = DaemonClient(args.socket, args.session)
+    return app.exec_()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,91 @@
+"""休息提醒的内容：标题、鼓励语、图标、建议和背景色
+
+按休息类型区分：主循环的 "short"/"long"，以及 reminders.REMINDER_TYPES 中的提醒。
+"""
+import random
+
+from PyQt5.QtGui import QColor
+
+# 随机鼓励语库
+ENCOURAGEMENTS = [
+    "做得好！短暂的休息能让眼睛更明亮哦~ ✨",
+    "你值得这片刻的放松，眼睛会感谢你的！ 😊",
+    "保护视力就是投资未来，你做得太棒了！ 👏",
+    "休息是为了走更远的路，你的眼睛真幸运！ 🌟",
+    "聪明的你都知道适时休息，继续保持！ 💪",
+    "20秒的放松，换来看世界的清晰！ 🌈",
+    "你对自己的照顾，让未来更明亮！ ☀️",
+    "爱护眼睛的你，真是闪闪发光！ ⭐",
+    "短暂的休息，大大的回报！ 🌸",
+    "你的眼睛正在享受这美好的休息时刻！ 🎉"
+]
+
+ICONS = ["👀", "👁️", "😊", "🌿", "🌞", "🌸"]
+
+LONG_BREAK_TITLE = "🌟 长时间休息时间到！"
+LONG_BREAK_TIPS = [
+    "💡 深度放松建议:",
+    "• 起身走动5分钟",
+    "• 做全身拉伸运动",
+    "• 远眺窗外风景",
+    "• 喝杯水放松一下"
+]
+
+SHORT_BREAK_TITLE = "👀 眼睛休息时间到！"
+SHORT_BREAK_TIPS = [
+    "💡 快速放松建议:",
+    "• 远眺20秒放松眼睛",
+    "• 眨眼10次湿润眼球",
+    "• 深呼吸3次放松身心",
+    "• 转动脖子缓解僵硬"
+]
+
+# 休息类型 -> (标题, 建议, 主窗口状态文字)
+BREAK_CONTENT = {
+    "short": (SHORT_BREAK_TITLE, SHORT_BREAK_TIPS, "休息中..."),
+    "long": (LONG_BREAK_TITLE, LONG_BREAK_TIPS, "长时间休息中..."),
+    "posture": ("🧍 起身活动时间到！", [
+        "💡 调整坐姿建议:",
+        "• 站起来走动一分钟",
+        "• 挺直后背放松肩膀",
+        "• 屏幕顶端与视线平齐",
+        "• 双脚平放在地面上"
+    ], "起身活动中..."),
+    "hydration": ("💧 喝水时间到！", [
+        "💡 补水建议:",
+        "• 喝一杯温水",
+        "• 少量多次更好吸收",
+        "• 顺便起身走一走"
+    ], "喝水休息中..."),
+    "micro": ("🌿 微休息一下", [
+        "💡 放松建议:",
+        "• 松开鼠标和键盘",
+        "• 转动手腕和肩膀",
+        "• 闭眼深呼吸一次"
+    ], "微休息中..."),
+}
+
+
+def random_pastel_color():
+    """随机生成柔和背景色"""
+    h = random.randint(0, 359)
+    s = random.randint(50, 150)
+    v = random.randint(200, 255)
+    return QColor.fromHsv(h, s, v)
+
+
+def break_label(kind):
+    """主窗口显示的休息状态文字"""
+    return BREAK_CONTENT.get(kind, BREAK_CONTENT["short"])[2]
+
+
+def break_content(kind):
+    """随机挑选一次休息的内容，返回可直接传给 BreakOverlay.set_content 的参数"""
+    title, tips, _ = BREAK_CONTENT.get(kind, BREAK_CONTENT["short"])
+    return {
+        "title": title,
+        "encouragement": random.choice(ENCOURAGEMENTS),
+        "icon": random.choice(ICONS),
+        "tips": tips,
+        "bg_color": random_pastel_color(),
+    }
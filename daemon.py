@@ -0,0 +1,486 @@
+"""多会话共享调度守护进程（单线程 selectors 事件循环，不创建任何 Qt 对象）
+
+终端服务器上每个桌面会话不再各跑一个完整的界面程序：一个守护进程为所有会话
+维护调度状态（每个会话一个 ScheduleEngine），所有截止时间放在同一个时间轮里，
+同一 tick 内到期的会话一次唤醒处理完；没有到期项时进程完全休眠。各会话只运行
+显示托盘和休息窗口的瘦客户端（client.py），由守护进程推送阶段变化。
+
+协议与单实例控制接口相同（每行一个 JSON），另加：
+  {"request": "register", "session": "...", "settings": {...}}  注册/接管会话
+  {"request": "stats"}                                          守护进程统计
+会话按 (对端 uid, 会话名) 区分，一个用户无法控制其他用户的会话，每个用户的会话数有
+上限；无法取得对端 uid 的连接被拒绝。套接字放在 root 所有、其他用户不可写的运行
+目录（默认 /run/eyecare）里，其他用户无法抢先占用这个路径冒充守护进程。
+"""
+import argparse
+import json
+import math
+import os
+import selectors
+import socket
+import struct
+import sys
+
+from engine import BREAK_STARTED, OFF_DUTY, WORK_STARTED, ScheduleEngine, monotonic_clock
+from reminders import parse_reminders
+from timetable import load_timetable
+from settings import Settings
+
+WHEEL_TICK = 1.0  # 秒；同一 tick 内到期的会话合并为一次唤醒
+WHEEL_SLOTS = 4096  # 覆盖约 68 分钟，更远的截止时间在槽内等待多轮
+WAKE_SLACK = 0.001  # 醒来时刻略晚于 tick 边界，保证截止时间已过
+MAX_CLIENT_BUFFER = 64 * 1024
+SESSION_EXPIRY = 24 * 3600  # 没有客户端连接超过该秒数的会话被清除
+MAX_SESSIONS_PER_UID = 16
+RUNTIME_DIR = "/run/eyecare"
+
+
+def default_socket_path():
+    """守护进程套接字路径，可用环境变量 EYECARE_DAEMON_SOCKET 覆盖"""
+    return os.environ.get("EYECARE_DAEMON_SOCKET") or os.path.join(RUNTIME_DIR, "daemon.sock")
+
+
+def check_socket_dir(directory):
+    """确认套接字目录只能由 root 或守护进程自己的用户写入（以 root 运行时按需创建），否则抛出 RuntimeError"""
+    if not os.path.isdir(directory):
+        if os.geteuid() != 0:
+            raise RuntimeError(f"套接字目录不存在: {directory}（以 root 运行或先创建该目录）")
+        os.makedirs(directory, 0o755)
+    st = os.stat(directory)
+    if st.st_uid not in (0, os.geteuid()):
+        raise RuntimeError(f"套接字目录的所有者不是 root 或当前用户: {directory}")
+    if st.st_mode & 0o022:
+        raise RuntimeError(f"套接字目录可被其他用户写入: {directory}")
+
+
+class TimerWheel:
+    """哈希时间轮：截止时间向上取整到 tick，落入 tick % 槽数 的槽位"""
+
+    def __init__(self, now, tick=WHEEL_TICK, size=WHEEL_SLOTS):
+        self.tick = tick
+        self.size = size
+        self.slots = [{} for _ in range(size)]  # 每个槽：键 -> 绝对 tick 号
+        self.ticks = {}  # 键 -> 绝对 tick 号
+        self.cursor = math.floor(now / tick)  # 已处理到的 tick
+
+    def __len__(self):
+        return len(self.ticks)
+
+    def schedule(self, key, deadline):
+        """设置（或替换）一个键的截止时间"""
+        self.cancel(key)
+        # 减去极小量，避免浮点误差把正好落在边界上的截止时间推到下一个 tick
+        n = max(math.ceil(deadline / self.tick - 1e-9), self.cursor + 1)
+        self.slots[n % self.size][key] = n
+        self.ticks[key] = n
+
+    def cancel(self, key):
+        n = self.ticks.pop(key, None)
+        if n is not None:
+            del self.slots[n % self.size][key]
+
+    def next_deadline(self):
+        """最近一个有到期项的 tick 时刻，时间轮为空时返回 None"""
+        if not self.ticks:
+            return None
+        for n in range(self.cursor + 1, self.cursor + 1 + self.size):
+            slot = self.slots[n % self.size]
+            if slot and any(t == n for t in slot.values()):
+                return n * self.tick
+        # 一整圈内都没有到期项（只有很远的截止时间）
+        return min(self.ticks.values()) * self.tick
+
+    def expire(self, now):
+        """取出所有在 now 之前到期的键"""
+        target = math.floor(now / self.tick)
+        if target <= self.cursor:
+            return []
+        if target - self.cursor >= self.size:
+            ticks = range(self.size)  # 落后超过一整圈（如系统休眠），检查所有槽
+        else:
+            ticks = range(self.cursor + 1, target + 1)
+        expired = []
+        for n in ticks:
+            slot = self.slots[n % self.size]
+            for key in [k for k, t in slot.items() if t <= target]:
+                del slot[key]
+                del self.ticks[key]
+                expired.append(key)
+        self.cursor = target
+        return expired
+
+
+class Session:
+    """一个桌面会话的调度状态"""
+
+    def __init__(self, key, engine):
+        self.key = key
+        self.engine = engine
+        self.clients = set()
+        self.detached_at = None  # 最后一个客户端断开的时刻（单调时钟）
+
+
+class Client:
+    """一个客户端连接"""
+
+    def __init__(self, sock, uid):
+        self.sock = sock
+        self.uid = uid
+        self.inbuf = b""
+        self.outbuf = b""
+        self.session = None
+        self.subscribed = False
+
+
+def peer_uid(sock):
+    """Unix 套接字对端的 uid（Linux SO_PEERCRED），无法获取时为 None"""
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    try:
+        creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        return struct.unpack("3i", creds)[1]
+    except OSError:
+        return None
+
+
+def encode(message):
+    return json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def check_message(message):
+    """检查请求的结构，不符时抛出 ValueError（与 instance.check_command_message 一致，不依赖 Qt）"""
+    if not isinstance(message, dict):
+        raise ValueError("消息必须是 JSON 对象")
+    commands = message.setdefault("commands", [])
+    if not isinstance(commands, list) or not all(isinstance(command, str) for command in commands):
+        raise ValueError("commands 必须是字符串列表")
+    for key in ("set", "settings"):
+        if not isinstance(message.setdefault(key, {}), dict):
+            raise ValueError(f"{key} 必须是 JSON 对象")
+    if not isinstance(message.get("session", ""), str):
+        raise ValueError("session 必须是字符串")
+    return message
+
+
+class SchedulerDaemon:
+    """单进程、单线程的多会话调度服务"""
+
+    def __init__(self, path=None, clock=monotonic_clock, tick=WHEEL_TICK):
+        self.path = path or default_socket_path()
+        self.clock = clock
+        self.tick = tick
+        self.wheel = TimerWheel(clock(), tick)
+        self.sessions = {}
+        self.selector = selectors.DefaultSelector()
+        self.listener = None
+        self.running = False
+        self.wakeups = 0
+        self.transitions = 0
+
+    # ---- 会话 ----
+
+    def engine_clock(self):
+        """按 tick 取整的时钟：阶段从 tick 边界开始，截止时间也落在边界上，合并唤醒不会累积延迟"""
+        return math.floor(self.clock() / self.tick + 1e-9) * self.tick
+
+    def session(self, key, settings):
+        """取得或创建会话"""
+        session = self.sessions.get(key)
+        if session is None:
+            engine = ScheduleEngine(settings.work_time, settings.break_time, settings.long_break_time,
+                                    settings.break_interval, clock=self.engine_clock)
+            engine.set_reminders(parse_reminders(settings.reminders))
+            engine.set_timetable(load_timetable(settings.schedule))
+            session = Session(key, engine)
+            engine.on_reschedule = lambda: self.reschedule(session)
+            engine.subscribe(lambda event: self.on_engine_event(session, event))
+            self.sessions[key] = session
+            engine.start()
+        return session
+
+    def reschedule(self, session):
+        wakeup = session.engine.next_wakeup()
+        if wakeup is None:
+            self.wheel.cancel(session.key)
+        else:
+            self.wheel.schedule(session.key, wakeup)
+
+    def on_engine_event(self, session, event):
+        if event.kind in (WORK_STARTED, BREAK_STARTED, OFF_DUTY):
+            self.publish(session, event.kind)
+
+    def publish(self, session, reason):
+        line = encode({"event": reason, "status": session.engine.snapshot()})
+        for client in list(session.clients):
+            if client.subscribed:
+                self.send(client, line)
+
+    def attach(self, client, session):
+        if client.session is not None:
+            self.detach(client)
+        client.session = session
+        session.clients.add(client)
+        session.detached_at = None
+        session.engine.unlock()  # 会话重新连上：离开足够久视为已休息
+
+    def detach(self, client):
+        session, client.session = client.session, None
+        if session is None:
+            return
+        session.clients.discard(client)
+        if not session.clients:
+            # 没有客户端（注销/断线）：按锁屏处理，不再唤醒
+            session.engine.lock()
+            session.detached_at = self.engine_clock()
+
+    def expire_sessions(self):
+        now = self.engine_clock()
+        for key, session in list(self.sessions.items()):
+            if session.detached_at is not None and now - session.detached_at > SESSION_EXPIRY:
+                self.wheel.cancel(key)
+                del self.sessions[key]
+
+    # ---- 请求 ----
+
+    def handle(self, client, message):
+        """处理一条请求，返回回复字典"""
+        kind = message.get("request")
+        if kind == "stats":
+            return {"ok": True, "stats": self.stats()}
+        if kind == "register":
+            settings = Settings.from_dict(message["settings"])
+            self.expire_sessions()
+            key = (client.uid, message.get("session") or "default")
+            if key not in self.sessions and \
+                    sum(1 for uid, _ in self.sessions if uid == client.uid) >= MAX_SESSIONS_PER_UID:
+                return {"ok": False, "error": f"会话数已达上限（每个用户 {MAX_SESSIONS_PER_UID} 个）"}
+            existing = self.sessions.get(key)
+            self.attach(client, self.session(key, settings))
+            if existing is not None:
+                # 已有的会话（客户端重启）：按客户端当前的设置更新
+                self.update_settings(existing, message["settings"])
+            client.subscribed = True
+            return {"ok": True, "status": client.session.engine.snapshot()}
+        if client.session is None:
+            return {"ok": False, "error": "会话未注册"}
+
+        engine = client.session.engine
+        if kind == "subscribe":
+            client.subscribed = True
+        elif kind == "unsubscribe":
+            client.subscribed = False
+        elif kind is None:
+            self.apply(client.session, message)
+        elif kind != "status":
+            return {"ok": False, "error": f"未知请求: {kind}"}
+        return {"ok": True, "status": engine.snapshot()}
+
+    def update_settings(self, session, changes):
+        """按设置项修改会话的调度（修改设置和重新注册共用）"""
+        if not changes:
+            return
+        engine = session.engine
+        current = {"work_time": engine.work_time, "break_time": engine.break_time,
+                   "long_break_time": engine.long_break_time, "break_interval": engine.break_interval}
+        settings = Settings.from_dict(dict(current, **changes))
+        engine.configure(settings.work_time, settings.break_time, settings.long_break_time,
+                         settings.break_interval)
+        if isinstance(changes.get("reminders"), str):
+            engine.set_reminders(parse_reminders(changes["reminders"]))
+        if isinstance(changes.get("schedule"), str):
+            engine.set_timetable(load_timetable(changes["schedule"]))
+        engine.advance()
+        self.publish(session, "settings")
+
+    def apply(self, session, message):
+        """执行命令和设置修改"""
+        engine = session.engine
+        self.update_settings(session, message["set"])
+        for command in message["commands"]:
+            if command == "pause":
+                engine.pause()
+            elif command == "resume":
+                engine.resume()
+            elif command == "skip":
+                engine.skip_break()
+            else:
+                continue
+            if command != "skip":
+                self.publish(session, "paused" if command == "pause" else "resumed")
+
+    def stats(self):
+        return {
+            "sessions": len(self.sessions),
+            "clients": sum(len(s.clients) for s in self.sessions.values()),
+            "scheduled": len(self.wheel),
+            "wakeups": self.wakeups,
+            "transitions": self.transitions,
+        }
+
+    # ---- 网络 ----
+
+    def listen(self):
+        """监听 Unix 套接字（清理残留的套接字文件）"""
+        check_socket_dir(os.path.dirname(os.path.abspath(self.path)))
+        if os.path.exists(self.path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.path)
+                raise RuntimeError(f"守护进程已在运行: {self.path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(self.path)
+            finally:
+                probe.close()
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(self.path)
+        os.chmod(self.path, 0o666)  # 所有用户可连接，按对端 uid 隔离会话（目录本身其他用户不可写）
+        self.listener.listen(128)
+        self.listener.setblocking(False)
+        self.selector.register(self.listener, selectors.EVENT_READ, None)
+
+    def accept(self):
+        try:
+            sock, _ = self.listener.accept()
+        except BlockingIOError:
+            return
+        uid = peer_uid(sock)
+        if uid is None:
+            # 无法区分用户时不能隔离会话
+            sock.close()
+            return
+        sock.setblocking(False)
+        self.selector.register(sock, selectors.EVENT_READ, Client(sock, uid))
+
+    def close_client(self, client):
+        self.detach(client)
+        try:
+            self.selector.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        client.sock.close()
+
+    def send(self, client, data):
+        """非阻塞发送，写不完的部分留在缓冲区等可写时继续；积压过多的客户端被断开"""
+        if not client.outbuf:
+            try:
+                sent = client.sock.send(data)
+            except BlockingIOError:
+                sent = 0
+            except OSError:
+                self.close_client(client)
+                return
+            data = data[sent:]
+            if not data:
+                return
+        client.outbuf += data
+        if len(client.outbuf) > MAX_CLIENT_BUFFER:
+            self.close_client(client)
+            return
+        self.selector.modify(client.sock, selectors.EVENT_READ | selectors.EVENT_WRITE, client)
+
+    def on_writable(self, client):
+        try:
+            sent = client.sock.send(client.outbuf)
+        except BlockingIOError:
+            return
+        except OSError:
+            self.close_client(client)
+            return
+        client.outbuf = client.outbuf[sent:]
+        if not client.outbuf:
+            self.selector.modify(client.sock, selectors.EVENT_READ, client)
+
+    def on_readable(self, client):
+        try:
+            data = client.sock.recv(65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self.close_client(client)
+            return
+        client.inbuf += data
+        if len(client.inbuf) > MAX_CLIENT_BUFFER:
+            self.close_client(client)
+            return
+        while b"\n" in client.inbuf:
+            line, client.inbuf = client.inbuf.split(b"\n", 1)
+            try:
+                message = check_message(json.loads(line.decode("utf-8")))
+            except ValueError as e:
+                reply = {"ok": False, "error": str(e)}
+            else:
+                try:
+                    reply = self.handle(client, message)
+                except Exception as e:
+                    # 一条请求出错只回复错误，不影响其他会话
+                    print(f"处理请求失败: {e!r}", file=sys.stderr)
+                    reply = {"ok": False, "error": f"处理请求失败: {e}"}
+            self.send(client, encode(reply))
+            if client.sock.fileno() < 0:
+                return
+
+    # ---- 主循环 ----
+
+    def run_due(self):
+        """推进所有已到期的会话"""
+        for key in self.wheel.expire(self.clock()):
+            session = self.sessions.get(key)
+            if session is None:
+                continue
+            if session.engine.advance():
+                self.transitions += 1
+            else:
+                self.reschedule(session)
+
+    def serve_forever(self):
+        self.listen()
+        self.running = True
+        try:
+            while self.running:
+                deadline = self.wheel.next_deadline()
+                timeout = None if deadline is None else max(0.0, deadline - self.clock() + WAKE_SLACK)
+                events = self.selector.select(timeout)
+                self.wakeups += 1
+                for key, mask in events:
+                    if key.data is None:
+                        self.accept()
+                    elif mask & selectors.EVENT_READ:
+                        self.on_readable(key.data)
+                    if key.data is not None and mask & selectors.EVENT_WRITE and key.data.sock.fileno() >= 0:
+                        self.on_writable(key.data)
+                self.run_due()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        self.running = False
+        for key in list(self.selector.get_map().values()):
+            key.fileobj.close()
+        self.selector.close()
+        if self.listener is not None and os.path.exists(self.path):
+            os.unlink(self.path)
+            self.listener = None
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="eyecare --daemon", description="EyeCare 多会话共享调度守护进程")
+    parser.add_argument("--daemon", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--socket", default=None, help="监听的 Unix 套接字路径")
+    parser.add_argument("--tick", type=float, default=WHEEL_TICK, help="时间轮精度（秒）")
+    args, _ = parser.parse_known_args(argv[1:])
+
+    daemon = SchedulerDaemon(args.socket, tick=args.tick)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    except (OSError, RuntimeError) as e:
+        print(f"守护进程启动失败: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
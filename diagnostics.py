@@ -0,0 +1,221 @@
+"""运行时诊断
+
+统计存活的 QObject（按类名），在每个休息周期开始时记录 tracemalloc 快照增量和
+对象数变化，并列出被监视但始终没有销毁的控件（如关闭后仍残留的对话框）；
+另按接收者类名统计绘制和定时器事件，用于确认隐藏时没有多余的刷新；并记录每次
+休息从到期到窗口首次绘制的延迟。
+用 --diagnostics 文件 启动时开启并在退出时写入报告，也可以从托盘菜单随时导出。
+"""
+import ctypes
+import ctypes.util
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter, deque
+
+from PyQt5 import sip
+from PyQt5.QtCore import QEvent, QObject
+from PyQt5.QtWidgets import QApplication
+
+from engine import BREAK_STARTED
+
+TRACEMALLOC_FRAMES = 5
+MAX_CYCLES = 50  # 保留最近多少个周期的记录
+TOP_ALLOCATIONS = 10
+
+
+def rss_bytes():
+    """当前进程常驻内存（Linux 读 /proc，其他平台取峰值）"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def trim_heap():
+    """把空闲的堆内存还给系统（glibc malloc_trim），其他平台不做任何事"""
+    if not sys.platform.startswith("linux"):
+        return
+    try:
+        ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def live_qobjects():
+    """当前存活的 QObject：应用和顶层控件的对象树，加上 Python 持有的无父对象"""
+    app = QApplication.instance()
+    objects = {}
+    roots = [app] + app.topLevelWidgets() if app is not None else []
+    for root in roots:
+        for obj in [root] + root.findChildren(QObject):
+            objects[sip.unwrapinstance(obj)] = obj
+    for obj in gc.get_objects():
+        if isinstance(obj, QObject) and not sip.isdeleted(obj):
+            objects.setdefault(sip.unwrapinstance(obj), obj)
+    return list(objects.values())
+
+
+def count_by_class():
+    """按类名统计存活的 QObject"""
+    return Counter(obj.metaObject().className() for obj in live_qobjects())
+
+
+def take_snapshot():
+    snapshot = tracemalloc.take_snapshot()
+    return snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),  # 诊断记录本身
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ])
+
+
+class EventCounter(QObject):
+    """应用级事件过滤器：按接收者类名统计绘制和定时器事件"""
+
+    KINDS = {QEvent.Paint: "paint", QEvent.Timer: "timer"}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.counts = Counter()  # (事件种类, 类名) -> 次数
+        self.installed = False
+
+    def install(self):
+        app = QApplication.instance()
+        if app is not None and not self.installed:
+            app.installEventFilter(self)
+            self.installed = True
+
+    def remove(self):
+        app = QApplication.instance()
+        if app is not None and self.installed:
+            app.removeEventFilter(self)
+            self.installed = False
+
+    def eventFilter(self, obj, event):
+        kind = self.KINDS.get(event.type())
+        if kind is not None:
+            self.counts[(kind, obj.metaObject().className())] += 1
+        return False
+
+    def total(self, kind):
+        return sum(n for (k, _), n in self.counts.items() if k == kind)
+
+    def reset(self):
+        self.counts.clear()
+
+    def report(self):
+        """{事件种类: {类名: 次数}}"""
+        result = {}
+        for (kind, name), n in self.counts.most_common():
+            result.setdefault(kind, {})[name] = n
+        return result
+
+
+class Diagnostics(QObject):
+    """按休息周期采样内存和对象数"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.started_at = time.time()
+        self.cycles = deque(maxlen=MAX_CYCLES)
+        self.cycle_count = 0
+        self.watched = {}  # 对象地址 -> (说明, 对象, 开始监视的时刻)
+        self.last_snapshot = None
+        self.last_counts = None
+        self.events = EventCounter(self)
+        self.onsets = deque(maxlen=MAX_CYCLES)
+        self.releases = deque(maxlen=MAX_CYCLES)
+
+    def start(self):
+        """开启 tracemalloc 和事件计数并记录起点"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        self.events.install()
+        self.last_snapshot = take_snapshot()
+        self.last_counts = count_by_class()
+
+    def attach(self, driver):
+        """以调度器的休息开始事件作为周期边界"""
+        driver.engine_event.connect(self.on_engine_event)
+
+    def on_engine_event(self, event):
+        if event.kind == BREAK_STARTED:
+            self.record_cycle()
+
+    def record_cycle(self):
+        """记录与上一个周期相比的内存和对象数变化"""
+        snapshot = take_snapshot()
+        counts = count_by_class()
+        self.cycle_count += 1
+
+        stats = snapshot.compare_to(self.last_snapshot, "lineno")
+        counts_delta = counts.copy()
+        counts_delta.subtract(self.last_counts)
+        self.cycles.append({
+            "cycle": self.cycle_count,
+            "time": time.time(),
+            "traced_bytes_delta": sum(stat.size_diff for stat in stats),
+            "top_allocations": [
+                {"where": str(stat.traceback[0]), "size_diff": stat.size_diff, "count_diff": stat.count_diff}
+                for stat in stats[:TOP_ALLOCATIONS] if stat.size_diff
+            ],
+            "qobject_delta": {name: n for name, n in counts_delta.items() if n},
+        })
+        self.last_snapshot = snapshot
+        self.last_counts = counts
+
+    def record_onset(self, onset):
+        """记录一次休息开始的延迟 {kind, prefetched, onset_ms}"""
+        self.onsets.append(dict(onset, time=time.time()))
+
+    def record_release(self, label, before, after):
+        """记录托盘模式释放隐藏界面前后的常驻内存"""
+        self.releases.append({"label": label, "rss_before": before, "rss_after": after, "time": time.time()})
+
+    def watch(self, obj, label):
+        """监视一个本应被销毁的对象，销毁后自动移除"""
+        key = sip.unwrapinstance(obj)
+        self.watched[key] = (label, obj, time.time())
+        obj.destroyed.connect(lambda _=None, key=key: self.watched.pop(key, None))
+
+    def undestroyed(self):
+        """被监视但仍然存活的对象"""
+        now = time.time()
+        return [{"label": label, "class": obj.metaObject().className(),
+                 "visible": bool(getattr(obj, "isVisible", lambda: False)()), "age_seconds": round(now - since, 1)}
+                for label, obj, since in self.watched.values() if not sip.isdeleted(obj)]
+
+    def report(self):
+        """汇总为可序列化的字典"""
+        counts = count_by_class()
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            "started_at": self.started_at,
+            "generated_at": time.time(),
+            "rss_bytes": rss_bytes(),
+            "qobjects_total": sum(counts.values()),
+            "qobjects_by_class": dict(counts.most_common()),
+            "traced_memory": {"current": current, "peak": peak},
+            "events": self.events.report(),
+            "cycles": list(self.cycles),
+            "break_onsets": list(self.onsets),
+            "releases": list(self.releases),
+            "undestroyed": self.undestroyed(),
+        }
+
+    def dump(self, path):
+        """写入报告文件，返回是否成功"""
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.report(), f, ensure_ascii=False, indent=2)
+            return True
+        except OSError as e:
+            print(f"写入诊断报告失败: {e}")
+            return False
@@ -0,0 +1,587 @@
+"""工作/休息调度状态机（不依赖 Qt）
+
+时钟可注入：界面程序使用真实的单调时钟，由 scheduler.EngineDriver 在截止时间
+唤醒；测试和模拟使用 VirtualClock，可以在毫秒内跑完数周的调度。
+
+主循环之外的提醒（坐姿、喝水……）放在 reminders.ReminderQueue 的堆里，与阶段
+截止时间共用一次唤醒。提醒在工作中到期时打断工作（工作剩余时间保留），休息
+结束后继续；同时到期（相差不超过 ABSORB_WINDOW）或在休息中到期的提醒按时长
+合并：时长最长的一个显示，其余视为已完成，如长休息吸收同时到期的短提醒。
+
+可选的作息表（timetable.Timetable）规定允许提醒的时段：时段外引擎“下班”，
+没有任何截止时间，只在下一个允许的时刻唤醒一次，之后开始新的工作周期。
+"""
+import math
+import time
+from collections import namedtuple
+
+from reminders import ReminderQueue
+
+# 定时器触发晚于截止时间超过该秒数，视为系统休眠/进程被冻结
+CATCH_UP_GRACE = 5.0
+# 到期时间相差不超过该秒数的提醒视为同时到期，合并为一次休息
+ABSORB_WINDOW = 120.0
+
+if hasattr(time, "CLOCK_BOOTTIME"):
+    def monotonic_clock():
+        """包含系统休眠时间的单调时钟（Linux CLOCK_BOOTTIME）"""
+        return time.clock_gettime(time.CLOCK_BOOTTIME)
+else:
+    # Windows 的 monotonic 本身就包含休眠时间
+    monotonic_clock = time.monotonic
+
+# 事件类型：阶段开始
+WORK_STARTED = "work_started"
+BREAK_STARTED = "break_started"
+# 事件类型：阶段结束（duration 为实际时长，与历史记录的类型一致）
+WORK = "work"
+BREAK_TAKEN = "break_taken"
+BREAK_SKIPPED = "break_skipped"
+PAUSE = "pause"
+AWAY = "away"
+# 事件类型：提醒被合并到另一次休息中（detail 为被合并的休息类型）
+ABSORBED = "absorbed"
+# 事件类型：进入作息表不允许提醒的时段（duration 为距恢复的秒数）
+OFF_DUTY = "off_duty"
+
+# time: 事件发生时的时钟读数；duration: 秒；detail: 休息类型，主循环为 "long"/"short"，其余为提醒名
+Event = namedtuple("Event", ["time", "kind", "duration", "detail"])
+# 工作中预计的下一次休息：到期时刻、类型、时长
+Upcoming = namedtuple("Upcoming", ["time", "kind", "duration"])
+
+
+class VirtualClock:
+    """可手动拨动的时钟（模拟/测试用）"""
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class ScheduleEngine:
+    """工作/休息循环：每 break_interval 次休息中有一次长休息"""
+
+    def __init__(self, work_time=30 * 60, break_time=20, long_break_time=5 * 60, break_interval=4,
+                 clock=monotonic_clock, catch_up_grace=CATCH_UP_GRACE, idle_probe=None,
+                 absorb_window=ABSORB_WINDOW, wall_clock=time.time):
+        self.clock = clock
+        self.wall_clock = wall_clock  # 作息表按墙上时间判断
+        self.catch_up_grace = catch_up_grace
+        self.absorb_window = absorb_window
+        self.idle_probe = idle_probe  # 可选：返回用户空闲秒数的函数
+        self.work_time = work_time
+        self.break_time = break_time
+        self.long_break_time = long_break_time
+        self.break_interval = break_interval
+
+        self.is_working = True
+        self.is_long_break = False
+        self.break_counter = 0
+        self.current_break_time = break_time
+        self.phase_duration = 0
+        self.phase_started_at = None
+        self.deadline = None  # 当前阶段的截止时刻（暂停/锁屏时为 None）
+        self.paused_remaining = None
+        self.paused_at = None  # 手动暂停开始时刻
+        self.away_since = None  # 锁屏开始时刻
+        self.paused_before_away = False
+        self.reminders = ReminderQueue()
+        self.reminder = None  # 当前休息所属的提醒名（主循环的休息为 None）
+        self.suspended_work = None  # 被提醒打断的工作阶段：(剩余秒数, 开始时刻)
+        self.timetable = None
+        self.off_duty_until = None  # 作息表时段外：恢复的时刻（引擎时钟）
+        self.duty_ends_at = None  # 作息表时段内：当前允许时段结束的时刻
+
+        self.listeners = []
+        self.on_reschedule = None  # 截止时间变化时的回调（由定时器驱动层设置）
+
+    # ---- 事件 ----
+
+    def subscribe(self, callback):
+        """注册事件回调 callback(Event)"""
+        self.listeners.append(callback)
+
+    def emit(self, kind, duration=0.0, detail=None):
+        event = Event(self.clock(), kind, duration, detail)
+        for callback in self.listeners:
+            callback(event)
+
+    def rescheduled(self):
+        if self.on_reschedule is not None:
+            self.on_reschedule()
+
+    # ---- 查询 ----
+
+    def is_paused(self):
+        return self.paused_at is not None
+
+    def is_away(self):
+        return self.away_since is not None
+
+    def is_off_duty(self):
+        return self.off_duty_until is not None
+
+    def remaining(self):
+        """当前阶段剩余秒数（浮点）"""
+        if self.paused_remaining is not None:
+            return self.paused_remaining
+        if self.deadline is None:
+            return 0.0
+        return max(0.0, self.deadline - self.clock())
+
+    def remaining_seconds(self):
+        """用于显示的剩余整秒数（向上取整）"""
+        return int(math.ceil(self.remaining()))
+
+    def break_kind(self):
+        """当前（或下一次主循环）休息的类型："short"/"long" 或提醒名"""
+        if self.reminder is not None:
+            return self.reminder
+        return "long" if self.is_long_break else "short"
+
+    def next_break_kind(self):
+        """下一次主循环休息的类型"""
+        return "long" if (self.break_counter + 1) % self.break_interval == 0 else "short"
+
+    def next_break_time(self):
+        """下一次主循环休息的时长"""
+        return self.long_break_time if self.next_break_kind() == "long" else self.break_time
+
+    def upcoming_break(self):
+        """工作中预计的下一次休息（主循环或更早到期的提醒）；暂停、锁屏、时段外为 None
+
+        只是预测：临近主循环休息的提醒会被吸收，实际类型可能不同。
+        """
+        if not self.is_working or self.deadline is None or self.is_off_duty():
+            return None
+        upcoming = Upcoming(self.deadline, self.next_break_kind(), self.next_break_time())
+        due = self.reminders.peek()
+        if due is not None and due[0] < self.deadline:
+            # 提前到期的提醒先触发；离主循环截止足够近时两者合并，时长长的胜出
+            reminder = self.reminders.get(due[1])
+            if due[0] < self.deadline - self.absorb_window or reminder.duration > upcoming.duration:
+                upcoming = Upcoming(due[0], reminder.name, reminder.duration)
+            else:
+                upcoming = upcoming._replace(time=due[0])
+        return upcoming
+
+    def next_wakeup(self):
+        """下一次需要 advance 的时刻：阶段截止、最早到期提醒、允许时段结束中最早者；
+        冻结时为 None，作息表时段外为恢复的时刻"""
+        if self.off_duty_until is not None:
+            return self.off_duty_until
+        if self.deadline is None:
+            return None
+        return min(t for t in (self.deadline, self.reminders.next_due(), self.duty_ends_at) if t is not None)
+
+    def snapshot(self, wall_clock=time.time):
+        """可序列化的状态；ends_at 为阶段结束的墙上时间（暂停/锁屏时为 None）"""
+        running = not self.is_paused() and not self.is_away() and self.deadline is not None
+        return {
+            "phase": "work" if self.is_working else "break",
+            "long_break": not self.is_working and self.reminder is None and self.is_long_break,
+            "kind": None if self.is_working else self.break_kind(),
+            "paused": self.is_paused(),
+            "away": self.is_away(),
+            "remaining": self.remaining_seconds(),
+            "duration": self.phase_duration,
+            "ends_at": wall_clock() + self.remaining() if running else None,
+            "break_count": self.break_counter,
+            "off_duty": self.is_off_duty(),
+            "resumes_at": wall_clock() + self.off_duty_until - self.clock() if self.is_off_duty() else None,
+        }
+
+    # ---- 阶段切换 ----
+
+    def start(self):
+        """开始第一个工作阶段（作息表时段外则等到允许时再开始）"""
+        self.update_duty()
+        if not self.is_off_duty():
+            self.start_phase(working=True)
+
+    def start_phase(self, working):
+        now = self.clock()
+        self.is_working = working
+        self.reminder = None
+        if working and self.suspended_work is not None:
+            # 提醒休息结束：工作从被打断处继续，刚才的休息不计入工作时长
+            remaining, started_at = self.suspended_work
+            self.suspended_work = None
+            self.phase_duration = self.work_time
+            self.phase_started_at = started_at + (now - self.phase_started_at)
+            self.deadline = now + remaining
+            self.paused_remaining = None
+            self.rescheduled()
+            self.emit(WORK_STARTED, remaining)
+            return
+        if working:
+            duration, kind, detail = self.work_time, WORK_STARTED, None
+        else:
+            self.break_counter += 1
+            self.is_long_break = self.break_counter % self.break_interval == 0
+            self.current_break_time = self.long_break_time if self.is_long_break else self.break_time
+            duration, kind = self.current_break_time, BREAK_STARTED
+            detail = "long" if self.is_long_break else "short"
+
+        self.phase_duration = duration
+        self.phase_started_at = now
+        self.deadline = now + duration
+        self.paused_remaining = None
+        self.rescheduled()
+        self.emit(kind, duration, detail)
+
+    def end_phase(self, outcome=None):
+        """发出刚结束阶段的事件（含未结束的暂停）"""
+        now = self.clock()
+        self.end_pause()
+        if self.is_working:
+            self.emit(WORK, now - self.phase_started_at)
+        else:
+            self.emit(outcome or BREAK_TAKEN, now - self.phase_started_at, self.break_kind())
+
+    def next_phase(self, outcome=None):
+        """结束当前阶段并进入下一阶段"""
+        self.end_phase(outcome)
+        self.start_phase(not self.is_working)
+
+    def skip_break(self):
+        """跳过当前休息"""
+        if not self.is_working:
+            self.next_phase(BREAK_SKIPPED)
+
+    # ---- 提醒 ----
+
+    def set_reminders(self, reminders):
+        """设置主循环之外的提醒；未变化的提醒保留已计的时间"""
+        now = self.clock()
+        names = {reminder.name for reminder in reminders}
+        for name in list(self.reminders.reminders):
+            if name not in names:
+                self.reminders.remove(name)
+        for reminder in reminders:
+            if self.reminders.get(reminder.name) != reminder:
+                self.reminders.add(reminder, now)
+        self.rescheduled()
+
+    def trigger(self, kind=None):
+        """立即开始一次休息：kind 为提醒名时显示该提醒，否则结束当前阶段（工作/休息切换）"""
+        if self.is_off_duty():
+            return
+        reminder = self.reminders.get(kind) if kind is not None else None
+        if reminder is None:
+            self.next_phase()
+        elif self.is_working:
+            self.reminders.add(reminder, self.clock())  # 从现在起重新计时
+            self.start_reminder(reminder, absorbs_main=False)
+        else:
+            self.reminders.add(reminder, self.clock())
+            self.merge_into_break(reminder)
+
+    def start_reminder(self, reminder, absorbs_main):
+        """打断工作阶段，开始一次提醒休息；absorbs_main 为真时同时到期的主循环休息并入其中"""
+        now = self.clock()
+        self.end_pause()
+        if absorbs_main:
+            # 主循环的这次休息算作已经发生，提醒结束后开始新的工作周期
+            self.emit(WORK, now - self.phase_started_at)
+            self.break_counter += 1
+            self.emit(ABSORBED, 0.0, "long" if self.break_counter % self.break_interval == 0 else "short")
+        else:
+            self.suspended_work = (max(0.0, self.deadline - now), self.phase_started_at)
+        self.begin_reminder(reminder, now)
+
+    def begin_reminder(self, reminder, now):
+        self.is_working = False
+        self.is_long_break = False
+        self.reminder = reminder.name
+        self.current_break_time = reminder.duration
+        self.phase_duration = reminder.duration
+        self.phase_started_at = now
+        self.deadline = now + reminder.duration
+        self.paused_remaining = None
+        self.rescheduled()
+        self.emit(BREAK_STARTED, reminder.duration, reminder.name)
+
+    def merge_into_break(self, reminder):
+        """休息中有提醒到期：不长于当前休息的并入；更长的取代当前休息"""
+        if reminder.duration <= self.phase_duration:
+            self.emit(ABSORBED, 0.0, reminder.name)
+            self.rescheduled()  # 提醒已从现在起重新计时，下一次唤醒随之变化
+            return
+        self.emit(ABSORBED, 0.0, self.break_kind())
+        if self.reminder is None:
+            self.suspended_work = None  # 主循环的休息被取代，结束后开始新的工作周期
+        self.begin_reminder(reminder, self.clock())
+
+    def advance_reminders(self, now):
+        """处理到期的提醒（工作中连同到期的主循环休息一起合并），返回是否发生了切换"""
+        due = self.reminders.next_due()
+        main_due = self.is_working and self.deadline <= now
+        if not main_due and (due is None or due > now):
+            return False
+        if not self.is_working:
+            for name in self.reminders.pop_due(now, now):
+                self.merge_into_break(self.reminders.get(name))
+            return True
+
+        # 工作中：合并时间窗内的所有提醒和主循环休息，时长最长的胜出（相同时主循环优先）
+        soon = now + self.absorb_window
+        candidates = [self.reminders.get(name) for name in self.reminders.pop_due(soon, now)]
+        main_kind = self.next_break_kind()
+        includes_main = self.deadline <= soon
+        main_duration = self.long_break_time if main_kind == "long" else self.break_time
+        winner = max(candidates, key=lambda reminder: reminder.duration, default=None)
+        if includes_main and (winner is None or main_duration >= winner.duration):
+            for reminder in candidates:
+                self.emit(ABSORBED, 0.0, reminder.name)
+            self.next_phase()
+            return True
+        for reminder in candidates:
+            if reminder is not winner:
+                self.emit(ABSORBED, 0.0, reminder.name)
+        self.start_reminder(winner, absorbs_main=includes_main)
+        return True
+
+    def absence(self, away):
+        """离开时间足够长，视为已完成休息，直接开始新的工作周期"""
+        now = self.clock()
+        if away >= self.long_break_time:
+            self.break_counter = 0
+        self.reminders.satisfy(away, now)
+        self.suspended_work = None
+        self.end_pause()
+        if self.is_working:
+            # 离开之前的那段工作时间
+            self.emit(WORK, max(0.0, now - self.phase_started_at - away))
+        self.emit(AWAY, away)
+        self.start_phase(working=True)
+
+    # ---- 作息表 ----
+
+    def set_timetable(self, timetable):
+        """设置作息表（None 为不限制）"""
+        self.timetable = timetable
+        if self.phase_started_at is not None or self.is_off_duty():
+            self.update_duty()
+
+    def update_duty(self):
+        """按作息表进入/离开允许提醒的时段，并记下下一次需要检查的时刻"""
+        now = self.clock()
+        if self.timetable is None:
+            self.duty_ends_at = None
+            if self.is_off_duty():
+                self.go_on_duty(now)
+            return
+        wall = self.wall_clock()
+        if self.timetable.allowed(wall):
+            self.duty_ends_at = now + self.timetable.allowed_until(wall) - wall
+            if self.is_off_duty():
+                self.go_on_duty(now)
+        else:
+            resumes = now + self.timetable.next_allowed(wall) - wall
+            if not self.is_off_duty():
+                self.go_off_duty(now, resumes)
+            self.off_duty_until = resumes
+        self.rescheduled()
+
+    def go_off_duty(self, now, resumes):
+        """结束当前阶段，时段外不再有任何截止时间"""
+        if self.phase_started_at is not None:
+            self.end_phase()
+        self.is_working = True
+        self.reminder = None
+        self.suspended_work = None
+        self.deadline = self.paused_remaining = None
+        self.duty_ends_at = None
+        self.off_duty_until = resumes
+        self.reminders.freeze(now)
+        self.emit(OFF_DUTY, resumes - now)
+
+    def go_on_duty(self, now):
+        """允许时段开始：所有提醒重新计时，开始新的工作周期"""
+        self.off_duty_until = None
+        self.break_counter = 0
+        self.reminders.thaw(now)
+        self.reminders.satisfy(math.inf, now)
+        self.start_phase(working=True)
+
+    # ---- 推进 ----
+
+    def advance(self):
+        """处理已到期的阶段切换，返回是否发生了切换
+
+        迟到过久说明系统刚从休眠恢复；工作阶段结束时用户已空闲的时长达到到期那次
+        休息的时长（长休息按长休息算），都视为已经休息过，不再进入休息阶段。
+        """
+        wakeup = self.next_wakeup()
+        if wakeup is None:
+            return False
+        now = self.clock()
+        if now < wakeup:
+            return False
+        if self.timetable is not None and (self.is_off_duty() or
+                                       (self.duty_ends_at is not None and now >= self.duty_ends_at)):
+            # 进出作息表时段；仍在时段外时只是重新挂起到恢复的时刻
+            was_off_duty = self.is_off_duty()
+            self.update_duty()
+            if self.is_off_duty() or was_off_duty:
+                return was_off_duty != self.is_off_duty()
+        if not self.is_working:
+            # 休息中到期的提醒先并入当前休息（可能延长休息），再看休息是否结束
+            merged = self.advance_reminders(now)
+            if now < self.deadline:
+                return merged
+            self.next_phase()
+            return True
+        if now < self.deadline:
+            return self.advance_reminders(now)
+
+        lateness = now - self.deadline
+        due_break_time = self.next_break_time()
+        if self.is_working and lateness > self.catch_up_grace and lateness >= due_break_time:
+            self.absence(lateness)
+            return True
+        if self.is_working and self.idle_probe is not None:
+            idle = self.idle_probe()
+            if idle is not None and idle >= due_break_time:
+                self.absence(idle)
+                return True
+        return self.advance_reminders(now)
+
+    # ---- 暂停 / 锁屏 ----
+
+    def freeze(self):
+        if self.deadline is None:
+            return
+        now = self.clock()
+        self.paused_remaining = max(0.0, self.deadline - now)
+        self.deadline = None
+        self.reminders.freeze(now)
+        self.rescheduled()
+
+    def thaw(self):
+        if self.paused_remaining is None:
+            return
+        now = self.clock()
+        self.deadline = now + self.paused_remaining
+        self.paused_remaining = None
+        self.reminders.thaw(now)
+        self.rescheduled()
+
+    def end_pause(self):
+        """结束手动暂停并发出暂停时长事件"""
+        if self.paused_at is not None:
+            self.emit(PAUSE, self.clock() - self.paused_at)
+            self.paused_at = None
+
+    def pause(self):
+        """手动暂停：冻结剩余时间"""
+        if self.is_paused() or self.deadline is None:
+            return
+        self.freeze()
+        self.paused_at = self.clock()
+
+    def resume(self):
+        """从手动暂停处继续"""
+        if not self.is_paused():
+            return
+        self.end_pause()
+        if not self.is_away():
+            self.thaw()
+
+    def lock(self):
+        """锁屏：冻结调度，期间没有任何截止时间"""
+        if self.is_away():
+            return
+        self.away_since = self.clock()
+        self.paused_before_away = self.is_paused()
+        self.freeze()
+
+    def unlock(self):
+        """解锁：离开足够久视为已休息，否则从冻结处继续；返回离开秒数
+
+        工作中离开的时长须达到到期那次休息的时长（长休息按长休息算）；休息中离开
+        到休息剩余时间用完，这次休息按已完成结束。
+        """
+        if not self.is_away():
+            return 0.0
+        away = self.clock() - self.away_since
+        self.away_since = None
+        if self.is_off_duty():
+            return away  # 时段外的离开不影响调度
+        if self.paused_before_away and self.is_paused():
+            return away
+        if self.is_working and away >= self.next_break_time():
+            self.absence(away)
+        elif not self.is_working and away >= self.paused_remaining:
+            self.thaw()
+            self.next_phase(BREAK_TAKEN)
+        else:
+            self.thaw()
+        return away
+
+    # ---- 设置 ----
+
+    def configure(self, work_time, break_time, long_break_time, break_interval):
+        """修改各阶段时长，当前阶段已经过的时间保持不变；时长都没变时什么都不做"""
+        if (work_time, break_time, long_break_time, break_interval) == \
+                (self.work_time, self.break_time, self.long_break_time, self.break_interval):
+            return
+        self.work_time = work_time
+        self.break_time = break_time
+        self.long_break_time = long_break_time
+        self.break_interval = break_interval
+        if self.phase_started_at is None:
+            return
+
+        elapsed = self.phase_duration - self.remaining()
+        if self.is_working:
+            duration = work_time
+        elif self.reminder is not None:
+            return  # 提醒休息的时长不随主循环设置变化
+        else:
+            duration = long_break_time if self.is_long_break else break_time
+            self.current_break_time = duration
+        self.phase_duration = duration
+
+        remaining = max(0.0, duration - elapsed)
+        if self.paused_remaining is not None:
+            self.paused_remaining = remaining
+        elif self.deadline is not None:
+            self.deadline = self.clock() + remaining
+            self.rescheduled()
+
+    # ---- 模拟 ----
+
+    def simulate(self, days=30, skip=None, idle_probe=None):
+        """用虚拟时钟模拟 days 天的调度（与当前设置相同，状态独立），返回事件列表
+
+        skip(event) 在每次休息开始时调用，返回 True 表示用户跳过这次休息；
+        idle_probe(engine) 返回工作阶段结束时的空闲秒数。
+        """
+        clock = VirtualClock()
+        wall_start = self.wall_clock()
+        sim = ScheduleEngine(self.work_time, self.break_time, self.long_break_time, self.break_interval,
+                             clock=clock, catch_up_grace=self.catch_up_grace, absorb_window=self.absorb_window,
+                             wall_clock=lambda: wall_start + clock())
+        sim.set_reminders(list(self.reminders.reminders.values()))
+        sim.set_timetable(self.timetable)
+        if idle_probe is not None:
+            sim.idle_probe = lambda: idle_probe(sim)
+        trace = []
+        sim.subscribe(trace.append)
+        sim.start()
+
+        end = clock() + days * 86400
+        while sim.next_wakeup() is not None and sim.next_wakeup() <= end:
+            clock.now = sim.next_wakeup()
+            sim.advance()
+            last = trace[-1]
+            if skip is not None and last.kind == BREAK_STARTED and skip(last):
+                sim.skip_break()
+        return trace
@@ -0,0 +1,171 @@
+"""休息历史记录
+
+每次阶段切换写入本地 SQLite（WAL 模式）。写入在后台线程批量进行，界面线程
+只负责把事件放进队列；每日/每周汇总表随写入增量更新，统计界面只读汇总表，
+不扫描原始事件。
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from engine import AWAY, BREAK_SKIPPED, BREAK_TAKEN, PAUSE, WORK
+
+# 会写入历史的事件类型（阶段结束类事件）
+RECORDED_KINDS = (WORK, BREAK_TAKEN, BREAK_SKIPPED, PAUSE, AWAY)
+
+BATCH_WINDOW = 1.0  # 收到第一条事件后最多再等多久凑成一批（秒）
+BATCH_SIZE = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    kind TEXT NOT NULL,
+    duration REAL NOT NULL DEFAULT 0,
+    detail TEXT
+);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+"""
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    {key} TEXT PRIMARY KEY,
+    work_seconds REAL NOT NULL DEFAULT 0,
+    breaks_taken INTEGER NOT NULL DEFAULT 0,
+    breaks_skipped INTEGER NOT NULL DEFAULT 0,
+    long_breaks INTEGER NOT NULL DEFAULT 0,
+    break_seconds REAL NOT NULL DEFAULT 0,
+    pause_seconds REAL NOT NULL DEFAULT 0,
+    away_seconds REAL NOT NULL DEFAULT 0
+);
+"""
+
+ROLLUP_COLUMNS = ["work_seconds", "breaks_taken", "breaks_skipped", "long_breaks",
+                  "break_seconds", "pause_seconds", "away_seconds"]
+
+# 汇总表名 -> (主键列, 由时间戳得到主键的格式)
+ROLLUP_TABLES = {
+    "daily": ("day", "%Y-%m-%d"),
+    "weekly": ("week", "%G-W%V"),
+}
+
+
+def rollup_delta(kind, duration, detail):
+    """一条事件对汇总列的增量"""
+    delta = dict.fromkeys(ROLLUP_COLUMNS, 0)
+    if kind == WORK:
+        delta["work_seconds"] = duration
+    elif kind == BREAK_TAKEN:
+        delta["breaks_taken"] = 1
+        delta["break_seconds"] = duration
+        delta["long_breaks"] = 1 if detail == "long" else 0
+    elif kind == BREAK_SKIPPED:
+        delta["breaks_skipped"] = 1
+        delta["break_seconds"] = duration
+    elif kind == PAUSE:
+        delta["pause_seconds"] = duration
+    elif kind == AWAY:
+        delta["away_seconds"] = duration
+    return delta
+
+
+def open_database(path):
+    """打开（必要时创建）历史数据库"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    for table, (key, _) in ROLLUP_TABLES.items():
+        conn.executescript(ROLLUP_SCHEMA.format(table=table, key=key))
+    return conn
+
+
+def write_batch(conn, events):
+    """在一个事务里写入一批事件并增量更新汇总表"""
+    rollups = {table: {} for table in ROLLUP_TABLES}
+    for ts, kind, duration, detail in events:
+        delta = rollup_delta(kind, duration, detail)
+        local = time.localtime(ts)
+        for table, (_, fmt) in ROLLUP_TABLES.items():
+            totals = rollups[table].setdefault(time.strftime(fmt, local), dict.fromkeys(ROLLUP_COLUMNS, 0))
+            for column, value in delta.items():
+                totals[column] += value
+
+    with conn:
+        conn.executemany("INSERT INTO events (ts, kind, duration, detail) VALUES (?, ?, ?, ?)", events)
+        for table, (key, _) in ROLLUP_TABLES.items():
+            sql = (f"INSERT INTO {table} ({key}, {', '.join(ROLLUP_COLUMNS)}) "
+                   f"VALUES (?{', ?' * len(ROLLUP_COLUMNS)}) "
+                   f"ON CONFLICT ({key}) DO UPDATE SET "
+                   + ", ".join(f"{c} = {c} + excluded.{c}" for c in ROLLUP_COLUMNS))
+            conn.executemany(sql, [(k, *(totals[c] for c in ROLLUP_COLUMNS))
+                                   for k, totals in rollups[table].items()])
+
+
+class HistoryRecorder:
+    """后台线程批量写入历史事件"""
+
+    def __init__(self, path):
+        self.path = path
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="history-writer", daemon=True)
+        self.thread.start()
+
+    def record(self, kind, duration=0.0, detail=None, ts=None):
+        """记录一条事件（只入队，不阻塞界面线程）"""
+        self.queue.put((ts if ts is not None else time.time(), kind, float(duration), detail))
+
+    def close(self, timeout=2.0):
+        """写完剩余事件后结束后台线程"""
+        self.queue.put(None)
+        self.thread.join(timeout)
+
+    def run(self):
+        try:
+            conn = open_database(self.path)
+        except (OSError, sqlite3.Error) as e:
+            print(f"打开历史数据库失败: {e}")
+            return
+
+        stopping = False
+        while not stopping:
+            item = self.queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + BATCH_WINDOW
+            while len(batch) < BATCH_SIZE:
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                write_batch(conn, batch)
+            except sqlite3.Error as e:
+                print(f"写入历史记录失败: {e}")
+        conn.close()
+
+
+def load_rollups(path, table="daily", limit=366):
+    """读取最近的汇总行（新的在前），数据库不存在时返回空列表"""
+    if table not in ROLLUP_TABLES or not os.path.exists(path):
+        return []
+    key = ROLLUP_TABLES[table][0]
+    try:
+        conn = sqlite3.connect(path)
+        try:
+            cursor = conn.execute(
+                f"SELECT {key}, {', '.join(ROLLUP_COLUMNS)} FROM {table} ORDER BY {key} DESC LIMIT ?", (limit,))
+            return cursor.fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"读取历史统计失败: {e}")
+        return []
@@ -0,0 +1,234 @@
+"""空闲/锁屏检测源
+
+锁屏/解锁通过信号通知（logind D-Bus、Windows 会话通知），不需要轮询；
+空闲秒数只在需要时查询（阶段到期时、离开期间的低频检查）。
+FakeIdleSource 用于测试和模拟。
+"""
+import ctypes
+import ctypes.util
+import os
+import sys
+import time
+
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+
+class IdleSource(QObject):
+    """空闲检测源基类：不支持任何检测"""
+
+    locked = pyqtSignal()
+    unlocked = pyqtSignal()
+
+    name = "none"
+    pushes_lock_events = False  # 是否能主动通知锁屏/解锁
+
+    def idle_seconds(self):
+        """距离最后一次键鼠输入的秒数，不支持时返回 None"""
+        return None
+
+
+class FakeIdleSource(IdleSource):
+    """手动控制的检测源（测试用）"""
+
+    name = "fake"
+    pushes_lock_events = True
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.idle = 0.0
+        self.is_locked = False
+
+    def idle_seconds(self):
+        return self.idle
+
+    def set_idle(self, seconds):
+        self.idle = seconds
+
+    def lock(self):
+        self.is_locked = True
+        self.locked.emit()
+
+    def unlock(self):
+        self.is_locked = False
+        self.idle = 0.0
+        self.unlocked.emit()
+
+
+class XScreenSaverInfo(ctypes.Structure):
+    _fields_ = [
+        ("window", ctypes.c_ulong),
+        ("state", ctypes.c_int),
+        ("kind", ctypes.c_int),
+        ("til_or_since", ctypes.c_ulong),
+        ("idle", ctypes.c_ulong),
+        ("eventMask", ctypes.c_ulong),
+    ]
+
+
+class X11IdleSource(IdleSource):
+    """X11 屏幕保护扩展（XScreenSaverQueryInfo）查询空闲时间"""
+
+    name = "x11"
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        if not os.environ.get("DISPLAY"):
+            raise RuntimeError("没有 X11 显示")
+        xlib_path = ctypes.util.find_library("X11")
+        xss_path = ctypes.util.find_library("Xss")
+        if not xlib_path or not xss_path:
+            raise RuntimeError("缺少 libX11/libXss")
+
+        self.xlib = ctypes.cdll.LoadLibrary(xlib_path)
+        self.xss = ctypes.cdll.LoadLibrary(xss_path)
+        self.xlib.XOpenDisplay.restype = ctypes.c_void_p
+        self.xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        self.xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+        self.xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        self.xss.XScreenSaverAllocInfo.restype = ctypes.POINTER(XScreenSaverInfo)
+        self.xss.XScreenSaverQueryInfo.argtypes = [ctypes.c_void_p, ctypes.c_ulong,
+                                                   ctypes.POINTER(XScreenSaverInfo)]
+
+        self.display = self.xlib.XOpenDisplay(None)
+        if not self.display:
+            raise RuntimeError("无法连接 X11 显示")
+        self.root = self.xlib.XDefaultRootWindow(self.display)
+        self.info = self.xss.XScreenSaverAllocInfo()
+
+    def idle_seconds(self):
+        if not self.xss.XScreenSaverQueryInfo(self.display, self.root, self.info):
+            return None
+        return self.info.contents.idle / 1000.0
+
+
+class LogindIdleSource(IdleSource):
+    """systemd-logind 会话：Lock/Unlock 信号 + IdleHint 属性"""
+
+    name = "logind"
+    pushes_lock_events = True
+
+    SERVICE = "org.freedesktop.login1"
+    SESSION_INTERFACE = "org.freedesktop.login1.Session"
+
+    def __init__(self, parent=None, idle_probe=None):
+        super().__init__(parent)
+        from PyQt5.QtDBus import QDBusConnection, QDBusInterface
+
+        self.bus = QDBusConnection.systemBus()
+        if not self.bus.isConnected():
+            raise RuntimeError("无法连接系统 D-Bus")
+
+        manager = QDBusInterface(self.SERVICE, "/org/freedesktop/login1",
+                                 "org.freedesktop.login1.Manager", self.bus)
+        reply = manager.call("GetSession", "auto")
+        arguments = reply.arguments()
+        if not arguments:
+            raise RuntimeError(f"无法获取 logind 会话: {reply.errorMessage()}")
+        path = arguments[0]
+        self.session_path = path.path() if hasattr(path, "path") else str(path)
+
+        self.session = QDBusInterface(self.SERVICE, self.session_path, self.SESSION_INTERFACE, self.bus)
+        self.bus.connect(self.SERVICE, self.session_path, self.SESSION_INTERFACE, "Lock", self.on_lock)
+        self.bus.connect(self.SERVICE, self.session_path, self.SESSION_INTERFACE, "Unlock", self.on_unlock)
+        # 更精确的空闲时间来源（如 X11），没有时退回 IdleHint
+        self.idle_probe = idle_probe
+
+    @pyqtSlot()
+    def on_lock(self):
+        self.locked.emit()
+
+    @pyqtSlot()
+    def on_unlock(self):
+        self.unlocked.emit()
+
+    def idle_seconds(self):
+        if self.idle_probe is not None:
+            return self.idle_probe.idle_seconds()
+        try:
+            if not self.session.property("IdleHint"):
+                return 0.0
+            since_us = int(self.session.property("IdleSinceHintMonotonic"))
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, time.clock_gettime(time.CLOCK_MONOTONIC) - since_us / 1e6)
+
+
+class WindowsIdleSource(IdleSource):
+    """Windows：GetLastInputInfo 查询空闲，WTS 会话通知提供锁屏/解锁"""
+
+    name = "windows"
+    pushes_lock_events = True
+
+    WM_WTSSESSION_CHANGE = 0x02B1
+    WTS_SESSION_LOCK = 0x7
+    WTS_SESSION_UNLOCK = 0x8
+
+    class LASTINPUTINFO(ctypes.Structure):
+        _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_uint)]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        from ctypes import wintypes
+        from PyQt5.QtCore import QAbstractNativeEventFilter, QCoreApplication
+        from PyQt5.QtWidgets import QWidget
+
+        source = self
+
+        class SessionEventFilter(QAbstractNativeEventFilter):
+            def nativeEventFilter(self, event_type, message):
+                msg = wintypes.MSG.from_address(int(message))
+                if msg.message == source.WM_WTSSESSION_CHANGE:
+                    if msg.wParam == source.WTS_SESSION_LOCK:
+                        source.locked.emit()
+                    elif msg.wParam == source.WTS_SESSION_UNLOCK:
+                        source.unlocked.emit()
+                return False, 0
+
+        # 隐藏的原生窗口只用于接收会话通知
+        self.notify_window = QWidget()
+        hwnd = int(self.notify_window.winId())
+        if not ctypes.windll.wtsapi32.WTSRegisterSessionNotification(hwnd, 0):
+            raise RuntimeError("注册会话通知失败")
+        self.event_filter = SessionEventFilter()
+        QCoreApplication.instance().installNativeEventFilter(self.event_filter)
+
+    def idle_seconds(self):
+        info = self.LASTINPUTINFO()
+        info.cbSize = ctypes.sizeof(info)
+        if not ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+            return None
+        millis = (ctypes.windll.kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF
+        return millis / 1000.0
+
+
+def create_idle_source(kind="auto", parent=None):
+    """按平台创建检测源；kind 可为 auto/logind/x11/windows/fake/none"""
+    if kind == "fake":
+        return FakeIdleSource(parent)
+    if kind == "none":
+        return IdleSource(parent)
+
+    candidates = {
+        "windows": lambda: WindowsIdleSource(parent),
+        "x11": lambda: X11IdleSource(parent),
+        "logind": lambda: LogindIdleSource(parent, idle_probe=try_create(X11IdleSource, parent)),
+    }
+    if kind == "auto":
+        order = ["windows"] if sys.platform == "win32" else ["logind", "x11"]
+    else:
+        order = [kind]
+
+    for name in order:
+        try:
+            return candidates[name]()
+        except Exception as e:
+            print(f"空闲检测 {name} 不可用: {e}")
+    return IdleSource(parent)
+
+
+def try_create(cls, parent=None):
+    """创建检测源，失败返回 None"""
+    try:
+        return cls(parent)
+    except Exception:
+        return None
@@ -0,0 +1,249 @@
+"""休息背景图片包
+
+图片包就是一个图片目录（含子目录）：首次使用时在后台扫描一次建立索引。图片在
+线程池里用 Pillow 解码（JPEG 直接按目标尺寸降采样解码），铺满裁剪到屏幕尺寸后
+转成 QImage，放进按内存限制大小的 LRU 缓存。缩放后的图片另存一份到磁盘缓存，
+之后的运行只读屏幕大小的小文件，不再解码原图；磁盘缓存按最近使用时间清理到
+限制大小以内（每次建立索引时清理一次）。
+
+界面线程只负责把准备好的 QImage 贴到屏幕上；图片还没准备好时这次休息照旧用
+纯色背景。
+"""
+import hashlib
+import os
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QImage
+
+from pixcache import PixmapCache
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+IMAGE_CACHE_BYTES = 64 * 1024 * 1024
+DISK_CACHE_BYTES = 256 * 1024 * 1024
+TEMP_FILE_EXPIRY = 3600  # 秒；更旧的临时文件是写入中途退出留下的
+DECODE_WORKERS = 2
+DISK_CACHE_QUALITY = 90
+
+# 索引中的一张图片；mtime_ns 和 size 用于判断磁盘缓存是否过期
+PackEntry = namedtuple("PackEntry", ["path", "mtime_ns", "size"])
+
+
+def scan_pack(directory):
+    """扫描图片目录，返回按路径排序的 PackEntry 列表"""
+    entries = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append(PackEntry(path, stat.st_mtime_ns, stat.st_size))
+    entries.sort()
+    return entries
+
+
+def cache_path(cache_dir, entry, width, height):
+    """缩放后图片在磁盘缓存中的路径（原图改动后键随之变化）"""
+    key = f"{entry.path}|{entry.mtime_ns}|{entry.size}|{width}x{height}"
+    return os.path.join(cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".jpg")
+
+
+def decode_image(path, width, height):
+    """用 Pillow 解码并铺满裁剪到 width x height，返回 RGB 模式的 PIL 图像"""
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as image:
+        image.draft("RGB", (width, height))  # JPEG 按 1/2、1/4、1/8 降采样解码
+        image = ImageOps.exif_transpose(image).convert("RGB")
+    return ImageOps.fit(image, (width, height), Image.LANCZOS)
+
+
+def to_qimage(image):
+    """PIL RGB 图像 -> 独立持有数据的 QImage（RGB32，绘制时无需再转换）"""
+    data = image.tobytes("raw", "RGB")
+    qimage = QImage(data, image.width, image.height, 3 * image.width, QImage.Format_RGB888)
+    return qimage.convertToFormat(QImage.Format_RGB32)
+
+
+def load_image(entry, width, height, cache_dir=None):
+    """工作线程：先读磁盘缓存，没有时解码原图并写入缓存"""
+    cached = cache_path(cache_dir, entry, width, height) if cache_dir else None
+    if cached and os.path.exists(cached):
+        image = QImage(cached)
+        if not image.isNull():
+            try:
+                os.utime(cached)  # 修改时间即最近使用时间，清理时保留常用的
+            except OSError:
+                pass
+            return image.convertToFormat(QImage.Format_RGB32)
+    image = decode_image(entry.path, width, height)
+    if cached:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            temp = f"{cached}.{os.getpid()}-{threading.get_ident()}.tmp"
+            image.save(temp, "JPEG", quality=DISK_CACHE_QUALITY)
+            os.replace(temp, cached)
+        except OSError as e:
+            print(f"写入图片缓存失败: {e}")
+    return to_qimage(image)
+
+
+def prune_cache(cache_dir, max_bytes=DISK_CACHE_BYTES):
+    """工作线程：按最近使用时间删除最旧的缓存文件，直到总大小不超过 max_bytes"""
+    try:
+        names = os.listdir(cache_dir)
+    except FileNotFoundError:
+        return
+    files = []
+    now = time.time()
+    for name in names:
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+            if name.endswith(".tmp"):
+                # 正在写入的不动，残留的直接删除
+                if now - stat.st_mtime > TEMP_FILE_EXPIRY:
+                    os.unlink(path)
+                continue
+        except OSError:
+            continue
+        files.append((stat.st_mtime_ns, stat.st_size, path))
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(path)
+            total -= size
+        except OSError as e:
+            print(f"清理图片缓存失败: {e}")
+
+
+class ImagePack(QObject):
+    """一个图片目录：后台建立索引、解码，界面线程从 LRU 缓存取用"""
+
+    indexed = pyqtSignal(int)  # 参数：索引到的图片数
+    image_ready = pyqtSignal(object)  # 参数：缓存键 (路径, 宽, 高)
+    finished = pyqtSignal(object, object)  # 内部使用：后台任务完成，排队交回界面线程
+
+    def __init__(self, directory, cache_dir=None, max_bytes=IMAGE_CACHE_BYTES, parent=None):
+        super().__init__(parent)
+        self.directory = directory
+        self.cache_dir = cache_dir
+        self.entries = None  # 索引，扫描完成前为 None
+        self.cache = PixmapCache(max_bytes)
+        self.pending = set()  # 正在解码的缓存键
+        self.next_key = None  # 下一次休息要用的图片
+        self.shown_path = None  # 上一次休息用过的图片
+        self.wanted_size = None  # 索引完成前请求的尺寸
+        self.executor = None
+        self.closed = False  # shutdown 之后工作线程不再发出信号
+        self.emit_lock = threading.Lock()
+        self.finished.connect(self.on_finished)
+
+    def submit(self, tag, fn, *args):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=DECODE_WORKERS, thread_name_prefix="image-pack")
+        future = self.executor.submit(fn, *args)
+        future.add_done_callback(lambda future: self.on_done(tag, future))
+
+    def on_done(self, tag, future):
+        # 在工作线程中调用，跨线程发出的信号由界面线程排队处理
+        if future.cancelled():
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            if tag == "index":
+                print(f"扫描图片目录失败: {self.directory}: {e}")
+            elif tag == "prune":
+                print(f"清理图片缓存失败: {e}")
+            else:
+                print(f"加载图片失败: {tag[0]}: {e}")
+            result = None
+        with self.emit_lock:
+            if not self.closed:
+                self.finished.emit(tag, result)
+
+    def on_finished(self, tag, result):
+        if tag == "prune":
+            return
+        if tag == "index":
+            self.entries = result or []
+            self.indexed.emit(len(self.entries))
+            if self.wanted_size is not None:
+                self.prepare(self.wanted_size)
+            return
+        self.pending.discard(tag)
+        if result is None:
+            # 解码失败的图片不再选用
+            self.entries = [entry for entry in self.entries if entry.path != tag[0]]
+            if tag == self.next_key:
+                self.next_key = None
+            return
+        self.cache.put(tag, result)
+        self.image_ready.emit(tag)
+
+    def start(self):
+        """在后台扫描目录并清理磁盘缓存（只做一次）"""
+        if self.entries is None and self.executor is None:
+            self.submit("index", scan_pack, self.directory)
+            if self.cache_dir:
+                self.submit("prune", prune_cache, self.cache_dir)
+
+    def request(self, entry, width, height):
+        """在后台准备一张图片，已缓存或正在解码时不重复；返回缓存键"""
+        key = (entry.path, width, height)
+        if key not in self.cache and key not in self.pending:
+            self.pending.add(key)
+            self.submit(key, load_image, entry, width, height, self.cache_dir)
+        return key
+
+    def prepare(self, size):
+        """随机挑选下一次休息的图片（尽量不与上一张相同）并在后台准备，size 为设备像素尺寸"""
+        if self.entries is None:
+            self.wanted_size = size
+            self.start()
+            return
+        if not self.entries:
+            return
+        key = self.next_key
+        if key is not None and key[1:] == (size.width(), size.height()) and (key in self.cache or key in self.pending):
+            return
+        choices = [entry for entry in self.entries if entry.path != self.shown_path] or self.entries
+        self.next_key = self.request(random.choice(choices), size.width(), size.height())
+
+    def take(self, size):
+        """取出为这次休息准备好的图片；还没准备好时返回 None（不在此时解码，以免拖慢显示）"""
+        key = self.next_key
+        image = self.cache.get(key) if key is not None and key[1:] == (size.width(), size.height()) else None
+        if image is not None:
+            self.next_key = None
+            self.shown_path = key[0]
+        return image
+
+    def release(self):
+        """清空内存缓存（保留索引，之后从磁盘缓存重新读取）"""
+        self.cache.clear()
+        self.next_key = None
+
+    def shutdown(self):
+        """取消排队的任务并断开信号；正在运行的任务完成后不再发出信号，之后可以安全删除"""
+        with self.emit_lock:
+            self.closed = True
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        for signal in (self.indexed, self.image_ready, self.finished):
+            try:
+                signal.disconnect()
+            except TypeError:
+                pass  # 没有连接
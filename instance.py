@@ -0,0 +1,310 @@
+"""单实例保护、命令转发与本地控制接口
+
+第一个实例在本地套接字（QLocalServer，Linux 上为 Unix 套接字）上监听；之后启动
+的进程连上去，把命令行里的命令（显示、暂停、跳过、修改设置……）转发过去后立即
+退出，不创建 QApplication，也不加载任何界面模块。
+
+同一个套接字也是给状态栏和脚本用的控制接口，协议为每行一个 JSON 对象：
+  {"commands": ["pause"], "set": {"work_time": 1500}}  执行命令，回复带最新状态
+  {"request": "status"}                                 查询状态
+  {"request": "subscribe"}                              订阅，之后每次状态变化推送
+                                                        {"event": ..., "status": {...}}
+状态中的 ends_at 是当前阶段结束的 Unix 时间，客户端可据此自行倒计时，无需轮询。
+"""
+import argparse
+import getpass
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+
+from PyQt5.QtCore import QDir, QLockFile, QObject, pyqtSignal
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket
+
+CONNECT_TIMEOUT_MS = 200
+REPLY_TIMEOUT_MS = 1000
+MAX_PENDING_CONNECTIONS = 128
+MAX_PENDING_BYTES = 64 * 1024  # 订阅者积压超过该值（不读取推送）时断开
+STARTUP_WAIT_MS = 3000  # 同时启动的另一个实例持有锁但还没开始监听时，最多等它这么久
+
+# 命令行参数 -> 转发的命令名
+COMMANDS = {
+    "show": "显示主窗口",
+    "pause": "暂停计时",
+    "resume": "继续计时",
+    "skip": "跳过当前休息",
+    "settings": "打开设置对话框",
+}
+
+
+def server_name():
+    """按用户区分的套接字名"""
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = "default"
+    return "eyecare-" + hashlib.sha1(user.encode("utf-8")).hexdigest()[:12]
+
+
+def add_command_arguments(parser):
+    """把可转发的命令加入命令行解析器"""
+    group = parser.add_argument_group("命令（有实例在运行时转发给它）")
+    for name, help_text in COMMANDS.items():
+        group.add_argument(f"--{name}", action="store_true", help=help_text)
+    group.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                       help="修改设置，如 --set work_time=1500，可重复")
+    group.add_argument("--status", action="store_true", help="输出运行中实例的状态后退出")
+    group.add_argument("--watch", action="store_true", help="订阅状态变化并持续输出（供状态栏使用）")
+    group.add_argument("--format", help="状态输出格式，如 \"{phase} {mmss}\"；默认输出 JSON")
+    group.add_argument("--tick", action="store_true", help="与 --watch 一起使用，每秒按 ends_at 本地刷新倒计时")
+
+
+def build_message(args):
+    """由命令行参数构造命令消息：{"commands": [...], "set": {...}}"""
+    changes = {}
+    for item in args.set:
+        key, sep, value = item.partition("=")
+        if not sep:
+            print(f"忽略无效的设置: {item}")
+            continue
+        try:
+            changes[key] = json.loads(value)
+        except ValueError:
+            changes[key] = value
+    return {"commands": [name for name in COMMANDS if getattr(args, name)], "set": changes}
+
+
+def check_command_message(message):
+    """检查命令消息的结构：commands 为字符串列表，set 为以字符串为键的对象；不符时抛出 ValueError"""
+    commands = message.setdefault("commands", [])
+    changes = message.setdefault("set", {})
+    if not isinstance(commands, list) or not all(isinstance(command, str) for command in commands):
+        raise ValueError("commands 必须是字符串列表")
+    if not isinstance(changes, dict):
+        raise ValueError("set 必须是 JSON 对象")
+    return message
+
+
+def encode(message):
+    return json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def connect(name=None):
+    """连接正在运行的实例，没有实例时返回 None"""
+    socket = QLocalSocket()
+    socket.connectToServer(name or server_name())
+    if not socket.waitForConnected(CONNECT_TIMEOUT_MS):
+        return None
+    return socket
+
+
+def read_message(socket, timeout_ms=REPLY_TIMEOUT_MS):
+    """阻塞读取一行 JSON，超时或连接断开返回 None"""
+    while not socket.canReadLine():
+        if not socket.waitForReadyRead(timeout_ms):
+            return None
+    try:
+        return json.loads(bytes(socket.readLine()).decode("utf-8"))
+    except ValueError:
+        return {}
+
+
+def request(socket, message, timeout_ms=REPLY_TIMEOUT_MS):
+    """发送一条消息并等待回复"""
+    socket.write(encode(message))
+    socket.waitForBytesWritten(timeout_ms)
+    return read_message(socket, timeout_ms)
+
+
+def send(message, name=None, timeout_ms=REPLY_TIMEOUT_MS):
+    """把消息发给正在运行的实例并等待回复；没有实例在运行时返回 None"""
+    socket = connect(name)
+    if socket is None:
+        return None
+    reply = request(socket, message, timeout_ms)
+    socket.disconnectFromServer()
+    return reply if reply is not None else {}
+
+
+def parse_client_args(argv):
+    """只解析命令参数（其余参数忽略），用于启动最早期的转发判断"""
+    parser = argparse.ArgumentParser(add_help=False)
+    add_command_arguments(parser)
+    args, _ = parser.parse_known_args(argv[1:])
+    return args
+
+
+def forward(message, wait_ms=0):
+    """已有实例在运行时转发命令（没有命令时默认显示窗口），返回是否已转发
+
+    wait_ms 为等待对方开始监听的最长时间（对方正在启动时使用）。
+    """
+    if not message["commands"] and not message["set"]:
+        message = dict(message, commands=["show"])
+    deadline = time.monotonic() + wait_ms / 1000
+    while True:
+        if send(message) is not None:
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.05)
+
+
+def local_remaining(status):
+    """按 ends_at 在本地推算剩余秒数（暂停/锁屏时 ends_at 为空，取快照值）"""
+    if status.get("ends_at") is None:
+        return status.get("remaining", 0)
+    return max(0, math.ceil(status["ends_at"] - time.time()))
+
+
+def format_status(status, fmt=None):
+    """格式化状态；fmt 可用状态中的所有字段以及 mmss（剩余 分:秒）"""
+    status = dict(status, remaining=local_remaining(status))
+    if fmt is None:
+        return json.dumps(status, ensure_ascii=False)
+    mins, secs = divmod(status["remaining"], 60)
+    return fmt.format(mmss=f"{mins:02d}:{secs:02d}", **status)
+
+
+def watch(socket, fmt=None, tick=False):
+    """订阅状态推送并逐行输出，连接断开时返回"""
+    reply = request(socket, {"request": "subscribe"})
+    if not reply:
+        return 1
+    status = reply.get("status", {})
+    print(format_status(status, fmt), flush=True)
+    while True:
+        message = read_message(socket, 1000 if tick else -1)
+        if message is None:
+            if socket.state() != QLocalSocket.ConnectedState:
+                return 0
+        elif "status" in message:
+            status = message["status"]
+        print(format_status(status, fmt), flush=True)
+
+
+def run_client(argv):
+    """有实例在运行时作为客户端执行命令行并返回退出码；需要启动本实例时返回 None"""
+    args = parse_client_args(argv)
+    message = build_message(args)
+    if not (args.status or args.watch):
+        return 0 if forward(message) else None
+
+    socket = connect()
+    if socket is None:
+        print("没有正在运行的 EyeCare 实例", file=sys.stderr)
+        return 1
+    if message["commands"] or message["set"]:
+        request(socket, message)
+    if args.watch:
+        return watch(socket, args.format, args.tick)
+    reply = request(socket, {"request": "status"}) or {}
+    print(format_status(reply.get("status", {}), args.format))
+    return 0
+
+
+class InstanceServer(QObject):
+    """第一个实例的命令服务端"""
+
+    message_received = pyqtSignal(dict)
+
+    def __init__(self, parent=None, name=None):
+        super().__init__(parent)
+        self.name = name or server_name()
+        self.buffers = {}
+        self.subscribers = set()
+        self.status_provider = None  # 返回当前状态字典的函数
+        self.other_instance = False  # listen 时发现另一个实例在运行（或正在启动）
+        self.lock = QLockFile(os.path.join(QDir.tempPath(), self.name + ".lock"))
+        self.lock.setStaleLockTime(0)  # 只按持有进程是否存活判断锁是否残留
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)
+        self.server.setMaxPendingConnections(MAX_PENDING_CONNECTIONS)
+        self.server.newConnection.connect(self.on_new_connection)
+
+    def listen(self):
+        """开始监听，返回是否成功
+
+        监听前先持有按用户区分的锁文件并确认没有实例在应答，才清理上次异常退出残留
+        的套接字文件（UserAccessOption 下 listen 会直接顶替同名套接字，不报地址占用）。
+        另一个实例在运行或正在启动时返回 False 并设置 other_instance，由调用方把命令
+        转发给它。
+        """
+        if not self.lock.tryLock(0):
+            self.other_instance = True
+            return False
+        socket = connect(self.name)
+        if socket is not None:
+            # 不持锁的旧版本实例仍在运行
+            socket.disconnectFromServer()
+            self.lock.unlock()
+            self.other_instance = True
+            return False
+        QLocalServer.removeServer(self.name)
+        if self.server.listen(self.name):
+            return True
+        print(f"单实例监听失败: {self.server.errorString()}")
+        return False
+
+    def close(self):
+        self.server.close()
+        self.lock.unlock()
+
+    def on_new_connection(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self.buffers[socket] = b""
+            socket.readyRead.connect(lambda socket=socket: self.on_ready_read(socket))
+            socket.disconnected.connect(lambda socket=socket: self.on_disconnected(socket))
+
+    def on_disconnected(self, socket):
+        self.buffers.pop(socket, None)
+        self.subscribers.discard(socket)
+        socket.deleteLater()
+
+    def on_ready_read(self, socket):
+        data = self.buffers.get(socket, b"") + bytes(socket.readAll())
+        while b"\n" in data:
+            line, data = data.split(b"\n", 1)
+            socket.write(self.handle_line(socket, line))
+        self.buffers[socket] = data
+
+    def status(self):
+        return self.status_provider() if self.status_provider is not None else {}
+
+    def handle_line(self, socket, line):
+        """处理一行请求，返回回复（JSON 行）"""
+        try:
+            message = json.loads(line.decode("utf-8"))
+            if not isinstance(message, dict):
+                raise ValueError("消息必须是 JSON 对象")
+            if message.get("request") is None:
+                check_command_message(message)
+        except ValueError as e:
+            return encode({"ok": False, "error": str(e)})
+
+        kind = message.get("request")
+        if kind == "subscribe":
+            self.subscribers.add(socket)
+        elif kind == "unsubscribe":
+            self.subscribers.discard(socket)
+            return encode({"ok": True})
+        elif kind not in (None, "status"):
+            return encode({"ok": False, "error": f"未知请求: {kind}"})
+        elif kind is None:
+            self.message_received.emit(message)
+        return encode({"ok": True, "status": self.status()})
+
+    def publish(self, event):
+        """向所有订阅者推送状态变化；积压过多的订阅者被断开，不拖慢事件循环"""
+        if not self.subscribers:
+            return
+        line = encode({"event": event, "status": self.status()})
+        for socket in list(self.subscribers):
+            if socket.bytesToWrite() > MAX_PENDING_BYTES:
+                self.subscribers.discard(socket)
+                socket.abort()
+                continue
+            socket.write(line)
@@ -1,30 +1,79 @@
+import argparse
+import math
 import os
-import random
 import sys
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
-                             QLabel, QPushButton, QComboBox, QSystemTrayIcon,
-                             QMenu, QProgressBar, QFrame, QHBoxLayout, QMessageBox, QSpinBox, QGridLayout, QTextEdit,
-                             QSizePolicy, QStyle, QCheckBox)
-from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QIcon, QColor, QPalette, QFont, QFontMetrics
+import threading
+import time
+
+_STARTED_AT = time.perf_counter()  # 启动计时起点，需早于 PyQt5 导入
+
+if __name__ == "__main__":
+    # 多会话终端服务器：共享调度守护进程 / 每个会话的瘦客户端，都不需要完整的主程序
+    if "--daemon" in sys.argv[1:]:
+        import daemon
+        sys.exit(daemon.main(sys.argv))
+    if "--client" in sys.argv[1:]:
+        import client
+        sys.exit(client.main(sys.argv))
+
+    # 已有实例在运行时只转发命令后退出，不加载任何界面模块
+    import instance
+    _client_exit = instance.run_client(sys.argv)
+    if _client_exit is not None:
+        sys.exit(_client_exit)
+
+# 启动关键路径只导入托盘所需的控件，其余在用到时再导入
+from PyQt5.QtWidgets import QApplication, QMainWindow, QSystemTrayIcon, QMenu
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from PyQt5.QtGui import QIcon
+
+import history
+import instance
+from engine import BREAK_STARTED, OFF_DUTY, WORK_STARTED, ScheduleEngine
+from prefetch import BreakPrefetcher
+from reminders import parse_reminders
+from scheduler import MAX_TIMER_MS, EngineDriver
+from settings import Settings, SettingsStore
+from startup import StartupReport
+from themes import ThemeEngine
+from tracing import traced
+
+BREAK_PREWARM_DELAY = 3000  # 启动后多久预构建休息窗口（毫秒）
+
+# 按设置项分组：修改后需要处理的子系统
+TIMING_FIELDS = frozenset({"work_time", "break_time", "long_break_time", "break_interval"})
+SCHEDULE_FIELDS = TIMING_FIELDS | {"reminders", "schedule"}  # 需要重新推算剩余时间
+OVERLAY_FIELDS = frozenset({"overlay_mode", "overlay_backdrop", "overlay_fade_ms"})  # 需要重建休息窗口
+TRAY_FIELDS = frozenset({"is_dark", "tray_countdown"})  # 托盘图标
+RELEASE_REPORT_DELAY = 200  # 托盘模式释放界面后多久统计内存（毫秒，等延迟删除完成）
 
 
 class StretchlyStyleApp(QMainWindow):
-    def __init__(self):
+    status_changed = pyqtSignal(str)  # 参数：变化原因（调度事件类型、paused、locked……）
+
+    def __init__(self, startup=None, startup_report=False, watch_themes=False, idle_source="auto", diagnostics=None,
+                 tray_only=False, trace=None):
         super().__init__()
+        self.tracer = None  # 性能跟踪，按需开启（@traced 的方法据此记录耗时）
+        self.trace_path = trace  # 命令行指定时开启跟踪，退出前写入文件
+        self.startup = startup or StartupReport()
+        self.print_startup_report = startup_report
+        self.ui_ready = False  # 主界面在首次显示时才构建
         self.autostart_enabled = False
+        # 读取持久化设置
+        self.settings_store = SettingsStore(parent=self)
+        self.settings = self.settings_store.load()
+        self.history = history.HistoryRecorder(os.path.join(os.path.dirname(self.settings_store.path), "history.db"))
+
         # 初始化变量
-        self.work_time = 30*60  # 默认20分钟（转换为秒）
-        self.break_time = 20  # 休息20秒
-        self.long_break_time = 5 * 60  # 长休息时间(秒)
-        self.break_interval = 4  # 几次短休息后长休息
-        self.break_counter = 0
-        self.is_working = True
-        self.remaining = self.work_time
-        self.break_win = None  # 休息窗口引用
-        self.break_timer = None  # 休息计时器
-        self.normal_break_time = 20
-        self.current_break_time = self.normal_break_time
+        self.break_win = None  # 休息窗口引用（构建一次后复用）
+        self.idle_source_kind = idle_source
+        self.idle_source = None  # 空闲/锁屏检测源，事件循环启动后创建
+        self.diagnostics = None  # 运行时诊断，按需开启
+        self.diagnostics_path = diagnostics  # 命令行指定时退出前写入报告
+        self.tray_only = tray_only  # 低占用模式：主界面和休息窗口隐藏后即销毁
+        self.image_pack = None  # 休息背景图片包，设置了图片目录时在事件循环启动后创建
+        self.settings_dialog = None  # 设置对话框，首次打开时构建
 
         # 设置窗口属性
         self.setWindowTitle("EyeCare 护眼精灵")
@@ -32,18 +81,121 @@ class StretchlyStyleApp(QMainWindow):
         self.setWindowFlags(Qt.FramelessWindowHint)
         self.setAttribute(Qt.WA_TranslucentBackground)
 
-        self.is_dark = False
-        self.init_ui()
+        self.is_dark = self.settings.is_dark
+        self.theme_engine = ThemeEngine(self)
+        if watch_themes:
+            self.theme_engine.enable_hot_reload()
+            self.theme_engine.theme_reloaded.connect(self.on_theme_reloaded)
+
+        # 调度状态机（不依赖 Qt）+ 驱动层：只在阶段到期时唤醒
+        self.engine = ScheduleEngine(
+            work_time=self.settings.work_time,
+            break_time=self.settings.break_time,
+            long_break_time=self.settings.long_break_time,
+            break_interval=self.settings.break_interval,
+        )
+        self.engine.set_reminders(parse_reminders(self.settings.reminders))
+        self.engine.set_timetable(self.load_timetable(self.settings.schedule))
+        self.scheduler = EngineDriver(self.engine, self)
+        self.scheduler.engine_event.connect(self.on_engine_event)
+        if self.diagnostics_path:
+            self.ensure_diagnostics()
+        if self.trace_path or self.settings.tracing:
+            self.ensure_tracer()
+
+        # 界面刷新计时器：仅在主窗口可见时运行，在显示的秒数变化时唤醒
+        self.view_timer = self.tick_timer(self.update_timer)
+        # 休息倒计时刷新：仅在休息窗口显示时运行
+        self.break_timer = self.tick_timer(self.update_break_timer)
+        # 托盘提示和倒计时图标：按分钟刷新
+        self.tray_timer = self.tick_timer(self.update_tray)
+        self.tray_tooltip = None
+        self.tray_icons = None  # 倒计时图标图集，首次显示倒计时时创建
+        self.tray_icon_key = None  # 当前显示的图标，None 为程序图标
+        # 休息内容预取：下一次休息到期前 prefetch_seconds 秒在后台准备
+        self.prefetch_timer = self.tick_timer(self.prefetch_next_break)
+        self.prefetcher = BreakPrefetcher(self)
+        self.prefetcher.ready.connect(self.on_break_prefetched)
+        self.next_break = None  # 预计的下一次休息（engine.Upcoming）
+        self.break_onset = None  # 正在显示的休息 (类型, 是否使用了预取内容)，首次绘制后记录延迟
+        self.last_break_onset = None
+        self.status_changed.connect(self.schedule_prefetch)
+
+        self.engine.start()
+        self.startup.mark("调度器就绪")
+
+        # 第一阶段只创建托盘，主界面、设置、休息窗口和自启动检查都延后
         self.init_tray()
-
-        # 主计时器
-        self.main_timer = QTimer(self)
-        self.main_timer.timeout.connect(self.update_timer)
-        self.main_timer.start(1000)  # 1秒更新
-
-        # 默认最小化到托盘
-        self.hide()
+        self.startup.mark("托盘就绪")
+        QTimer.singleShot(0, self.run_deferred_startup)
+
+    def run_deferred_startup(self):
+        """第二阶段：事件循环启动后再执行的启动任务"""
+        self.startup.mark("事件循环启动")
+        self.init_idle_source()
+        self.settings_store.watch()
+        self.settings_store.changed_externally.connect(self.apply_settings)
+        threading.Thread(target=self.probe_autostart, daemon=True).start()
+        self.load_image_pack(self.settings.image_pack)
+        self.schedule_prefetch()
+
+        # 空闲时预先构建休息窗口，休息开始时只需更新内容
+        QTimer.singleShot(BREAK_PREWARM_DELAY, self.prewarm_break_overlay)
+
+    def init_idle_source(self):
+        """创建空闲/锁屏检测源"""
+        from idle import create_idle_source
+
+        self.idle_source = create_idle_source(self.idle_source_kind, self)
+        self.engine.idle_probe = self.idle_source.idle_seconds
+        self.idle_source.locked.connect(self.on_session_locked)
+        self.idle_source.unlocked.connect(self.on_session_unlocked)
+        self.startup.mark(f"空闲检测就绪({self.idle_source.name})")
+
+    def on_session_locked(self):
+        """锁屏：暂停调度和所有界面刷新，离开期间没有任何唤醒"""
+        if self.engine.is_away():
+            return
+        self.engine.lock()
+        self.view_timer.stop()
+        self.close_break_window()
+        self.update_tray()
+        self.status_changed.emit("locked")
+
+    def on_session_unlocked(self):
+        """解锁：离开足够久视为已休息，否则从暂停处继续"""
+        if not self.engine.is_away():
+            return
+        self.engine.unlock()
+        if not self.engine.is_working:
+            # 休息被锁屏打断且没有离开足够久，恢复显示；托盘模式下休息窗口已在隐藏后销毁，需重新构建
+            if self.break_win is not None:
+                self.break_win.show_fullscreen()
+            else:
+                self.show_break_notification(self.engine.break_kind())
+                self.break_onset = None  # 恢复显示不是新的一次休息，不记录延迟
+        self.update_timer()
+        self.refresh_break_countdown()
+        self.status_changed.emit("unlocked")
+
+    def probe_autostart(self):
+        """后台线程检查自启动（注册表读取不阻塞界面）"""
         self.check_autostart()
+        self.startup.mark("自启动检查完成")
+
+    def prewarm_break_overlay(self):
+        """预构建休息窗口，启动的最后一个阶段"""
+        if not self.engine.is_away() and not self.tray_only:
+            self.ensure_break_overlay()
+        self.startup.mark("休息窗口预构建")
+        if self.print_startup_report:
+            print(self.startup.format("托盘就绪"), flush=True)
+
+    def ensure_ui(self):
+        """按需构建主界面"""
+        if not self.ui_ready:
+            self.init_ui()
+            self.ui_ready = True
 
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
@@ -55,8 +207,61 @@ class StretchlyStyleApp(QMainWindow):
             self.move(event.globalPos() - self.drag_pos)
             event.accept()
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.ensure_ui()
+        self.update_timer()  # 显示时立即按当前状态重算
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.view_timer.stop()
+        if self.tray_only and self.ui_ready:
+            QTimer.singleShot(0, self.release_ui)
+
+    def release_ui(self):
+        """托盘模式：销毁隐藏的主界面（控件和样式表），只保留调度状态和托盘"""
+        if self.isVisible() or not self.ui_ready:
+            return
+        from diagnostics import rss_bytes
+
+        before = rss_bytes()
+        widget = self.takeCentralWidget()
+        if widget is not None:
+            widget.deleteLater()
+        self.ui_ready = False
+        self.time_label = self.status_label = self.progress = self.start_btn = self.tray_btn = None
+        self.setStyleSheet("")
+        self.applied_theme = None  # 重建时重新应用主题
+        QTimer.singleShot(RELEASE_REPORT_DELAY, lambda: self.report_release("主界面", before))
+
+    def release_break_overlay(self):
+        """托盘模式：休息结束后销毁休息窗口（连同面板图片缓存）"""
+        if self.break_win is None or self.break_win.isVisible():
+            return
+        before = None
+        if not self.isVisible():
+            from diagnostics import rss_bytes
+            before = rss_bytes()
+        self.break_win.deleteLater()
+        self.break_win = None
+        if self.image_pack is not None:
+            self.image_pack.release()
+        if before is not None:
+            QTimer.singleShot(RELEASE_REPORT_DELAY, lambda: self.report_release("休息窗口", before))
+
+    def report_release(self, label, before):
+        """释放界面后归还空闲堆内存；诊断开启时记录常驻内存变化"""
+        from diagnostics import rss_bytes, trim_heap
+
+        trim_heap()
+        if self.diagnostics is not None:
+            self.diagnostics.record_release(label, before, rss_bytes())
+
     def init_ui(self):
         """初始化主界面"""
+        from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QProgressBar
+        from PyQt5.QtGui import QFont
+
         main_widget = QWidget()
         main_widget.setObjectName("MainWidget")
         self.setCentralWidget(main_widget)
@@ -85,7 +290,7 @@ class StretchlyStyleApp(QMainWindow):
 
 
         # 计时器显示
-        self.time_label = QLabel(self.format_time(self.remaining))
+        self.time_label = QLabel(self.format_time(self.engine.remaining_seconds()))
         self.time_label.setFont(QFont("Arial", 48, QFont.Bold))
         self.time_label.setAlignment(Qt.AlignCenter)
 
@@ -96,8 +301,8 @@ class StretchlyStyleApp(QMainWindow):
 
         # 进度条
         self.progress = QProgressBar()
-        self.progress.setRange(0, self.work_time)
-        self.progress.setValue(self.remaining)
+        self.progress.setRange(0, self.engine.phase_duration)
+        self.progress.setValue(self.engine.remaining_seconds())
         self.progress.setTextVisible(False)
         self.progress.setFixedHeight(8)
 
@@ -146,16 +351,22 @@ class StretchlyStyleApp(QMainWindow):
             # 设置图标（优先尝试自定义图标，失败则用默认图标）
             icon_path = "icon.png"
             if os.path.exists(icon_path):
-                self.tray.setIcon(QIcon(icon_path))
+                self.app_icon = QIcon(icon_path)
             else:
                 from PyQt5.QtWidgets import QStyle
-                default_icon = self.style().standardIcon(QStyle.SP_MessageBoxInformation)
-                self.tray.setIcon(default_icon)
+                self.app_icon = self.style().standardIcon(QStyle.SP_MessageBoxInformation)
+            self.tray.setIcon(self.app_icon)
 
             # 创建菜单
             menu = QMenu()
             show_action = menu.addAction("显示窗口")
             show_action.triggered.connect(self.show_in_top_left)
+            stats_action = menu.addAction("休息统计")
+            stats_action.triggered.connect(self.show_stats)
+            diagnostics_action = menu.addAction("诊断报告")
+            diagnostics_action.triggered.connect(self.dump_diagnostics)
+            trace_action = menu.addAction("导出性能跟踪")
+            trace_action.triggered.connect(self.dump_trace)
             exit_action = menu.addAction("退出")
             exit_action.triggered.connect(self.close)
             self.tray.setContextMenu(menu)
@@ -164,6 +375,7 @@ class StretchlyStyleApp(QMainWindow):
             self.tray.activated.connect(lambda r: self.show_in_top_left() if r == QSystemTrayIcon.Trigger else None)
 
             self.tray.show()
+            self.update_tray()
             self.tray.showMessage("EyeCare", "程序已最小化到托盘", QSystemTrayIcon.Information, 2000)
 
         except Exception as e:
@@ -178,6 +390,7 @@ class StretchlyStyleApp(QMainWindow):
 
     def show_in_top_left(self):
         """在左上角显示窗口"""
+        self.ensure_ui()
 
         # 设置窗口位置为左上角
         screen_geometry = QApplication.desktop().availableGeometry()
@@ -192,407 +405,329 @@ class StretchlyStyleApp(QMainWindow):
         mins, secs = divmod(seconds, 60)
         return f"{mins:02d}:{secs:02d}"
 
+    def theme_name(self):
+        """当前主题名（对应 themes/ 下的文件名）"""
+        return "dark" if self.is_dark else "light"
+
+    @traced
     def update_style(self):
-        """更新主题样式"""
-        palette = QPalette()
-
-        if self.is_dark:
-            # 深色主题
-            bg_color = QColor(40, 44, 52)
-            text_color = QColor(220, 220, 220)
-            accent_color = QColor(100, 149, 237)  # 蓝色
+        """应用预编译的主题样式（主题未变化时不重新设置）"""
+        self.theme_engine.apply(self, self.theme_name())
+
+    def on_theme_reloaded(self, name):
+        """主题文件被修改：仅当正在使用该主题时重新应用"""
+        if name != self.theme_name():
+            return
+        if self.ui_ready:
+            self.update_style()
+        self.update_tray()
+
+    def tick_timer(self, slot):
+        """单次定时器：由 schedule_tick 按显示值的下一次变化挂起"""
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        timer.setTimerType(Qt.PreciseTimer)
+        timer.setObjectName(slot.__name__)
+        timer.expected_at = None  # 预定触发时刻（perf_counter），跟踪时用来计算迟到
+        timer.timeout.connect(lambda: self.trace_timer(timer))
+        timer.timeout.connect(slot)
+        return timer
+
+    def start_timer(self, timer, ms):
+        """挂起 tick_timer 创建的定时器并记下预定触发时刻"""
+        timer.expected_at = time.perf_counter() + ms / 1000
+        timer.start(ms)
+
+    def trace_timer(self, timer):
+        """跟踪开启时记录定时器比预定时刻晚了多少"""
+        if self.tracer is not None and timer.expected_at is not None:
+            self.tracer.lateness(timer.objectName(), time.perf_counter() - timer.expected_at)
+
+    def schedule_tick(self, timer, unit=1):
+        """在按 unit 秒取整的剩余时间下一次变化时唤醒；暂停/锁屏时不挂定时器"""
+        ms = self.scheduler.ms_until_change(unit)
+        if ms is None:
+            timer.stop()
         else:
-            # 浅色主题
-            bg_color = QColor(240, 240, 240)
-            text_color = QColor(70, 70, 70)
-            accent_color = QColor(70, 130, 180)  # 蓝色
-
-        # 应用调色板
-        palette.setColor(QPalette.Window, bg_color)
-        palette.setColor(QPalette.WindowText, text_color)
-        palette.setColor(QPalette.Button, bg_color.lighter(110))
-        palette.setColor(QPalette.ButtonText, text_color)
-        palette.setColor(QPalette.Highlight, accent_color)
-
-        self.setPalette(palette)
-
-        # 自定义控件样式
-        self.setStyleSheet(f"""
-            #MainWidget {{
-                background-color: {bg_color.name()};
-                border-radius: 15px;
-                border: 1px solid {bg_color.darker(120).name()};
-            }}
-            QProgressBar {{
-                border: 1px solid {bg_color.darker(130).name()};
-                border-radius: 4px;
-            }}
-            QProgressBar::chunk {{
-                background-color: {accent_color.name()};
-                border-radius: 4px;
-            }}
-            QPushButton {{
-                border: 1px solid {bg_color.darker(130).name()};
-                border-radius: 5px;
-                padding: 5px;
-                min-width: 80px;
-            }}
-            QPushButton:hover {{
-                background-color: {bg_color.lighter(110).name()};
-            }}
-        """)
+            self.start_timer(timer, ms)
 
+    @traced
     def update_timer(self):
-        """更新计时器"""
-        if self.remaining > 0:
-            self.remaining -= 1
-            self.time_label.setText(self.format_time(self.remaining))
-            self.progress.setValue(self.remaining)
-        else:
-            self.switch_mode()  # 时间到自动切换模式
+        """按调度器推算的剩余时间刷新界面"""
+        self.scheduler.poll()
+        self.refresh_view()
+
+    def tray_tooltip_text(self):
+        """托盘提示文字（分钟粒度）"""
+        if self.engine.is_away():
+            return "EyeCare：已离开"
+        if self.engine.is_paused():
+            return "EyeCare：已暂停"
+        if self.engine.is_off_duty():
+            resumes_at = time.localtime(self.engine.snapshot()["resumes_at"])
+            return f"EyeCare：不在提醒时段，{time.strftime('%m-%d %H:%M', resumes_at)} 恢复"
+        minutes = math.ceil(self.engine.remaining() / 60)
+        if self.engine.is_working:
+            return f"EyeCare：工作中，约 {minutes} 分钟后休息"
+        return f"EyeCare：休息中，还剩约 {minutes} 分钟"
+
+    def tray_icon_state(self):
+        """托盘图标应显示的 (分钟数, 设备像素比, 配色, 是否工作中)；暂停、离开、时段外为 None（程序图标）"""
+        engine = self.engine
+        if not self.settings.tray_countdown or engine.is_paused() or engine.is_away() or engine.is_off_duty():
+            return None
+        from PyQt5.QtWidgets import QApplication
+        from trayicon import tray_colors
+
+        colors = tray_colors(self.theme_engine.get(self.theme_name()).palette)
+        return math.ceil(engine.remaining() / 60), QApplication.primaryScreen().devicePixelRatio(), colors, \
+            engine.is_working
+
+    def update_tray(self):
+        """刷新托盘提示和图标（值变化时才设置），在下一个整分钟变化时再次唤醒"""
+        if not hasattr(self, 'tray'):
+            return
+        text = self.tray_tooltip_text()
+        if text != self.tray_tooltip:
+            self.tray.setToolTip(text)
+            self.tray_tooltip = text
+        key = self.tray_icon_state()
+        if key != self.tray_icon_key:
+            if key is not None and self.tray_icons is None:
+                from trayicon import TrayIconAtlas
+                self.tray_icons = TrayIconAtlas()
+            self.tray.setIcon(self.app_icon if key is None else self.tray_icons.icon(*key))
+            self.tray_icon_key = key
+        self.schedule_tick(self.tray_timer, 60)
+
+    def status_text(self):
+        """当前状态文字"""
+        if self.engine.is_paused():
+            return "已暂停"
+        if self.engine.is_off_duty():
+            return "不在提醒时段"
+        if self.engine.is_working:
+            return "工作中..."
+        from content import break_label
+        return break_label(self.engine.break_kind())
+
+    def refresh_view(self):
+        """把调度状态同步到托盘提示和主界面；主界面隐藏时不刷新，也不挂刷新定时器"""
+        self.update_tray()
+        if not self.ui_ready or not self.isVisible():
+            self.view_timer.stop()
+            return
+        remaining = self.engine.remaining_seconds()
+        self.time_label.setText(self.format_time(remaining))
+        self.progress.setMaximum(self.engine.phase_duration)
+        self.progress.setValue(remaining)
+        self.status_label.setText(self.status_text())
+        self.start_btn.setText("继续" if self.engine.is_paused() else "暂停")
+        self.schedule_tick(self.view_timer)
+
+    def status(self):
+        """当前状态（本地控制接口使用）"""
+        return dict(self.engine.snapshot(), settings=self.settings.to_dict())
+
+    @traced
+    def on_engine_event(self, event):
+        """调度事件：阶段开始时切换窗口，阶段结束类事件写入休息历史"""
+        if event.kind in history.RECORDED_KINDS:
+            self.history.record(event.kind, event.duration, event.detail)
+        elif event.kind in (WORK_STARTED, OFF_DUTY):
+            self.close_break_window()
+        elif event.kind == BREAK_STARTED:
+            self.show_break_notification(event.detail)
+        self.refresh_view()
+        if event.kind in (WORK_STARTED, BREAK_STARTED, OFF_DUTY):
+            self.status_changed.emit(event.kind)
 
     def toggle_timer(self):
         """暂停/继续计时 - 修复版"""
         try:
-            if self.main_timer.isActive():
+            if not self.engine.is_paused():
                 # 暂停逻辑
-                self.main_timer.stop()
-                self.start_btn.setText("继续")
-                self.status_label.setText("已暂停")
-
-                # 暂停休息计时器（如果存在且正在运行）
-                if hasattr(self, 'break_timer') and self.break_timer and self.break_timer.isActive():
-                    self.break_timer.stop()
+                self.engine.pause()
+                self.refresh_view()
+                self.refresh_break_countdown()  # 暂停时倒计时不再唤醒
+                self.status_changed.emit("paused")
             else:
                 # 继续逻辑
-                self.main_timer.start()
-                self.start_btn.setText("暂停")
-
-                # 根据当前模式设置状态文本
-                status_text = "工作中..." if self.is_working else "休息中..."
-                self.status_label.setText(status_text)
-
-                # 继续休息计时器（如果存在且不在运行）
-                if hasattr(self, 'break_timer') and self.break_timer and not self.break_timer.isActive():
-                    self.break_timer.start()
+                self.engine.resume()
+                self.refresh_view()
+                self.refresh_break_countdown()
+                self.status_changed.emit("resumed")
 
         except Exception as e:
             print(f"计时器切换错误: {str(e)}")
             # 恢复默认状态
-            self.main_timer.stop()
+            self.engine.pause()
             if hasattr(self, 'break_timer') and self.break_timer:
                 self.break_timer.stop()
-            self.start_btn.setText("开始")
-            self.status_label.setText("已停止")
-
-    def show_break_notification(self):
-        """显示全屏休息提醒 - 完整版（支持长短休息）"""
-        # 先清理已有资源
-        if self.break_timer:
-            self.break_timer.stop()
-            self.break_timer.deleteLater()
-            self.break_timer = None
-
-        if self.break_win:
-            self.break_win.close()
-            self.break_win.deleteLater()
-            self.break_win = None
-
-        # 随机鼓励语库
-        encouragements = [
-            "做得好！短暂的休息能让眼睛更明亮哦~ ✨",
-            "你值得这片刻的放松，眼睛会感谢你的！ 😊",
-            "保护视力就是投资未来，你做得太棒了！ 👏",
-            "休息是为了走更远的路，你的眼睛真幸运！ 🌟",
-            "聪明的你都知道适时休息，继续保持！ 💪",
-            "20秒的放松，换来看世界的清晰！ 🌈",
-            "你对自己的照顾，让未来更明亮！ ☀️",
-            "爱护眼睛的你，真是闪闪发光！ ⭐",
-            "短暂的休息，大大的回报！ 🌸",
-            "你的眼睛正在享受这美好的休息时刻！ 🎉"
-        ]
-
-        # 根据休息类型设置提示内容
-        if self.current_break_time == self.long_break_time:
-            title = "🌟 长时间休息时间到！"
-            tips = [
-                "💡 深度放松建议:",
-                "• 起身走动5分钟",
-                "• 做全身拉伸运动",
-                "• 远眺窗外风景",
-                "• 喝杯水放松一下"
-            ]
-        else:
-            title = "👀 眼睛休息时间到！"
-            tips = [
-                "💡 快速放松建议:",
-                "• 远眺20秒放松眼睛",
-                "• 眨眼10次湿润眼球",
-                "• 深呼吸3次放松身心",
-                "• 转动脖子缓解僵硬"
-            ]
-
-        # 随机生成柔和背景色
-        def random_pastel_color():
-            h = random.randint(0, 359)
-            s = random.randint(50, 150)
-            v = random.randint(200, 255)
-            return QColor.fromHsv(h, s, v)
-
-        bg_color = random_pastel_color()
-        text_color = "#333333"  # 保持深色文字确保可读性
-
-        # 主窗口设置
-        self.break_win = QMainWindow()
-        self.break_win.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
-        self.break_win.setAttribute(Qt.WA_TranslucentBackground)
-        self.break_win.setGeometry(QApplication.desktop().screenGeometry())
-
-        # 背景部件
-        bg = QWidget(self.break_win)
-        bg.setStyleSheet(
-            f"background-color: rgba({bg_color.red()}, {bg_color.green()}, {bg_color.blue()}, 0.88);")
-        bg.setGeometry(self.break_win.geometry())
-
-        # 主容器
-        main_container = QWidget()
-        main_container.setFixedSize(self.break_win.size())
-        main_layout = QVBoxLayout(main_container)
-        main_layout.setContentsMargins(40, 40, 40, 40)
-        main_layout.setAlignment(Qt.AlignCenter)
-
-        # 内容面板
-        content_panel = QFrame()
-        content_panel.setMinimumSize(820, 620)
-        content_panel.setStyleSheet("""
-            background-color: rgba(255, 255, 255, 0.92);
-            border-radius: 30px;
-            padding: 35px;
-        """)
-
-        # 内容布局
-        content_layout = QVBoxLayout(content_panel)
-        content_layout.setAlignment(Qt.AlignCenter)
-        content_layout.setSpacing(20)
-        content_layout.setContentsMargins(25, 25, 25, 25)
-
-        # 1. 表情图标
-        icon = QLabel(random.choice(["👀", "👁️", "😊", "🌿", "🌞", "🌸"]))
-        icon.setFont(QFont("Arial", 110))
-        icon.setStyleSheet(f"color: {bg_color.darker(150).name()}; margin-bottom: 15px;")
-        icon.setAlignment(Qt.AlignCenter)
-        content_layout.addWidget(icon)
-
-        # 2. 主标题
-        title_label = QLabel(title)
-        title_label.setFont(QFont("微软雅黑", 30, QFont.Bold))
-        title_label.setStyleSheet(f"""
-            color: {bg_color.darker(200).name()};
-            qproperty-wordWrap: true;
-            padding: 8px 15px;
-            margin: 5px 0;
-            min-width: 780px;
-        """)
-        title_label.setAlignment(Qt.AlignCenter)
-        content_layout.addWidget(title_label)
-
-        # 3. 鼓励语
-        encouragement = QLabel(random.choice(encouragements))
-        encouragement.setFont(QFont("微软雅黑", 21))
-        metrics = QFontMetrics(encouragement.font())
-        text_width = metrics.width(encouragement.text())
-
-        if text_width > 700:
-            encouragement.setStyleSheet(f"""
-                color: {text_color};
-                qproperty-wordWrap: true;
-                padding: 10px 25px;
-                min-width: 750px;
-                max-width: 750px;
-            """)
-            encouragement.setFixedHeight(80)
+            if self.ui_ready:
+                self.start_btn.setText("开始")
+                self.status_label.setText("已停止")
+
+    def ensure_break_overlay(self):
+        """按需构建休息窗口（只构建一次，之后复用）"""
+        if self.break_win is None:
+            from overlay import BreakOverlay
+
+            self.break_win = BreakOverlay(**self.overlay_options())
+            self.break_win.skip_requested.connect(self.skip_break)
+            self.break_win.shown.connect(self.on_break_shown)
+            if self.tracer is not None:
+                self.tracer.monitor(self.break_win)
+            if self.tray_only:
+                self.break_win.hidden.connect(lambda: QTimer.singleShot(0, self.release_break_overlay))
+        return self.break_win
+
+    def overlay_options(self):
+        """休息窗口的合成方式与淡入淡出参数（来自设置）"""
+        return {"mode": self.settings.overlay_mode, "backdrop": self.settings.overlay_backdrop,
+                "fade_ms": self.settings.overlay_fade_ms}
+
+    def schedule_prefetch(self, reason=None):
+        """在预计的下一次休息到期前 prefetch_seconds 秒唤醒预取；不在工作中时不挂定时器"""
+        self.next_break = self.engine.upcoming_break()
+        if self.next_break is None or self.settings.prefetch_seconds <= 0:
+            self.prefetch_timer.stop()
+            if self.next_break is not None and self.image_pack is not None:
+                # 不预取时在工作阶段开始就准备背景图片
+                self.image_pack.prepare(self.screen_pixel_size())
+            return
+        delay = self.next_break.time - self.settings.prefetch_seconds - self.engine.clock()
+        self.start_timer(self.prefetch_timer, min(max(0, math.ceil(delay * 1000)), MAX_TIMER_MS))
+
+    def prefetch_next_break(self):
+        """后台准备下一次休息的内容（排版按主屏的面板宽度和 DPI）"""
+        upcoming = self.engine.upcoming_break()
+        if upcoming is None:
+            return
+        from PyQt5.QtWidgets import QApplication
+        from overlay import panel_width
+        from textlayout import screen_dpi
+
+        width = panel_width(QApplication.desktop().screenGeometry().size())
+        self.prefetcher.request(upcoming, width, screen_dpi())
+        if self.image_pack is not None:
+            self.image_pack.prepare(self.screen_pixel_size())
+
+    def on_break_prefetched(self, result):
+        """预取完成：提前设置内容并渲染面板，休息开始时只需显示窗口"""
+        if not self.engine.is_working or self.engine.is_away():
+            return
+        overlay = self.ensure_break_overlay()
+        overlay.set_content(seconds=result.upcoming.duration, **result.content)
+        overlay.prerender()
+
+    @traced
+    def show_break_notification(self, kind=None):
+        """显示全屏休息提醒 - 完整版（长短休息和各类提醒共用，kind 默认取当前休息类型）"""
+        requested_at = time.perf_counter()
+        kind = kind or self.engine.break_kind()
+        prefetched = self.prefetcher.take(kind)
+        if prefetched is not None:
+            content = prefetched.content
         else:
-            encouragement.setStyleSheet(f"color: {text_color}; padding: 10px 25px;")
-
-        encouragement.setAlignment(Qt.AlignCenter)
-        content_layout.addWidget(encouragement)
-
-        # 4. 倒计时
-        self.break_timer_label = QLabel(f"{self.current_break_time}秒")
-        self.break_timer_label.setFont(QFont("Arial", 70, QFont.Bold))
-        self.break_timer_label.setStyleSheet(f"""
-            color: {bg_color.darker(200).name()};
-            background-color: rgba(255, 255, 255, 0.7);
-            border-radius: 15px;
-            padding: 12px 35px;
-            min-width: 180px;
-            margin: 10px 0;
-        """)
-        content_layout.addWidget(self.break_timer_label)
-
-        # 5. 休息建议
-        tips_frame = QWidget()
-        tips_layout = QVBoxLayout(tips_frame)
-        tips_layout.setSpacing(4)
-        tips_layout.setContentsMargins(10, 5, 10, 5)
-
-        test_font = QFont("微软雅黑", 15)
-        fm = QFontMetrics(test_font)
-        char_width = fm.width("中")
-        max_chars_per_line = 12
-
-        for i, tip in enumerate(tips):
-            item_widget = QWidget()
-            item_layout = QHBoxLayout(item_widget)
-            item_layout.setContentsMargins(0, 0, 0, 0)
-            item_layout.setSpacing(3)
-
-            bullet_symbol = "▪"
-            bullet = QLabel(bullet_symbol if i > 0 else "→")
-            bullet.setFont(QFont("Arial", 14))
-            bullet.setStyleSheet(f"color: {text_color}; min-width: 10px;")
-            item_layout.addWidget(bullet)
-
-            label = QLabel()
-            label.setFont(QFont("微软雅黑", 15))
-            label.setStyleSheet(f"color: {text_color}; margin:0; padding:0;")
-
-            wrapped_text = []
-            current_line = ""
-            for char in tip:
-                if len(current_line) >= max_chars_per_line:
-                    wrapped_text.append(current_line)
-                    current_line = char
-                else:
-                    current_line += char
-            if current_line:
-                wrapped_text.append(current_line)
-
-            label.setText("\n".join(wrapped_text))
-            label.setWordWrap(True)
-            label.setFixedWidth(char_width * max_chars_per_line + 10)
-
-            item_layout.addWidget(label)
-            tips_layout.addWidget(item_widget)
-
-        total_lines = sum(len(tip) // max_chars_per_line + 1 for tip in tips)
-        tips_frame.setFixedHeight(total_lines * 24 + 10)
-
-        content_layout.addWidget(tips_frame)
-
-        # 6. 跳过按钮
-        skip_btn = QPushButton(f"好的，我已休息 ({self.current_break_time}秒后自动继续)")
-        skip_btn.setFixedHeight(58)
-        skip_btn.setMinimumWidth(340)
-        skip_btn.setFont(QFont("微软雅黑", 15, QFont.Bold))
-        skip_btn.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {bg_color.darker(150).name()};
-                color: white;
-                border-radius: 8px;
-                padding: 8px 16px;
-                margin-top: 15px;
-            }}
-            QPushButton:hover {{
-                background-color: {bg_color.darker(180).name()};
-            }}
-        """)
-        skip_btn.clicked.connect(self.skip_break)
-        content_layout.addWidget(skip_btn)
-
-        main_layout.addWidget(content_panel)
-        self.break_win.setCentralWidget(main_container)
-
-        # 初始化倒计时
-        self.break_countdown = self.current_break_time
-        self.break_timer = QTimer(self.break_win)
-        self.break_timer.timeout.connect(self.update_break_timer)
-        self.break_timer.start(1000)
-
-        self.break_win.show()
-
+            from content import break_content
+            content = break_content(kind)
+        if self.next_break is not None and self.next_break.kind == kind:
+            # 延迟从预计的到期时刻算起，定时器晚到的部分也计入
+            requested_at -= max(0.0, self.engine.clock() - self.next_break.time)
+        self.break_onset = (kind, prefetched is not None)
+
+        image = None
+        if self.image_pack is not None:
+            image = self.image_pack.take(self.screen_pixel_size())
+
+        overlay = self.ensure_break_overlay()
+        overlay.set_content(seconds=self.engine.current_break_time, image=image, **content)
+        overlay.show_fullscreen(requested_at)
+
+        # 倒计时只负责刷新显示，休息结束由调度器触发
+        self.refresh_break_countdown()
+
+    def screen_pixel_size(self):
+        """主屏的设备像素尺寸（背景图片按此解码）"""
+        from PyQt5.QtWidgets import QApplication
+
+        screen = QApplication.primaryScreen()
+        return screen.geometry().size() * screen.devicePixelRatio()
+
+    def load_image_pack(self, directory):
+        """按设置创建背景图片包并在后台建立索引；目录为空时用纯色背景"""
+        if self.image_pack is not None:
+            self.image_pack.shutdown()
+            self.image_pack.deleteLater()
+            self.image_pack = None
+        if directory:
+            from imagepack import ImagePack
+
+            cache_dir = os.path.join(os.path.dirname(self.settings_store.path), "image-cache")
+            self.image_pack = ImagePack(os.path.expanduser(directory), cache_dir, parent=self)
+            self.image_pack.start()
+
+    def on_break_shown(self, ms):
+        """记录休息开始的延迟：从到期（或手动触发）到休息窗口首次绘制"""
+        if self.break_onset is None:
+            return
+        kind, prefetched = self.break_onset
+        self.break_onset = None
+        self.last_break_onset = {"kind": kind, "prefetched": prefetched, "onset_ms": round(ms, 3)}
+        if self.diagnostics is not None:
+            self.diagnostics.record_onset(self.last_break_onset)
+
+    @traced
     def update_break_timer(self):
         """更新休息倒计时 - 安全版本"""
         try:
-            if not hasattr(self, 'break_countdown') or not self.break_timer:
-                return
-
-            if self.break_countdown > 0:
-                self.break_countdown -= 1
-                if hasattr(self, 'break_timer_label'):
-                    self.break_timer_label.setText(f"{self.break_countdown}秒")
-            else:
-                self.cleanup_break_timer()
-                self.switch_mode()
+            self.scheduler.poll()
+            self.refresh_break_countdown()
         except Exception as e:
             print(f"倒计时更新错误: {str(e)}")
             self.cleanup_break_timer()
 
+    def refresh_break_countdown(self):
+        """休息窗口显示时刷新倒计时，并在显示的秒数下一次变化时再次唤醒"""
+        if self.break_win and self.break_win.isVisible() and not self.engine.is_working:
+            self.break_win.set_countdown(self.engine.remaining_seconds())
+            self.schedule_tick(self.break_timer)
+        else:
+            self.break_timer.stop()
+
     def cleanup_break_timer(self):
         """安全清理休息计时器"""
         try:
             if hasattr(self, 'break_timer') and self.break_timer:
                 self.break_timer.stop()
-                self.break_timer.deleteLater()
-                self.break_timer = None
-        except:
-            pass
+        except RuntimeError as e:
+            print(f"停止休息计时器失败: {e}")
 
-    def skip_break(self):
-        """跳过休息 - 安全版本"""
+    def close_break_window(self):
+        """淡出并隐藏休息窗口（窗口保留以供下次复用；托盘模式下隐藏后销毁）"""
         self.cleanup_break_timer()
         if hasattr(self, 'break_win') and self.break_win:
             try:
-                self.break_win.close()
-                self.break_win.deleteLater()
-            except:
-                pass
-            finally:
-                self.break_win = None
-        self.switch_mode()
-
-    def switch_mode(self):
-        """切换工作/休息模式 - 修复版"""
-        self.is_working = not self.is_working
-
-        if self.is_working:
-            # 切换到工作模式
-            self.remaining = self.work_time
-            self.status_label.setText("工作中...")
-            self.progress.setMaximum(self.work_time)
-            self.progress.setValue(self.remaining)
-
-            # 关闭休息窗口（如果存在）
-            if self.break_win:
-                self.break_win.close()
-                self.break_win = None
-        else:
-            # 更新休息计数器并确定休息时长
-            self.break_counter += 1
-            if self.break_counter % self.break_interval == 0:  # 长休息
-                self.current_break_time = self.long_break_time
-                self.status_label.setText("长时间休息中...")
-            else:  # 普通休息
-                self.current_break_time = self.normal_break_time
-                self.status_label.setText("休息中...")
-
-            # 设置剩余时间和进度条
-            self.remaining = self.current_break_time
-            self.progress.setMaximum(self.current_break_time)
-            self.progress.setValue(self.remaining)
-
-            # 显示休息通知
-            self.show_break_notification()
-
-        # 更新时间显示
-        self.time_label.setText(self.format_time(self.remaining))
-
-        # 确保主计时器运行
-        if not self.main_timer.isActive():
-            self.main_timer.start()
+                self.break_win.dismiss()
+            except RuntimeError as e:
+                print(f"关闭休息窗口失败: {e}")
+
+    def skip_break(self):
+        """跳过休息 - 安全版本"""
+        self.close_break_window()
+        self.engine.skip_break()
+
+    @traced
+    def switch_mode(self, kind=None):
+        """立即结束当前阶段切换工作/休息模式；kind 为提醒名时立即开始该提醒（窗口切换由调度事件完成）"""
+        self.engine.trigger(kind)
 
     def set_autostart(self, enable=True):
         """设置开机自启动"""
+        if sys.platform != "win32":
+            return False
+
         import winreg
         key = winreg.HKEY_CURRENT_USER
         subkey = r"Software\Microsoft\Windows\CurrentVersion\Run"
@@ -613,50 +748,60 @@ class StretchlyStyleApp(QMainWindow):
             print(f"设置自启动失败: {e}")
             return False
 
-    def save_and_close(self):
-        """保存设置并关闭对话框"""
-        try:
-            # 保存自启动设置
-            if hasattr(self, 'autostart_cb'):
-                self.set_autostart(self.autostart_cb.isChecked())
-
-            # 保存其他设置
-            new_work_time = self.work_spin.value() * 60
-            new_break_time = self.break_spin.value()
-            new_theme = self.theme_combo.currentText() == "深色f模式"
-
-            # 应用新设置
-            if self.is_working:
-                self.remaining = new_work_time - (self.work_time - self.remaining)
-            else:
-                self.remaining = new_break_time - (self.break_time - self.remaining)
-
-            self.work_time = new_work_time
-            self.break_time = new_break_time
-
-            # 更新主题
-            if new_theme != self.is_dark:
-                self.is_dark = new_theme
-                self.update_style()
-
-            # 更新UI
-            self.progress.setMaximum(self.work_time if self.is_working else self.break_time)
-            self.progress.setValue(self.remaining)
-            self.time_label.setText(self.format_time(self.remaining))
-
-            QMessageBox.information(self, "提示", "设置已保存！")
-            self.sender().parent().parent().accept()  # 关闭对话框
-
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"保存设置时出错:\n{str(e)}")
-
-    def show_settings(self):
-        """显示设置对话框"""
-        from PyQt5.QtWidgets import QDialog, QDialogButtonBox, QCheckBox, QVBoxLayout, QLabel, QSpinBox, QComboBox
+    def apply_settings(self, settings):
+        """应用一份设置（设置对话框保存和设置文件外部修改共用）
+
+        只处理有变化的设置项对应的子系统，没有变化时什么都不做。
+        """
+        changed = self.settings.changed_fields(settings)
+        if not changed:
+            return
+        self.settings = settings
+        if changed & OVERLAY_FIELDS and self.break_win is not None and not self.break_win.isVisible():
+            # 合成方式只能在创建窗口时确定，下次休息时按新设置重建
+            self.break_win.deleteLater()
+            self.break_win = None
+        if changed & TIMING_FIELDS:
+            self.engine.configure(settings.work_time, settings.break_time,
+                                  settings.long_break_time, settings.break_interval)
+        if "reminders" in changed:
+            self.engine.set_reminders(parse_reminders(settings.reminders))
+        if "schedule" in changed:
+            self.engine.set_timetable(self.load_timetable(settings.schedule))
+        if "image_pack" in changed:
+            self.load_image_pack(settings.image_pack)
+        if "tracing" in changed:
+            if settings.tracing:
+                self.ensure_tracer()
+            elif not self.trace_path:
+                self.stop_tracer()
+
+        # 更新主题
+        if settings.is_dark != self.is_dark:
+            self.is_dark = settings.is_dark
+            self.update_style()
+
+        # 更新UI：调度有变化时重新推算剩余时间，否则只在需要时刷新托盘图标
+        if changed & SCHEDULE_FIELDS:
+            self.update_timer()
+        elif changed & TRAY_FIELDS:
+            self.update_tray()
+        self.status_changed.emit("settings")
+
+    def load_timetable(self, text):
+        """编译作息规则"""
+        from timetable import load_timetable
+
+        return load_timetable(text) if text else None
+
+    def build_settings_dialog(self):
+        """构建设置对话框（只构建一次，每次打开时由 load_settings_dialog 填入当前设置）"""
+        from PyQt5.QtWidgets import (QDialog, QDialogButtonBox, QCheckBox, QVBoxLayout, QLabel, QSpinBox, QComboBox,
+                                     QPlainTextEdit)
 
         settings_dialog = QDialog(self)
         settings_dialog.setWindowTitle("设置")
-        settings_dialog.setFixedSize(300, 300)
+        settings_dialog.setFixedSize(340, 480)
 
         layout = QVBoxLayout()
         layout.setContentsMargins(20, 20, 20, 20)
@@ -664,34 +809,37 @@ class StretchlyStyleApp(QMainWindow):
 
         # 工作时间设置
         work_label = QLabel("工作时间 (分钟):")
-        self.work_spin = QSpinBox()
-        self.work_spin.setRange(1, 120)
-        self.work_spin.setValue(self.work_time // 60)
+        settings_dialog.work_spin = QSpinBox()
+        settings_dialog.work_spin.setRange(1, 120)
 
         # 休息时间设置
         break_label = QLabel("休息时间 (秒):")
-        self.break_spin = QSpinBox()
-        self.break_spin.setRange(5, 300)
-        self.break_spin.setValue(self.break_time)
+        settings_dialog.break_spin = QSpinBox()
+        settings_dialog.break_spin.setRange(5, 300)
 
         # 主题设置
         theme_label = QLabel("主题:")
-        self.theme_combo = QComboBox()
-        self.theme_combo.addItems(["浅色模式", "深色模式"])
-        self.theme_combo.setCurrentIndex(1 if self.is_dark else 0)
+        settings_dialog.theme_combo = QComboBox()
+        settings_dialog.theme_combo.addItems(["浅色模式", "深色模式"])
+
+        # 作息规则
+        schedule_label = QLabel("提醒时段规则 (每行一条，留空为全天):")
+        settings_dialog.schedule_edit = QPlainTextEdit()
+        settings_dialog.schedule_edit.setPlaceholderText("allow mon-fri 09:00-18:00\ndeny mon-fri 12:00-13:00")
 
         # 自启动设置
-        self.autostart_cb = QCheckBox("开机自动启动")
-        self.autostart_cb.setChecked(self.autostart_enabled)
+        settings_dialog.autostart_cb = QCheckBox("开机自动启动")
 
         # 添加到布局
         layout.addWidget(work_label)
-        layout.addWidget(self.work_spin)
+        layout.addWidget(settings_dialog.work_spin)
         layout.addWidget(break_label)
-        layout.addWidget(self.break_spin)
+        layout.addWidget(settings_dialog.break_spin)
         layout.addWidget(theme_label)
-        layout.addWidget(self.theme_combo)
-        layout.addWidget(self.autostart_cb)
+        layout.addWidget(settings_dialog.theme_combo)
+        layout.addWidget(schedule_label)
+        layout.addWidget(settings_dialog.schedule_edit)
+        layout.addWidget(settings_dialog.autostart_cb)
         layout.addStretch()
 
         # 创建按钮框
@@ -702,50 +850,148 @@ class StretchlyStyleApp(QMainWindow):
 
         settings_dialog.setLayout(layout)
 
-        def save_all_settings():
-            """保存所有设置"""
-            try:
-                # 保存自启动设置
-                self.set_autostart(self.autostart_cb.isChecked())
-
-                # 保存其他设置
-                new_work_time = self.work_spin.value() * 60
-                new_break_time = self.break_spin.value()
-                new_theme = self.theme_combo.currentText() == "深色模式"
-
-                # 应用新设置
-                if self.is_working:
-                    self.remaining = new_work_time - (self.work_time - self.remaining)
-                else:
-                    self.remaining = new_break_time - (self.break_time - self.remaining)
-
-                self.work_time = new_work_time
-                self.break_time = new_break_time
-
-                # 更新主题
-                if new_theme != self.is_dark:
-                    self.is_dark = new_theme
-                    self.update_style()
-
-                # 更新UI
-                self.progress.setMaximum(self.work_time if self.is_working else self.break_time)
-                self.progress.setValue(self.remaining)
-                self.time_label.setText(self.format_time(self.remaining))
-
-                QMessageBox.information(settings_dialog, "提示", "设置已保存！")
-                settings_dialog.accept()
-
-            except Exception as e:
-                QMessageBox.critical(settings_dialog, "错误", f"保存设置时出错:\n{str(e)}")
-
         # 连接信号
-        save_button.clicked.connect(save_all_settings)
+        save_button.clicked.connect(lambda: self.save_settings(settings_dialog))
         cancel_button.clicked.connect(settings_dialog.reject)
+        return settings_dialog
+
+    def load_settings_dialog(self, dialog):
+        """把当前设置填入设置对话框"""
+        dialog.work_spin.setValue(self.settings.work_time // 60)
+        dialog.break_spin.setValue(self.settings.break_time)
+        dialog.theme_combo.setCurrentIndex(1 if self.is_dark else 0)
+        if dialog.schedule_edit.toPlainText() != self.settings.schedule:
+            dialog.schedule_edit.setPlainText(self.settings.schedule)
+        dialog.autostart_cb.setChecked(self.autostart_enabled)
 
+    def show_settings(self):
+        """显示设置对话框（构建一次后复用；托盘模式下关闭即销毁）"""
+        if self.settings_dialog is None:
+            self.settings_dialog = self.build_settings_dialog()
+            if self.tray_only:
+                self.watch_widget(self.settings_dialog, "设置对话框")
+        settings_dialog = self.settings_dialog
+        self.load_settings_dialog(settings_dialog)
         settings_dialog.exec_()
+        if self.tray_only:
+            settings_dialog.deleteLater()
+            self.settings_dialog = None
+
+    def show_stats(self):
+        """显示休息统计（只读每日/每周汇总表）"""
+        from PyQt5.QtWidgets import QDialog, QVBoxLayout, QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("休息统计")
+        dialog.resize(640, 420)
+        layout = QVBoxLayout(dialog)
+        tabs = QTabWidget()
+        layout.addWidget(tabs)
+
+        headers = ["日期", "工作(分钟)", "完成休息", "跳过休息", "长休息", "休息(分钟)", "暂停(分钟)", "离开(分钟)"]
+        for table, title, limit in (("daily", "每日", 366), ("weekly", "每周", 53)):
+            rows = history.load_rollups(self.history.path, table, limit)
+            widget = QTableWidget(len(rows), len(headers))
+            widget.setHorizontalHeaderLabels(headers if table == "daily" else ["周"] + headers[1:])
+            widget.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+            widget.verticalHeader().setVisible(False)
+            widget.setEditTriggers(QTableWidget.NoEditTriggers)
+            for r, row in enumerate(rows):
+                key, work, taken, skipped, long_breaks, rest, paused, away = row
+                values = [key, work / 60, taken, skipped, long_breaks, rest / 60, paused / 60, away / 60]
+                for c, value in enumerate(values):
+                    text = f"{value:.0f}" if isinstance(value, float) else str(value)
+                    widget.setItem(r, c, QTableWidgetItem(text))
+            tabs.addTab(widget, title)
+
+        self.watch_widget(dialog, "休息统计对话框")
+        dialog.exec_()
+        dialog.deleteLater()
+
+    def handle_message(self, message):
+        """执行命令行或其他实例转发来的命令"""
+        if message.get("set"):
+            self.apply_setting_changes(message["set"])
+        for command in message.get("commands", []):
+            if command == "show":
+                self.show_in_top_left()
+            elif command == "pause":
+                if not self.engine.is_paused():
+                    self.toggle_timer()
+            elif command == "resume":
+                if self.engine.is_paused():
+                    self.toggle_timer()
+            elif command == "skip":
+                if not self.engine.is_working:
+                    self.skip_break()
+            elif command == "settings":
+                # 设置对话框是模态的，不在套接字回调里打开
+                QTimer.singleShot(0, self.show_settings)
+            else:
+                print(f"未知命令: {command}")
+
+    def apply_setting_changes(self, changes):
+        """按键值修改设置，类型不符或未知的键被忽略"""
+        new_settings = Settings.from_dict(dict(self.settings.to_dict(), **changes))
+        ignored = [key for key, value in changes.items() if new_settings.to_dict().get(key) != value]
+        if ignored:
+            print(f"忽略无效的设置: {', '.join(ignored)}")
+        if new_settings != self.settings:
+            self.apply_settings(new_settings)
+            self.settings_store.save(new_settings)
+
+    def ensure_diagnostics(self):
+        """按需开启运行时诊断（从开启时刻起追踪内存分配）"""
+        if self.diagnostics is None:
+            from diagnostics import Diagnostics
+
+            self.diagnostics = Diagnostics(self)
+            self.diagnostics.start()
+            self.diagnostics.attach(self.scheduler)
+        return self.diagnostics
+
+    def watch_widget(self, widget, label):
+        """诊断开启时监视应被销毁的控件"""
+        if self.diagnostics is not None:
+            self.diagnostics.watch(widget, label)
+
+    def dump_diagnostics(self):
+        """导出诊断报告（首次导出时才开启诊断）"""
+        path = self.diagnostics_path or os.path.join(os.path.dirname(self.settings_store.path), "diagnostics.json")
+        if self.ensure_diagnostics().dump(path) and hasattr(self, 'tray'):
+            self.tray.showMessage("EyeCare", f"诊断报告已保存到 {path}", QSystemTrayIcon.Information, 3000)
+
+    def ensure_tracer(self):
+        """按需开启性能跟踪：槽函数耗时、定时器迟到，以及主界面和休息窗口可见时的卡顿"""
+        if self.tracer is None:
+            from tracing import Tracer
+
+            self.tracer = Tracer(parent=self)
+            self.scheduler.tracer = self.tracer
+            self.tracer.monitor(self)
+            if self.break_win is not None:
+                self.tracer.monitor(self.break_win)
+        return self.tracer
+
+    def stop_tracer(self):
+        """关闭性能跟踪并丢弃已记录的事件"""
+        if self.tracer is not None:
+            self.tracer.stop()
+            self.tracer.deleteLater()
+            self.tracer = self.scheduler.tracer = None
+
+    def dump_trace(self):
+        """导出性能跟踪（Chrome trace 格式；首次导出时才开启跟踪）"""
+        path = self.trace_path or os.path.join(os.path.dirname(self.settings_store.path), "trace.json")
+        if self.ensure_tracer().dump(path) and hasattr(self, 'tray'):
+            self.tray.showMessage("EyeCare", f"性能跟踪已保存到 {path}", QSystemTrayIcon.Information, 3000)
 
     def check_autostart(self):
         """检查当前是否设置了自启动"""
+        if sys.platform != "win32":
+            self.autostart_enabled = False
+            return
+
         import winreg
         key = winreg.HKEY_CURRENT_USER
         subkey = r"Software\Microsoft\Windows\CurrentVersion\Run"
@@ -763,52 +1009,93 @@ class StretchlyStyleApp(QMainWindow):
             self.autostart_enabled = False
     def save_settings(self, dialog):
         """保存设置"""
-        try:
-            # 获取设置值
-            new_work_time = self.work_spin.value() * 60
-            new_break_time = self.break_spin.value()
-            new_theme = self.theme_combo.currentText() == "深色模式"
-
-            # 应用新设置
-            if self.is_working:
-                self.remaining = new_work_time - (self.work_time - self.remaining)
-            else:
-                self.remaining = new_break_time - (self.break_time - self.remaining)
-
-            self.work_time = new_work_time
-            self.break_time = new_break_time
-
-            # 更新主题
-            if new_theme != self.is_dark:
-                self.is_dark = new_theme
-                self.update_style()
-
-            # 更新UI
-            self.progress.setMaximum(self.work_time if self.is_working else self.break_time)
-            self.progress.setValue(self.remaining)
-            self.time_label.setText(self.format_time(self.remaining))
+        from PyQt5.QtWidgets import QMessageBox
+        from timetable import parse_rules
 
+        try:
+            schedule = dialog.schedule_edit.toPlainText().strip()
+            parse_rules(schedule)  # 规则有误时不保存，提示具体哪一条
+
+            # 保存自启动设置（有变化时才写注册表）
+            if dialog.autostart_cb.isChecked() != self.autostart_enabled:
+                self.set_autostart(dialog.autostart_cb.isChecked())
+
+            # 保存其他设置（有变化时才应用和写文件）
+            new_settings = self.settings.replace(
+                work_time=dialog.work_spin.value() * 60,
+                break_time=dialog.break_spin.value(),
+                is_dark=dialog.theme_combo.currentIndex() == 1,
+                schedule=schedule,
+            )
+            if new_settings != self.settings:
+                self.apply_settings(new_settings)
+                self.settings_store.save(new_settings)
+
+            QMessageBox.information(dialog, "提示", "设置已保存！")
             dialog.accept()
-            QMessageBox.information(self, "提示", "设置已保存！")
 
         except Exception as e:
-            QMessageBox.critical(self, "错误", f"保存设置时出错:\n{str(e)}")
+            QMessageBox.critical(dialog, "错误", f"保存设置时出错:\n{str(e)}")
 
     def closeEvent(self, event):
         """窗口关闭事件 - 增强版"""
-        self.cleanup_break_timer()
-        if hasattr(self, 'main_timer') and self.main_timer:
-            self.main_timer.stop()
+        self.close_break_window()
+        if self.diagnostics_path:
+            self.ensure_diagnostics().dump(self.diagnostics_path)
+        if self.trace_path:
+            self.ensure_tracer().dump(self.trace_path)
+        self.settings_store.flush()
+        self.history.close()
+        self.prefetcher.shutdown()
+        if self.image_pack is not None:
+            self.image_pack.shutdown()
+        if hasattr(self, 'scheduler') and self.scheduler:
+            self.scheduler.stop()
         event.accept()
 
 
+def parse_args(argv):
+    """解析命令行参数（未识别的参数留给 Qt）"""
+    parser = argparse.ArgumentParser(prog="eyecare", description="EyeCare 护眼精灵")
+    parser.add_argument("--startup-report", action="store_true", help="启动完成后输出各阶段耗时")
+    parser.add_argument("--watch-themes", action="store_true", help="主题文件修改后自动重新加载")
+    parser.add_argument("--idle-source", default="auto", choices=["auto", "logind", "x11", "windows", "fake", "none"],
+                        help="空闲/锁屏检测方式")
+    parser.add_argument("--diagnostics", metavar="FILE", help="开启运行时诊断，退出时把报告写入该文件")
+    parser.add_argument("--trace", metavar="FILE", help="开启性能跟踪，退出时写入 Chrome trace 文件")
+    parser.add_argument("--tray-only", action="store_true", help="低占用模式：主界面和休息窗口隐藏后即销毁")
+    parser.add_argument("--daemon", action="store_true", help="以多会话共享调度守护进程运行（见 daemon.py）")
+    parser.add_argument("--client", action="store_true", help="以连接共享守护进程的瘦客户端运行（见 client.py）")
+    instance.add_command_arguments(parser)
+    args, _ = parser.parse_known_args(argv[1:])
+    return args
+
+
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    app.setStyle("Fusion")  # 使用Fusion样式
+    args = parse_args(sys.argv)
+    startup = StartupReport(started_at=_STARTED_AT)
 
-    # 设置高DPI支持
-    app.setAttribute(Qt.AA_EnableHighDpiScaling)
-    app.setAttribute(Qt.AA_UseHighDpiPixmaps)
+    # 设置高DPI支持（必须在创建 QApplication 之前）
+    QApplication.setAttribute(Qt.AA_EnableHighDpiScaling)
+    QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps)
 
-    window = StretchlyStyleApp()
-    sys.exit(app.exec_())
\ No newline at end of file
+    app = QApplication(sys.argv)
+    app.setStyle("Fusion")  # 使用Fusion样式
+    startup.mark("QApplication")
+
+    # 成为第一个实例：之后启动的进程把命令转发到这里
+    message = instance.build_message(args)
+    server = instance.InstanceServer(app)
+    if not server.listen() and server.other_instance:
+        # 几乎同时启动的另一个实例抢先成为第一个实例：等它开始监听后转发给它
+        sys.exit(0 if instance.forward(message, wait_ms=instance.STARTUP_WAIT_MS) else 1)
+
+    window = StretchlyStyleApp(startup=startup, startup_report=args.startup_report,
+                               watch_themes=args.watch_themes, idle_source=args.idle_source,
+                               diagnostics=args.diagnostics, tray_only=args.tray_only, trace=args.trace)
+    server.message_received.connect(window.handle_message)
+    server.status_provider = window.status
+    window.status_changed.connect(server.publish)
+    if message["commands"] or message["set"]:
+        QTimer.singleShot(0, lambda: window.handle_message(message))
+    sys.exit(app.exec_())
@@ -0,0 +1,467 @@
+"""可复用的全屏休息提醒窗口
+
+控件树只构建一次，长短休息共用同一个实例。面板、图标、标题、鼓励语和建议
+这些在一次休息中不变的内容预渲染成一张图片，按 (屏幕尺寸, 设备像素比, 配色,
+内容) 缓存；之后每秒只有倒计时标签重绘，底下的面板直接从图片贴回。
+
+两种合成方式：
+  translucent  半透明窗口，由窗口管理器的合成器把遮罩叠在桌面上
+  opaque       不透明窗口，背景色（可选桌面截图缩小后调暗作底）和面板预先合成为
+               一整张图片，每次绘制只贴这一张；没有合成器或软件渲染的虚拟机上更流畅
+auto 时没有合成器则用 opaque。淡入淡出用动画完成，并记录每帧间隔和绘制耗时。
+可以用图片包（imagepack.py）准备好的屏幕尺寸图片代替纯色背景，背景色只作一层淡色调。
+"""
+import math
+import time
+from collections import namedtuple
+
+from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QLabel, QPushButton
+from PyQt5.QtCore import Qt, QPoint, QRect, QRectF, QSize, QVariantAnimation, QEasingCurve, QAbstractAnimation, pyqtSignal
+from PyQt5.QtGui import QColor, QFont, QGuiApplication, QPainter, QPixmap
+
+from pixcache import PixmapCache, image_bytes
+from textlayout import screen_dpi, text_layouts
+from themes import overlay_colors, overlay_stylesheet
+
+MAX_CHARS_PER_LINE = 12
+
+SCREEN_MARGIN = 40
+PANEL_WIDTH = 820
+PANEL_MIN_HEIGHT = 620
+PANEL_PADDING = 60
+PANEL_RADIUS = 30
+PANEL_COLOR = QColor(255, 255, 255, 235)
+SECTION_SPACING = 20
+ENCOURAGEMENT_WRAP_WIDTH = 700
+TIP_LINE_SPACING = 4
+PANEL_CACHE_BYTES = 24 * 1024 * 1024
+
+OVERLAY_MODES = ("auto", "translucent", "opaque")
+BACKDROP_SCALE = 4  # 桌面截图缩小的倍数（放大回全屏时顺带模糊）
+FRAME_BUDGET_MS = 1000 / 60
+IMAGE_TINT_ALPHA = 72  # 有背景图片时背景色的不透明度
+
+ICON_FONT = QFont("Arial", 110)
+TITLE_FONT = QFont("微软雅黑", 30, QFont.Bold)
+ENCOURAGEMENT_FONT = QFont("微软雅黑", 21)
+COUNTDOWN_FONT = QFont("Arial", 70, QFont.Bold)
+TIP_BULLET_FONT = QFont("Arial", 14)
+TIP_FONT = QFont("微软雅黑", 15)
+BUTTON_FONT = QFont("微软雅黑", 15, QFont.Bold)
+
+# 一次休息的静态内容（tips 为元组，整个元组即内容标识）
+BreakContent = namedtuple("BreakContent", ["title", "encouragement", "icon", "tips"])
+# 面板上排好版的文字
+PanelText = namedtuple("PanelText", ["title", "encouragement", "encouragement_width", "tips", "tip_text_width"])
+# 预渲染的面板图片，以及倒计时、按钮在面板内的位置
+PanelLayer = namedtuple("PanelLayer", ["pixmap", "countdown_rect", "button_rect"])
+# 一次淡入/淡出的帧统计（毫秒）；late_frames 为帧间隔超过 1.5 帧预算的帧数
+FadeStats = namedtuple("FadeStats", ["direction", "frames", "duration_ms", "max_interval_ms",
+                                     "mean_paint_ms", "max_paint_ms", "late_frames"])
+
+
+def compositing_available():
+    """窗口系统是否会合成半透明窗口（无法判断时按有合成器处理）"""
+    platform = QGuiApplication.platformName()
+    if platform in ("offscreen", "minimal", "linuxfb", "eglfs", "vnc"):
+        return False
+    if platform != "xcb":
+        return True  # Wayland、Windows、macOS 总是合成
+    try:
+        from PyQt5.QtX11Extras import QX11Info
+    except ImportError:
+        return True
+    return QX11Info.isCompositingManagerRunning()
+
+
+def resolve_mode(mode):
+    """把设置里的合成方式（可能是 auto）解析为 translucent 或 opaque"""
+    if mode == "auto":
+        return "translucent" if compositing_available() else "opaque"
+    return mode if mode in OVERLAY_MODES else "translucent"
+
+
+def grab_desktop(screen):
+    """截取屏幕；返回 (原图, 缩小后的底图)，截取失败时返回 (None, None)"""
+    snapshot = screen.grabWindow(0) if screen is not None else QPixmap()
+    if snapshot.isNull():
+        return None, None
+    backdrop = snapshot.scaled(snapshot.size() / BACKDROP_SCALE, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+    return snapshot, backdrop
+
+
+def compose_surface(size, dpr, background, layer, panel_pos, backdrop=None, image=None):
+    """把背景（背景图片或调暗的桌面底图）和面板合成为一张不透明图片"""
+    surface = QPixmap(math.ceil(size.width() * dpr), math.ceil(size.height() * dpr))
+    surface.setDevicePixelRatio(dpr)
+    rect = QRect(QPoint(), size)
+    painter = QPainter(surface)
+    if image is not None:
+        painter.drawImage(rect, image)
+    elif backdrop is not None:
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        painter.drawPixmap(rect, backdrop)
+    else:
+        painter.fillRect(rect, Qt.black)
+    painter.fillRect(rect, background)
+    if layer is not None:
+        painter.drawPixmap(panel_pos, layer.pixmap)
+    painter.end()
+    return surface
+
+
+def draw_block(painter, block, x, y, width, align=Qt.AlignHCenter):
+    """逐行绘制排好版的文字，返回绘制后的 y"""
+    for line in block.lines:
+        painter.drawText(QRect(x, y, width, block.line_height), align | Qt.AlignVCenter, line.text)
+        y += block.line_height
+    return y
+
+
+def panel_width(screen_size):
+    return min(PANEL_WIDTH, screen_size.width() - 2 * SCREEN_MARGIN)
+
+
+def layout_panel_text(content, width, dpi):
+    """排版面板上的文字（只用到字体度量和排版缓存，可在后台线程调用）"""
+    inner = width - 2 * PANEL_PADDING
+    title = text_layouts.layout(content.title, TITLE_FONT, inner - 30, dpi)
+    encouragement_width = min(inner - 50, ENCOURAGEMENT_WRAP_WIDTH)
+    encouragement = text_layouts.layout(content.encouragement, ENCOURAGEMENT_FONT, encouragement_width, dpi)
+    # 建议栏宽约 MAX_CHARS_PER_LINE 个汉字
+    tip_text_width = text_layouts.font_metrics(TIP_FONT, dpi).width("中") * MAX_CHARS_PER_LINE + 10
+    tips = [text_layouts.layout(tip, TIP_FONT, tip_text_width, dpi) for tip in content.tips]
+    return PanelText(title, encouragement, encouragement_width, tips, tip_text_width)
+
+
+def render_panel(content, colors, width, dpr, countdown_size, button_size):
+    """把面板及其静态内容绘制成图片，倒计时和按钮处留空"""
+    inner = width - 2 * PANEL_PADDING
+    dpi = screen_dpi()
+    title, encouragement, encouragement_width, tips, tip_text_width = layout_panel_text(content, width, dpi)
+
+    icon_height = text_layouts.font_metrics(ICON_FONT, dpi).height() + 15
+    title_height = title.height + 26
+    encouragement_height = encouragement.height + 20
+    countdown_height = countdown_size.height() + 20
+
+    bullet_metrics = text_layouts.font_metrics(TIP_BULLET_FONT, dpi)
+    bullet_width = max(bullet_metrics.width("→"), bullet_metrics.width("▪"), 10)
+    tips_height = sum(block.height for block in tips) + TIP_LINE_SPACING * max(0, len(tips) - 1) + 10
+
+    button_height = button_size.height() + 15
+
+    sections = [icon_height, title_height, encouragement_height, countdown_height, tips_height, button_height]
+    content_height = sum(sections) + SECTION_SPACING * (len(sections) - 1)
+    height = max(PANEL_MIN_HEIGHT, content_height + 2 * PANEL_PADDING)
+
+    pixmap = QPixmap(math.ceil(width * dpr), math.ceil(height * dpr))
+    pixmap.setDevicePixelRatio(dpr)
+    pixmap.fill(Qt.transparent)
+
+    painter = QPainter(pixmap)
+    painter.setRenderHints(QPainter.Antialiasing | QPainter.TextAntialiasing)
+    painter.setPen(Qt.NoPen)
+    painter.setBrush(PANEL_COLOR)
+    painter.drawRoundedRect(QRect(0, 0, width, height), PANEL_RADIUS, PANEL_RADIUS)
+
+    y = (height - content_height) // 2
+
+    painter.setFont(ICON_FONT)
+    painter.setPen(colors.icon)
+    painter.drawText(QRect(PANEL_PADDING, y, inner, icon_height - 15), Qt.AlignCenter, content.icon)
+    y += icon_height + SECTION_SPACING
+
+    painter.setFont(TITLE_FONT)
+    painter.setPen(colors.title)
+    draw_block(painter, title, PANEL_PADDING + 15, y + 13, inner - 30)
+    y += title_height + SECTION_SPACING
+
+    painter.setFont(ENCOURAGEMENT_FONT)
+    painter.setPen(colors.text)
+    draw_block(painter, encouragement, (width - encouragement_width) // 2, y + 10, encouragement_width)
+    y += encouragement_height + SECTION_SPACING
+
+    countdown_rect = QRect(QPoint((width - countdown_size.width()) // 2, y + 10), countdown_size)
+    y += countdown_height + SECTION_SPACING
+
+    x = (width - bullet_width - 3 - tip_text_width) // 2
+    row_y = y + 5
+    for i, block in enumerate(tips):
+        painter.setFont(TIP_BULLET_FONT)
+        painter.drawText(QRect(x, row_y, bullet_width, block.line_height), Qt.AlignLeft | Qt.AlignVCenter,
+                         "▪" if i > 0 else "→")
+        painter.setFont(TIP_FONT)
+        row_y = draw_block(painter, block, x + bullet_width + 3, row_y, tip_text_width, Qt.AlignLeft)
+        row_y += TIP_LINE_SPACING
+    y += tips_height + SECTION_SPACING
+
+    button_rect = QRect(QPoint((width - button_size.width()) // 2, y + 15), button_size)
+    painter.end()
+    return PanelLayer(pixmap, countdown_rect, button_rect)
+
+
+class OverlayCanvas(QWidget):
+    """绘制背景和预渲染的面板，只重绘被更新的区域
+
+    有 surface（opaque 合成）时只贴这一张图；淡入淡出时先画 base（桌面原图）
+    再按 fade 叠上 surface。
+    """
+
+    painted = pyqtSignal(float)  # 参数：本次绘制耗时（毫秒）
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.background = QColor(0, 0, 0, 0)
+        self.layer = None
+        self.panel_pos = QPoint()
+        self.image = None  # 背景图片（QImage）
+        self.surface = None
+        self.base = None
+        self.fade = 1.0
+
+    def paintEvent(self, event):
+        started = time.perf_counter()
+        painter = QPainter(self)
+        painter.setClipRect(event.rect())
+        if self.surface is None:
+            painter.setCompositionMode(QPainter.CompositionMode_Source)
+            if self.image is not None:
+                # 只取脏区域对应的那一块，倒计时刷新时不重贴整张图
+                rect = event.rect()
+                sx, sy = self.image.width() / max(1, self.width()), self.image.height() / max(1, self.height())
+                painter.drawImage(rect, self.image, QRectF(rect.x() * sx, rect.y() * sy,
+                                                           rect.width() * sx, rect.height() * sy))
+                painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+            painter.fillRect(event.rect(), self.background)
+            painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+            if self.layer is not None:
+                painter.drawPixmap(self.panel_pos, self.layer.pixmap)
+        else:
+            if self.fade < 1.0 and self.base is not None:
+                painter.drawPixmap(self.rect(), self.base)
+                painter.setOpacity(self.fade)
+            painter.drawPixmap(0, 0, self.surface)
+        painter.end()
+        self.painted.emit((time.perf_counter() - started) * 1000)
+
+
+class BreakOverlay(QMainWindow):
+    """全屏休息提醒窗口"""
+
+    skip_requested = pyqtSignal()
+    hidden = pyqtSignal()  # 窗口已隐藏（淡出结束后）
+    shown = pyqtSignal(float)  # 显示后首次绘制完成，参数：从请求显示到首次绘制的毫秒数
+
+    def __init__(self, mode="translucent", backdrop=False, fade_ms=0):
+        super().__init__()
+        self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
+        self.mode = resolve_mode(mode)  # 合成方式在窗口创建时确定，修改后需重建窗口
+        self.backdrop_enabled = backdrop and self.mode == "opaque"
+        self.fade_ms = fade_ms
+        if self.mode == "translucent":
+            self.setAttribute(Qt.WA_TranslucentBackground)
+
+        self.content = None
+        self.colors = None
+        self.panel_cache = PixmapCache(PANEL_CACHE_BYTES)
+        self.current_stylesheet = None
+        self.backdrop = None
+        self.surface_key = None
+        self.show_requested_at = None
+        self.last_time_to_visible = None  # 最近一次从请求显示到首次绘制的毫秒数
+        self.fade_frames = []  # 本次淡入/淡出中每帧的 (时刻, 绘制耗时)
+        self.last_fade = None  # 最近一次淡入/淡出的 FadeStats
+        self.build_ui()
+        self.build_fade()
+
+    def build_ui(self):
+        """构建控件树（只执行一次）"""
+        self.canvas = OverlayCanvas()
+        self.canvas.painted.connect(self.on_canvas_painted)
+        if self.mode == "opaque":
+            self.canvas.setAttribute(Qt.WA_OpaquePaintEvent)
+
+        # 倒计时：每秒只重绘这一小块
+        self.countdown_label = QLabel(self.canvas)
+        self.countdown_label.setObjectName("Countdown")
+        self.countdown_label.setFont(COUNTDOWN_FONT)
+        self.countdown_label.setAlignment(Qt.AlignCenter)
+
+        # 跳过按钮
+        self.skip_btn = QPushButton(self.canvas)
+        self.skip_btn.setObjectName("SkipButton")
+        self.skip_btn.setFont(BUTTON_FONT)
+        self.skip_btn.clicked.connect(self.skip_requested.emit)
+
+        self.setCentralWidget(self.canvas)
+
+    def build_fade(self):
+        """淡入淡出动画：opaque 下逐帧重绘合成图，translucent 下改窗口不透明度"""
+        self.fade_animation = QVariantAnimation(self)
+        self.fade_animation.setStartValue(0.0)
+        self.fade_animation.setEndValue(1.0)
+        self.fade_animation.setDuration(max(1, self.fade_ms))
+        self.fade_animation.setEasingCurve(QEasingCurve.InOutQuad)
+        self.fade_animation.valueChanged.connect(self.set_fade)
+        self.fade_animation.finished.connect(self.on_fade_finished)
+
+    def set_fade(self, value):
+        if self.mode == "opaque":
+            self.canvas.fade = value
+            self.canvas.update()
+        else:
+            self.setWindowOpacity(value)
+            self.fade_frames.append((time.perf_counter(), 0.0))
+
+    def start_fade(self, direction):
+        self.fade_frames = []
+        self.fade_animation.stop()
+        self.fade_animation.setDirection(direction)
+        self.fade_animation.start()
+
+    def on_fade_finished(self):
+        self.last_fade = self.fade_stats()
+        if self.fade_animation.direction() == QAbstractAnimation.Backward:
+            self.hide()
+
+    def can_fade(self):
+        """opaque 下没有桌面截图时无从淡入淡出（没有合成器，窗口不透明度无效）"""
+        return self.fade_ms > 0 and (self.mode == "translucent" or self.canvas.base is not None)
+
+    def fade_stats(self):
+        """统计本次淡入/淡出的帧间隔和绘制耗时"""
+        frames = self.fade_frames
+        intervals = [b[0] - a[0] for a, b in zip(frames, frames[1:])]
+        paints = [paint for _, paint in frames]
+        return FadeStats(
+            direction="out" if self.fade_animation.direction() == QAbstractAnimation.Backward else "in",
+            frames=len(frames),
+            duration_ms=round((frames[-1][0] - frames[0][0]) * 1000, 3) if frames else 0.0,
+            max_interval_ms=round(max(intervals, default=0.0) * 1000, 3),
+            mean_paint_ms=round(sum(paints) / len(paints), 3) if paints else 0.0,
+            max_paint_ms=round(max(paints, default=0.0), 3),
+            late_frames=sum(1 for interval in intervals if interval * 1000 > FRAME_BUDGET_MS * 1.5),
+        )
+
+    def on_canvas_painted(self, paint_ms):
+        if self.show_requested_at is not None:
+            self.last_time_to_visible = (time.perf_counter() - self.show_requested_at) * 1000
+            self.show_requested_at = None
+            self.shown.emit(self.last_time_to_visible)
+        if self.mode == "opaque" and self.fade_animation.state() == QAbstractAnimation.Running:
+            self.fade_frames.append((time.perf_counter(), paint_ms))
+
+    def set_colors(self, bg_color):
+        """按背景色切换预编译的样式表，颜色相同则不重新设置"""
+        self.colors = overlay_colors(bg_color.rgb())
+        stylesheet = overlay_stylesheet(bg_color.rgb())
+        if stylesheet is not self.current_stylesheet:
+            self.setStyleSheet(stylesheet)
+            self.current_stylesheet = stylesheet
+
+    def set_image(self, image):
+        """设置背景图片（None 为纯色背景）；有图片时背景色只作淡色调"""
+        background = QColor(self.colors.background)
+        if image is not None:
+            background.setAlpha(IMAGE_TINT_ALPHA)
+        self.canvas.image = image
+        self.canvas.background = background
+
+    def set_content(self, title, encouragement, icon, tips, bg_color, seconds, image=None):
+        """更新本次休息的全部可变内容（面板在显示时按屏幕取缓存或渲染）"""
+        self.content = BreakContent(title, encouragement, icon, tuple(tips))
+        self.set_colors(bg_color)
+        self.set_image(image)
+        self.set_countdown(seconds)
+        self.skip_btn.setText(f"好的，我已休息 ({seconds}秒后自动继续)")
+        if self.isVisible():
+            self.update_panel()
+
+    def set_countdown(self, seconds):
+        """更新倒计时"""
+        self.countdown_label.setText(f"{seconds}秒")
+
+    def panel_layer(self, screen_size, dpr):
+        """取得当前内容的面板图片（缓存）"""
+        width = panel_width(screen_size)
+        countdown_size = self.countdown_label.sizeHint()
+        button_size = QSize(max(340, self.skip_btn.sizeHint().width()), 58)
+        key = (screen_size.width(), screen_size.height(), dpr, self.colors.background.rgba(), self.content,
+               countdown_size.width(), countdown_size.height(), button_size.width())
+        layer = self.panel_cache.get(key)
+        if layer is None:
+            layer = render_panel(self.content, self.colors, width, dpr, countdown_size, button_size)
+            self.panel_cache.put(key, layer, image_bytes(layer.pixmap))
+        return layer
+
+    def update_panel(self):
+        """按当前屏幕放置面板、倒计时和按钮"""
+        if self.content is None:
+            return
+        size = self.canvas.size()
+        layer = self.panel_layer(size, self.devicePixelRatioF())
+        pixmap_size = layer.pixmap.size() / layer.pixmap.devicePixelRatio()
+        pos = QPoint((size.width() - pixmap_size.width()) // 2, (size.height() - pixmap_size.height()) // 2)
+        self.canvas.layer = layer
+        self.canvas.panel_pos = pos
+        self.countdown_label.setGeometry(layer.countdown_rect.translated(pos))
+        self.skip_btn.setGeometry(layer.button_rect.translated(pos))
+        if self.mode == "opaque":
+            self.update_surface()
+        self.canvas.update()
+
+    def update_surface(self):
+        """重新合成不透明的整屏图片（面板、背景或底图变化时）"""
+        canvas = self.canvas
+        key = (canvas.size(), canvas.layer, canvas.panel_pos, canvas.background.rgba(), id(self.backdrop),
+               id(canvas.image))
+        if key != self.surface_key:
+            canvas.surface = compose_surface(canvas.size(), self.devicePixelRatioF(), canvas.background,
+                                             canvas.layer, canvas.panel_pos, self.backdrop, canvas.image)
+            self.surface_key = key
+
+    def prerender(self):
+        """休息开始前按主屏尺寸渲染好面板（之后显示时直接命中缓存）"""
+        if self.content is None or self.isVisible():
+            return
+        geometry = QApplication.desktop().screenGeometry()
+        self.panel_layer(geometry.size(), self.devicePixelRatioF())
+
+    def show_fullscreen(self, requested_at=None):
+        """覆盖整个屏幕显示，requested_at 为休息触发时刻（perf_counter），用于统计显示耗时"""
+        self.show_requested_at = requested_at if requested_at is not None else time.perf_counter()
+        fading_out = self.fade_animation.state() == QAbstractAnimation.Running
+        self.fade_animation.stop()
+        geometry = QApplication.desktop().screenGeometry()
+        if self.geometry() != geometry:
+            self.setGeometry(geometry)
+            self.canvas.resize(geometry.size())
+        if self.backdrop_enabled and not self.isVisible():
+            # 截图必须在窗口显示之前
+            self.canvas.base, self.backdrop = grab_desktop(QApplication.primaryScreen())
+        self.update_panel()
+        if self.can_fade() and not fading_out and not self.isVisible():
+            self.set_fade(0.0)
+            self.show()
+            self.start_fade(QAbstractAnimation.Forward)
+        else:
+            self.set_fade(1.0)
+            self.show()
+
+    def dismiss(self):
+        """淡出后隐藏（不淡出时直接隐藏）"""
+        if self.can_fade() and self.isVisible():
+            if self.fade_animation.direction() != QAbstractAnimation.Backward or \
+                    self.fade_animation.state() != QAbstractAnimation.Running:
+                self.start_fade(QAbstractAnimation.Backward)
+        else:
+            self.hide()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.fade_animation.stop()
+        # 整屏图片和截图只在显示期间保留
+        self.canvas.surface = self.canvas.base = self.backdrop = None
+        self.surface_key = None
+        self.hidden.emit()
@@ -0,0 +1,50 @@
+"""按内存占用限制大小的 LRU 图像缓存（QPixmap / QImage 通用）"""
+from collections import OrderedDict
+
+
+def image_bytes(image):
+    """估算图像占用的字节数"""
+    return image.width() * image.height() * max(image.depth(), 8) // 8
+
+
+class PixmapCache:
+    """最近最少使用的图像被优先淘汰，总占用不超过 max_bytes"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        """取出缓存项（并标记为最近使用），不存在返回 None"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value, size=None):
+        """放入缓存，必要时淘汰最久未用的项；value 不是图像时需给出 size（字节）"""
+        if key in self.entries:
+            self.total_bytes -= self.entries.pop(key)[1]
+        if size is None:
+            size = image_bytes(value)
+        self.entries[key] = (value, size)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.total_bytes -= evicted
+
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
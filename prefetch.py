@@ -0,0 +1,80 @@
+"""提前准备下一次休息的内容
+
+休息到期前几秒，在后台线程里挑选鼓励语、图标和背景色，算好配色、样式表和面板
+文字的排版，结果经信号交回界面线程；休息开始时类型相符就直接使用，界面线程只
+需显示窗口。预测落空（期间类型变了）时照常同步生成。
+"""
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+# upcoming: engine.Upcoming；content: 可直接传给 BreakOverlay.set_content 的参数；prepare_ms: 后台准备耗时
+Prefetched = namedtuple("Prefetched", ["upcoming", "content", "prepare_ms"])
+
+
+def prepare_break(upcoming, width, dpi):
+    """后台线程：挑选内容并预先计算配色、样式表和排版"""
+    from content import break_content
+    from overlay import BreakContent, layout_panel_text
+    from themes import overlay_colors, overlay_stylesheet
+
+    started_at = time.perf_counter()
+    content = break_content(upcoming.kind)
+    rgb = content["bg_color"].rgb()
+    overlay_colors(rgb)
+    overlay_stylesheet(rgb)
+    layout_panel_text(BreakContent(content["title"], content["encouragement"], content["icon"],
+                                   tuple(content["tips"])), width, dpi)
+    return Prefetched(upcoming, content, (time.perf_counter() - started_at) * 1000)
+
+
+class BreakPrefetcher(QObject):
+    """在单个后台线程中准备下一次休息的内容，同一时刻最多保留一份结果"""
+
+    ready = pyqtSignal(object)  # 参数：Prefetched（在界面线程中发出）
+    finished = pyqtSignal(object)  # 内部使用：后台线程完成，排队交回界面线程
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.executor = None  # 首次使用时创建
+        self.pending = None  # 正在准备的 Upcoming
+        self.result = None
+        self.finished.connect(self.on_finished)
+
+    def request(self, upcoming, width, dpi):
+        """开始准备 upcoming 这次休息（同类型的已准备好或正在准备时不重复）"""
+        if self.pending is not None and self.pending.kind == upcoming.kind:
+            return
+        if self.result is not None and self.result.upcoming.kind == upcoming.kind:
+            return
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="break-prefetch")
+        self.pending = upcoming
+        future = self.executor.submit(prepare_break, upcoming, width, dpi)
+        future.add_done_callback(self.on_done)
+
+    def on_done(self, future):
+        # 在后台线程中调用，跨线程发出的信号由界面线程排队处理
+        try:
+            self.finished.emit(future.result())
+        except Exception as e:
+            print(f"预取休息内容失败: {e}")
+            self.finished.emit(None)
+
+    def on_finished(self, result):
+        self.pending = None
+        self.result = result
+        if result is not None:
+            self.ready.emit(result)
+
+    def take(self, kind):
+        """取出与 kind 相符的预取结果（之后需重新预取），不相符时返回 None"""
+        result, self.result = self.result, None
+        return result if result is not None and result.upcoming.kind == kind else None
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
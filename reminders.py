@@ -0,0 +1,121 @@
+"""主循环之外的周期提醒（不依赖 Qt）
+
+所有提醒按到期时间放在一个堆里，由调度引擎在同一个截止时间上唤醒：增删一个
+提醒是 O(log n)，不会多出定时器。到期时间记在“活动时间”上（时钟减去累计的
+暂停/锁屏时长），冻结和恢复时只改一个偏移量，不用逐个调整。
+"""
+import heapq
+import itertools
+from collections import namedtuple
+
+# interval: 两次提醒的间隔秒数；duration: 提醒休息的秒数（也是合并时的优先级）
+Reminder = namedtuple("Reminder", ["name", "interval", "duration"])
+
+# 可在设置中启用的提醒类型（默认间隔、时长）
+REMINDER_TYPES = {
+    "posture": Reminder("posture", 60 * 60, 60),  # 每小时起身、调整坐姿
+    "hydration": Reminder("hydration", 45 * 60, 30),  # 喝水
+    "micro": Reminder("micro", 10 * 60, 10),  # 微休息：松开鼠标、放松肩膀
+}
+
+
+def parse_reminders(spec):
+    """解析设置里的提醒列表，如 "posture,hydration:30"（冒号后为间隔分钟数）"""
+    reminders = []
+    for item in spec.split(","):
+        name, _, minutes = item.strip().partition(":")
+        if not name:
+            continue
+        base = REMINDER_TYPES.get(name)
+        if base is None:
+            print(f"忽略未知的提醒类型: {name}")
+            continue
+        try:
+            interval = int(float(minutes) * 60) if minutes else base.interval
+        except ValueError:
+            print(f"忽略无效的提醒间隔: {item}")
+            interval = base.interval
+        reminders.append(base._replace(interval=max(60, interval)))
+    return reminders
+
+
+class ReminderQueue:
+    """按到期时间排序的提醒堆（删除为惰性删除）"""
+
+    def __init__(self):
+        self.heap = []  # [活动时间上的到期时刻, 序号, 名称]；名称为 None 表示已删除
+        self.entries = {}  # 名称 -> 堆中条目
+        self.reminders = {}  # 名称 -> Reminder
+        self.counter = itertools.count()
+        self.offset = 0.0  # 活动时间 = 时钟 - offset
+        self.frozen_at = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def get(self, name):
+        return self.reminders.get(name)
+
+    def add(self, reminder, now):
+        """加入（或替换）一个提醒，从 now 起算第一次到期"""
+        self.remove(reminder.name)
+        self.reminders[reminder.name] = reminder
+        self.push(reminder.name, self.active(now) + reminder.interval)
+
+    def push(self, name, due):
+        entry = [due, next(self.counter), name]
+        self.entries[name] = entry
+        heapq.heappush(self.heap, entry)
+
+    def remove(self, name):
+        entry = self.entries.pop(name, None)
+        self.reminders.pop(name, None)
+        if entry is not None:
+            entry[2] = None
+
+    def active(self, now):
+        return (self.frozen_at if self.frozen_at is not None else now) - self.offset
+
+    def next_due(self):
+        """最早的到期时刻（时钟读数）；冻结或没有提醒时返回 None"""
+        while self.heap and self.heap[0][2] is None:
+            heapq.heappop(self.heap)
+        if not self.heap or self.frozen_at is not None:
+            return None
+        return self.heap[0][0] + self.offset
+
+    def peek(self):
+        """最早到期的 (时刻, 名称)；冻结或没有提醒时返回 None"""
+        due = self.next_due()
+        return None if due is None else (due, self.heap[0][2])
+
+    def pop_due(self, until, now):
+        """取出到期时刻不晚于 until 的提醒（按到期先后），并各自从 now 起重新计时"""
+        names = []
+        horizon = until - self.offset
+        while self.heap and (self.heap[0][2] is None or self.heap[0][0] <= horizon):
+            _, _, name = heapq.heappop(self.heap)
+            if name is not None:
+                names.append(name)
+        for name in names:
+            self.push(name, self.active(now) + self.reminders[name].interval)
+        return names
+
+    def satisfy(self, seconds, now):
+        """离开/休息了 seconds 秒：时长不超过它的提醒都视为已完成，重新计时"""
+        for name, reminder in list(self.reminders.items()):
+            if reminder.duration <= seconds:
+                self.add(reminder, now)
+
+    def freeze(self, now):
+        """暂停/锁屏：停止计时"""
+        if self.frozen_at is None:
+            self.frozen_at = now
+
+    def thaw(self, now):
+        if self.frozen_at is not None:
+            self.offset += now - self.frozen_at
+            self.frozen_at = None
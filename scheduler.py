@@ -0,0 +1,78 @@
+"""调度状态机的 Qt 驱动层
+
+只为下一次阶段切换挂一个单次定时器，剩余时间永远由时钟推算，
+不再依赖每秒递减计数，因此不会因负载漂移，也没有空闲唤醒。
+"""
+import math
+
+from PyQt5.QtCore import QObject, QTimer, Qt, pyqtSignal
+
+from tracing import traced
+
+# QTimer 的间隔是 int 毫秒，超长阶段分段挂起
+MAX_TIMER_MS = 2 ** 31 - 1
+TICK_SLACK_MS = 5  # 界面刷新晚于取整边界一点唤醒，保证显示值已经变化
+
+
+def ms_until_change(remaining, unit=1):
+    """剩余时间按 unit 秒向上取整显示时，到显示值下一次变化的毫秒数；已到期返回 None"""
+    if remaining is None or remaining <= 0:
+        return None
+    step = remaining - (math.ceil(remaining / unit) - 1) * unit
+    return min(math.ceil(step * 1000) + TICK_SLACK_MS, MAX_TIMER_MS)
+
+
+class EngineDriver(QObject):
+    """在引擎的截止时间唤醒并推进状态机，引擎事件转为 Qt 信号
+
+    时间只取自单调时钟，修改系统时间（墙上时钟跳变）不影响计时；
+    休眠唤醒后定时器会迟到，由引擎的补偿策略处理。
+    """
+
+    engine_event = pyqtSignal(object)  # 参数：engine.Event
+
+    def __init__(self, engine, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self.engine.on_reschedule = self.rearm
+        self.engine.subscribe(self.engine_event.emit)
+        self.tracer = None  # 开启跟踪时记录唤醒耗时和定时器迟到（见 tracing.py）
+        self.armed_for = None  # 定时器预定唤醒的时刻（引擎时钟）
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.on_timeout)
+
+    def rearm(self):
+        """按引擎下一次需要推进的时刻（阶段截止或最早到期的提醒）重新挂起定时器"""
+        deadline = self.engine.next_wakeup()
+        if deadline is None:
+            self.timer.stop()
+            return
+        ms = min(max(0, math.ceil((deadline - self.engine.clock()) * 1000)), MAX_TIMER_MS)
+        self.armed_for = self.engine.clock() + ms / 1000
+        self.timer.start(ms)
+
+    def stop(self):
+        """停止唤醒（退出时）"""
+        self.engine.on_reschedule = None
+        self.timer.stop()
+
+    def poll(self):
+        """立即检查截止时间（窗口可见时用于尽快发现休眠唤醒）"""
+        self.engine.advance()
+
+    def ms_until_change(self, unit=1):
+        """到剩余时间显示值下一次变化的毫秒数；暂停/锁屏时返回 None"""
+        if self.engine.deadline is None:
+            return None
+        return ms_until_change(self.engine.remaining(), unit)
+
+    @traced
+    def on_timeout(self):
+        if self.tracer is not None:
+            self.tracer.lateness("调度器", self.engine.clock() - self.armed_for)
+        # 提前醒来或超长阶段分段时 advance 不做任何事，继续挂起
+        if not self.engine.advance():
+            self.rearm()
@@ -0,0 +1,205 @@
+"""持久化设置
+
+设置保存在一个小 JSON 文件里：启动时一次读取；写入先写临时文件再改名（原子）；
+短时间内的多次修改合并为一次延迟写入；文件被外部修改（如配置管理工具下发）
+时自动重新加载。
+"""
+import json
+import os
+import sys
+import tempfile
+from dataclasses import asdict, dataclass, fields, replace
+
+from PyQt5.QtCore import QObject, QTimer, QFileSystemWatcher, pyqtSignal
+
+SAVE_DEBOUNCE_MS = 500
+RELOAD_DEBOUNCE_MS = 200
+
+
+def default_settings_path():
+    """设置文件路径，可用环境变量 EYECARE_CONFIG 覆盖"""
+    path = os.environ.get("EYECARE_CONFIG")
+    if path:
+        return path
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "EyeCare", "settings.json")
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    return os.path.join(base, "eyecare", "settings.json")
+
+
+# 数值设置项的下限，低于下限的值视为无效（时长为 0 或负数会让调度出错）
+MINIMUMS = {
+    "work_time": 1,
+    "break_time": 1,
+    "long_break_time": 1,
+    "break_interval": 1,
+    "overlay_fade_ms": 0,
+    "prefetch_seconds": 0,
+}
+
+
+@dataclass(frozen=True)
+class Settings:
+    """用户设置（时间单位均为秒）"""
+
+    work_time: int = 30 * 60
+    break_time: int = 20
+    long_break_time: int = 5 * 60
+    break_interval: int = 4  # 几次短休息后长休息
+    is_dark: bool = False
+    tray_countdown: bool = True  # 托盘图标显示剩余分钟数
+    schedule: str = ""  # 作息规则，见 timetable.py（空为全天提醒）
+    reminders: str = ""  # 主循环之外的提醒，如 "posture,hydration:30"（见 reminders.REMINDER_TYPES）
+    overlay_mode: str = "auto"  # 休息窗口合成方式：auto / translucent / opaque
+    overlay_backdrop: bool = True  # opaque 下用调暗的桌面截图作底
+    overlay_fade_ms: int = 200  # 淡入淡出时长，0 为不淡入淡出
+    image_pack: str = ""  # 休息背景图片目录（见 imagepack.py），空为纯色背景
+    prefetch_seconds: int = 5  # 休息到期前多少秒在后台准备内容，0 为不预取
+    tracing: bool = False  # 记录槽函数耗时、定时器迟到和事件循环卡顿（见 tracing.py）
+
+    @classmethod
+    def from_dict(cls, data):
+        """从字典构建，忽略未知字段、类型不符和超出范围的值"""
+        values = {}
+        for field in fields(cls):
+            value = data.get(field.name)
+            if not isinstance(value, type(field.default)) or (field.type is int and isinstance(value, bool)):
+                continue
+            if value < MINIMUMS.get(field.name, value):
+                continue
+            values[field.name] = value
+        return cls(**values)
+
+    def to_dict(self):
+        return asdict(self)
+
+    def replace(self, **changes):
+        return replace(self, **changes)
+
+    def changed_fields(self, other):
+        """与另一份设置相比取值不同的设置项名称"""
+        return {field.name for field in fields(self) if getattr(self, field.name) != getattr(other, field.name)}
+
+
+class SettingsStore(QObject):
+    """设置文件的读写与监视"""
+
+    changed_externally = pyqtSignal(object)  # 参数：重新加载后的 Settings
+
+    def __init__(self, path=None, parent=None):
+        super().__init__(parent)
+        self.path = path or default_settings_path()
+        self.settings = Settings()
+        self.pending = None
+        self.last_written = None  # 最后一次写入/读取的文件内容，用于忽略自己的写入
+
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(SAVE_DEBOUNCE_MS)
+        self.save_timer.timeout.connect(self.flush)
+
+        self.watcher = None
+        self.reload_timer = None
+        self.file_stat = None  # 设置文件的 (inode, mtime, 大小)，目录变化时据此判断是否与设置文件有关
+
+    def load(self):
+        """读取设置；文件不存在或损坏时使用默认值"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                text = f.read()
+            self.settings = Settings.from_dict(json.loads(text))
+            self.last_written = text
+        except FileNotFoundError:
+            self.settings = Settings()
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"读取设置失败，使用默认设置: {e}")
+            self.settings = Settings()
+        return self.settings
+
+    def save(self, settings):
+        """记录新设置，合并短时间内的多次修改后再写盘"""
+        self.settings = settings
+        self.pending = settings
+        self.save_timer.start()
+
+    def flush(self):
+        """立即把待写入的设置原子地写入文件"""
+        self.save_timer.stop()
+        if self.pending is None:
+            return
+        settings, self.pending = self.pending, None
+        text = json.dumps(settings.to_dict(), ensure_ascii=False, indent=2)
+        if text == self.last_written:
+            return
+
+        directory = os.path.dirname(self.path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".settings-", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(text)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            self.last_written = text
+        except OSError as e:
+            print(f"保存设置失败: {e}")
+
+    def watch(self):
+        """监视设置文件，外部修改后重新加载"""
+        if self.watcher is not None:
+            return
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(RELOAD_DEBOUNCE_MS)
+        self.reload_timer.timeout.connect(self.reload)
+
+        # 原子替换会换掉文件本身，所以同时监视所在目录
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        self.watcher = QFileSystemWatcher([directory], self)
+        if os.path.exists(self.path):
+            self.watcher.addPath(self.path)
+        self.file_stat = self.stat()
+        self.watcher.fileChanged.connect(self.reload_timer.start)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+
+    def stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def on_directory_changed(self):
+        """目录里还有历史库、跟踪文件、图片缓存等；只有设置文件被替换或创建时才重新加载"""
+        stat = self.stat()
+        if stat != self.file_stat:
+            self.file_stat = stat
+            self.reload_timer.start()
+
+    def reload(self):
+        """文件内容与最后一次读写不同时重新加载并通知"""
+        if os.path.exists(self.path) and self.path not in self.watcher.files():
+            self.watcher.addPath(self.path)
+        self.file_stat = self.stat()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                text = f.read()
+        except OSError:
+            return
+        if text == self.last_written:
+            return
+        try:
+            settings = Settings.from_dict(json.loads(text))
+        except (ValueError, AttributeError) as e:
+            print(f"设置文件格式错误，忽略本次修改: {e}")
+            return
+        self.last_written = text
+        self.settings = settings
+        self.changed_externally.emit(settings)
@@ -0,0 +1,37 @@
+"""启动阶段计时与预算报告（--startup-report）"""
+import time
+
+STARTUP_BUDGET_MS = 250  # 托盘图标出现前允许的最长耗时
+
+
+class StartupReport:
+    """记录各启动阶段相对启动时刻的耗时"""
+
+    def __init__(self, started_at=None, budget_ms=STARTUP_BUDGET_MS):
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.budget_ms = budget_ms
+        self.marks = []
+
+    def mark(self, stage):
+        """记录一个阶段完成"""
+        self.marks.append((stage, (time.perf_counter() - self.started_at) * 1000))
+
+    def elapsed(self, stage):
+        """某阶段完成时的累计毫秒数，未记录返回 None"""
+        for name, ms in self.marks:
+            if name == stage:
+                return ms
+        return None
+
+    def format(self, budget_stage):
+        """格式化报告，budget_stage 为需要在预算内完成的阶段"""
+        lines = ["启动耗时报告:"]
+        previous = 0.0
+        for name, ms in self.marks:
+            lines.append(f"  {ms:8.1f} ms  (+{ms - previous:7.1f})  {name}")
+            previous = ms
+        reached = self.elapsed(budget_stage)
+        if reached is not None:
+            verdict = "达标" if reached <= self.budget_ms else "超出预算"
+            lines.append(f"  预算: {budget_stage} ≤ {self.budget_ms} ms，实际 {reached:.1f} ms，{verdict}")
+        return "\n".join(lines)
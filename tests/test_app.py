@@ -0,0 +1,45 @@
+"""主窗口与调度引擎的衔接（offscreen 运行，不显示窗口）"""
+
+import pytest
+
+pytest.importorskip("PyQt5.QtWidgets")
+
+
+@pytest.fixture
+def window(tmp_path, monkeypatch):
+    monkeypatch.setenv("QT_QPA_PLATFORM", "offscreen")
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path))
+    monkeypatch.setenv("APPDATA", str(tmp_path))
+    from PyQt5.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication([])
+    import main
+
+    window = main.StretchlyStyleApp(idle_source="none")
+    yield window
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+
+
+def test_toggle_timer_pauses_and_resumes(window):
+    window.toggle_timer()
+    assert window.engine.is_paused()
+    remaining = window.engine.remaining()
+    window.toggle_timer()
+    assert not window.engine.is_paused()
+    assert window.engine.next_wakeup() is not None
+    assert window.engine.remaining() == pytest.approx(remaining, abs=0.5)
+
+
+
+def test_phase_changes_are_traced(window):
+    from tracing import Tracer
+
+    tracer = window.tracer = Tracer()
+    window.engine.trigger()  # 开始休息
+    window.engine.trigger()  # 回到工作
+    window.tracer = None
+    tracer.stop()
+    names = [name for _, name, *_ in tracer.events]
+    assert names.count("StretchlyStyleApp.on_engine_event") >= 2
@@ -0,0 +1,96 @@
+"""多会话守护进程：请求校验与会话管理（不经过网络，直接调用 handle）"""
+import json
+import socket
+
+import pytest
+
+from daemon import MAX_SESSIONS_PER_UID, Client, SchedulerDaemon, check_message
+from engine import OFF_DUTY, VirtualClock
+
+
+@pytest.fixture
+def daemon():
+    daemon = SchedulerDaemon(path="unused", clock=VirtualClock(1000.0))
+    yield daemon
+    daemon.selector.close()
+
+
+@pytest.fixture
+def connect():
+    socks = []
+
+    def connect(uid):
+        ours, theirs = socket.socketpair()
+        socks.extend((ours, theirs))
+        return Client(ours, uid)
+
+    yield connect
+    for sock in socks:
+        sock.close()
+
+
+def register(daemon, client, session="default", **settings):
+    return daemon.handle(client, check_message({"request": "register", "session": session, "settings": settings}))
+
+
+@pytest.mark.parametrize("message", [
+    [1],
+    {"set": [1]},
+    {"commands": "pause"},
+    {"commands": [None]},
+    {"request": "register", "settings": [1]},
+    {"request": "register", "session": 3},
+])
+def test_check_message_rejects_bad_shapes(message):
+    with pytest.raises(ValueError):
+        check_message(message)
+
+
+def test_check_message_fills_defaults():
+    assert check_message({"request": "status"}) == {"request": "status", "commands": [], "set": {}, "settings": {}}
+
+
+def test_sessions_are_per_uid(daemon, connect):
+    alice, bob = connect(1000), connect(1001)
+    assert register(daemon, alice, "s")["ok"]
+    assert register(daemon, bob, "s")["ok"]
+    assert alice.session is not bob.session
+    daemon.handle(alice, check_message({"commands": ["pause"]}))
+    assert alice.session.engine.is_paused()
+    assert not bob.session.engine.is_paused()
+
+
+def test_session_count_is_capped_per_uid(daemon, connect):
+    client = connect(1000)
+    for i in range(MAX_SESSIONS_PER_UID):
+        assert register(daemon, client, f"s{i}")["ok"]
+    reply = register(daemon, client, "one-too-many")
+    assert reply["ok"] is False
+    assert register(daemon, client, "s0")["ok"]  # 已有的会话仍可接管
+    assert register(daemon, connect(1001), "other")["ok"]
+
+
+def test_re_registering_applies_the_client_settings(daemon, connect):
+    register(daemon, connect(1000), work_time=1800, reminders="")
+    client = connect(1000)
+    register(daemon, client, work_time=600, break_time=40, reminders="micro")
+    engine = client.session.engine
+    assert (engine.work_time, engine.break_time) == (600, 40)
+    assert "micro" in engine.reminders
+    assert len(daemon.sessions) == 1
+
+
+def test_going_off_duty_is_pushed_to_subscribers(daemon):
+    ours, theirs = socket.socketpair()
+    try:
+        client = Client(ours, 1000)
+        register(daemon, client)
+        daemon.handle(client, check_message({"set": {"schedule": "deny daily 00:00-24:00"}}))
+        theirs.setblocking(False)
+        events = [json.loads(line) for line in theirs.recv(65536).splitlines()]
+    finally:
+        ours.close()
+        theirs.close()
+    pushed = next(event for event in events if event["event"] == OFF_DUTY)
+    assert pushed["status"]["off_duty"]
+    assert pushed["status"]["resumes_at"] is not None
@@ -0,0 +1,226 @@
+"""调度引擎：用虚拟时钟推进，不依赖 Qt"""
+import pytest
+
+from engine import AWAY, BREAK_STARTED, BREAK_TAKEN, PAUSE, WORK, WORK_STARTED, ScheduleEngine, VirtualClock
+
+
+def make_engine(**kwargs):
+    clock = VirtualClock()
+    options = dict(work_time=100, break_time=20, long_break_time=300, break_interval=4)
+    options.update(kwargs)
+    engine = ScheduleEngine(clock=clock, **options)
+    events = []
+    engine.subscribe(events.append)
+    return engine, clock, events
+
+
+def run_until_next(engine, clock):
+    """把时钟拨到下一次唤醒并推进"""
+    clock.now = engine.next_wakeup()
+    return engine.advance()
+
+
+def kinds(events, kind):
+    return [event for event in events if event.kind == kind]
+
+
+def test_short_long_rotation():
+    engine, _, _ = make_engine()
+    trace = engine.simulate(days=1)
+    breaks = [event.detail for event in kinds(trace, BREAK_STARTED)][:8]
+    assert breaks == ["short", "short", "short", "long"] * 2
+    durations = {event.detail: event.duration for event in kinds(trace, BREAK_STARTED)}
+    assert durations == {"short": 20, "long": 300}
+
+
+def test_skipped_breaks_still_count_towards_long_break():
+    engine, _, _ = make_engine()
+    trace = engine.simulate(days=1, skip=lambda event: event.detail == "short")
+    assert [event.detail for event in kinds(trace, BREAK_STARTED)][:4] == ["short", "short", "short", "long"]
+    assert all(event.detail == "long" for event in kinds(trace, BREAK_TAKEN))
+
+
+def test_phase_switches_at_deadline():
+    engine, clock, events = make_engine()
+    engine.start()
+    clock.now = 99.5
+    assert not engine.advance()
+    assert engine.remaining_seconds() == 1
+    assert run_until_next(engine, clock)
+    assert not engine.is_working
+    assert engine.break_kind() == "short"
+    assert run_until_next(engine, clock)
+    assert engine.is_working
+    assert [event.kind for event in events] == [WORK_STARTED, WORK, BREAK_STARTED, BREAK_TAKEN, WORK_STARTED]
+
+
+def test_pause_freezes_remaining_time():
+    engine, clock, events = make_engine()
+    engine.start()
+    clock.now = 30
+    engine.pause()
+    assert engine.is_paused()
+    assert engine.next_wakeup() is None
+
+    clock.now = 1000
+    assert not engine.advance()
+    assert engine.remaining() == pytest.approx(70)
+
+    engine.resume()
+    assert not engine.is_paused()
+    assert engine.next_wakeup() == pytest.approx(1070)
+    assert kinds(events, PAUSE)[0].duration == pytest.approx(970)
+    assert run_until_next(engine, clock)
+    assert not engine.is_working
+
+
+def test_pause_and_resume_are_idempotent():
+    engine, clock, _ = make_engine()
+    engine.start()
+    engine.resume()
+    assert engine.next_wakeup() == 100
+    clock.now = 10
+    engine.pause()
+    clock.now = 20
+    engine.pause()
+    engine.resume()
+    engine.resume()
+    assert engine.next_wakeup() == pytest.approx(110)
+
+
+def test_catch_up_after_suspend_counts_as_break():
+    engine, clock, events = make_engine()
+    engine.start()
+    clock.now = 100 + 600  # 截止时间过后 10 分钟才被唤醒：系统休眠过
+    assert engine.advance()
+    assert engine.is_working
+    assert not kinds(events, BREAK_STARTED)
+    assert kinds(events, AWAY)[0].duration == pytest.approx(600)
+    assert engine.break_counter == 0  # 离开超过长休息，重新开始计数
+    assert engine.next_wakeup() == pytest.approx(800)
+
+
+def test_slightly_late_wakeup_still_starts_break():
+    engine, clock, events = make_engine()
+    engine.start()
+    clock.now = 102  # 在 catch_up_grace 之内
+    assert engine.advance()
+    assert not engine.is_working
+    assert not kinds(events, AWAY)
+
+
+def test_short_lock_resumes_where_it_stopped():
+    engine, clock, _ = make_engine()
+    engine.start()
+    clock.now = 40
+    engine.lock()
+    assert engine.is_away()
+    assert engine.next_wakeup() is None
+    clock.now = 50
+    assert engine.unlock() == pytest.approx(10)
+    assert engine.remaining() == pytest.approx(60)
+
+
+def test_long_lock_counts_as_break():
+    engine, clock, events = make_engine()
+    engine.start()
+    engine.break_counter = 2
+    clock.now = 40
+    engine.lock()
+    clock.now = 40 + 400
+    engine.unlock()
+    assert kinds(events, AWAY)[0].duration == pytest.approx(400)
+    assert engine.break_counter == 0
+    assert engine.is_working
+    assert engine.remaining() == pytest.approx(100)
+
+
+def test_lock_before_long_break_must_cover_the_long_break():
+    engine, clock, events = make_engine()
+    engine.start()
+    engine.break_counter = 3  # 下一次是长休息
+    clock.now = 90
+    engine.lock()
+    clock.now = 90 + 21
+    engine.unlock()
+    assert not kinds(events, AWAY)
+    assert engine.remaining() == pytest.approx(10)
+    assert run_until_next(engine, clock)
+    assert engine.break_kind() == "long"
+
+
+def test_short_lock_during_long_break_keeps_the_break():
+    engine, clock, events = make_engine()
+    engine.start()
+    engine.break_counter = 3
+    assert run_until_next(engine, clock)
+    clock.now = 150
+    engine.lock()
+    clock.now = 150 + 21
+    engine.unlock()
+    assert not engine.is_working
+    assert engine.remaining() == pytest.approx(250)
+    assert not kinds(events, AWAY)
+
+
+def test_lock_through_the_rest_of_a_break_records_it_as_taken():
+    engine, clock, events = make_engine()
+    engine.start()
+    engine.break_counter = 3
+    assert run_until_next(engine, clock)
+    clock.now = 150
+    engine.lock()
+    clock.now = 150 + 260
+    engine.unlock()
+    assert engine.is_working
+    taken = kinds(events, BREAK_TAKEN)
+    assert [event.detail for event in taken] == ["long"]
+    assert taken[0].duration == pytest.approx(310)
+    assert engine.remaining() == pytest.approx(100)
+
+
+def test_lock_while_paused_stays_paused():
+    engine, clock, _ = make_engine()
+    engine.start()
+    clock.now = 10
+    engine.pause()
+    engine.lock()
+    clock.now = 1000
+    engine.unlock()
+    assert engine.is_paused()
+    engine.resume()
+    assert engine.remaining() == pytest.approx(90)
+
+
+@pytest.mark.parametrize("idle, counter, expected", [
+    (60, 0, AWAY),  # 短休息到期，空闲已超过短休息
+    (10, 0, BREAK_STARTED),
+    (60, 3, BREAK_STARTED),  # 长休息到期，空闲不够长休息
+    (400, 3, AWAY),
+])
+def test_idle_at_deadline_must_cover_the_due_break(idle, counter, expected):
+    engine, clock, events = make_engine(idle_probe=lambda: idle)
+    engine.start()
+    engine.break_counter = counter
+    assert run_until_next(engine, clock)
+    assert kinds(events, expected)
+    assert engine.is_working == (expected == AWAY)
+
+
+def test_configure_keeps_elapsed_time():
+    engine, clock, _ = make_engine()
+    engine.start()
+    clock.now = 30
+    engine.configure(200, 20, 300, 4)
+    assert engine.remaining() == pytest.approx(170)
+    engine.configure(20, 20, 300, 4)
+    assert engine.remaining() == 0
+    assert engine.advance()
+
+
+def test_simulation_is_independent_of_the_live_engine():
+    engine, clock, events = make_engine()
+    engine.start()
+    engine.simulate(days=7)
+    assert clock.now == 0
+    assert [event.kind for event in events] == [WORK_STARTED]
@@ -0,0 +1,60 @@
+"""单实例控制接口的消息校验"""
+import json
+
+import pytest
+
+pytest.importorskip("PyQt5.QtNetwork")
+
+from instance import InstanceServer, check_command_message  # noqa: E402
+
+
+@pytest.mark.parametrize("message", [
+    {"set": [1]},
+    {"set": "work_time=60"},
+    {"commands": "pause"},
+    {"commands": [1]},
+    {"commands": None},
+])
+def test_check_command_message_rejects_bad_shapes(message):
+    with pytest.raises(ValueError):
+        check_command_message(message)
+
+
+def test_check_command_message_fills_defaults():
+    assert check_command_message({}) == {"commands": [], "set": {}}
+    message = {"commands": ["pause"], "set": {"work_time": 60}}
+    assert check_command_message(dict(message)) == message
+
+
+def test_bad_messages_are_answered_without_reaching_the_app():
+    server = InstanceServer(name="eyecare-test-unused")
+    received = []
+    server.message_received.connect(received.append)
+
+    def reply(line):
+        return json.loads(server.handle_line(None, line.encode("utf-8")))
+
+    assert reply('{"set": [1]}')["ok"] is False
+    assert reply('{"commands": "pause"}')["ok"] is False
+    assert reply("[1]")["ok"] is False
+    assert reply("not json")["ok"] is False
+    assert received == []
+    assert reply('{"commands": ["pause"]}')["ok"] is True
+    assert received == [{"commands": ["pause"], "set": {}}]
+
+
+def test_second_server_does_not_take_over_a_live_name():
+    from PyQt5.QtCore import QCoreApplication
+
+    app = QCoreApplication.instance() or QCoreApplication([])  # noqa: F841
+    name = f"eyecare-test-{id(app)}"
+    first, second = InstanceServer(name=name), InstanceServer(name=name)
+    try:
+        assert first.listen()
+        assert not second.listen()
+        assert second.other_instance
+    finally:
+        first.close()
+    third = InstanceServer(name=name)
+    assert third.listen()
+    third.close()
@@ -0,0 +1,135 @@
+"""提醒解析、到期堆，以及调度引擎中提醒与主循环休息的合并"""
+import pytest
+
+from engine import ABSORBED, BREAK_STARTED, WORK_STARTED, ScheduleEngine, VirtualClock
+from reminders import REMINDER_TYPES, Reminder, ReminderQueue, parse_reminders
+
+
+def test_parse_reminders():
+    reminders = parse_reminders("posture, hydration:30,unknown,micro:x,")
+    assert [reminder.name for reminder in reminders] == ["posture", "hydration", "micro"]
+    assert reminders[0] == REMINDER_TYPES["posture"]
+    assert reminders[1].interval == 30 * 60
+    assert reminders[2].interval == REMINDER_TYPES["micro"].interval  # 无效间隔用默认值
+
+
+def test_parse_reminders_enforces_minimum_interval():
+    assert parse_reminders("micro:0.1")[0].interval == 60
+    assert parse_reminders("") == []
+
+
+def make_queue(now=0.0):
+    queue = ReminderQueue()
+    queue.add(Reminder("a", 100, 10), now)
+    queue.add(Reminder("b", 50, 30), now)
+    return queue
+
+
+def test_next_due_and_peek_follow_the_earliest_reminder():
+    queue = make_queue()
+    assert queue.next_due() == 50
+    assert queue.peek() == (50, "b")
+    queue.remove("b")
+    assert "b" not in queue
+    assert queue.peek() == (100, "a")
+    assert len(queue) == 1
+
+
+def test_pop_due_restarts_popped_reminders():
+    queue = make_queue()
+    assert queue.pop_due(60, 60) == ["b"]
+    assert queue.peek() == (100, "a")
+    assert queue.pop_due(200, 120) == ["a", "b"]
+    assert queue.peek() == (170, "b")
+
+
+def test_re_adding_replaces_the_old_entry():
+    queue = make_queue()
+    queue.add(Reminder("b", 500, 30), 10)
+    assert queue.peek() == (100, "a")
+    assert queue.pop_due(1000, 1000) == ["a", "b"]
+
+
+def test_freeze_shifts_due_times_by_the_frozen_span():
+    queue = make_queue()
+    queue.freeze(20)
+    assert queue.next_due() is None
+    assert queue.peek() is None
+    queue.thaw(80)
+    assert queue.next_due() == 110
+    queue.add(Reminder("c", 10, 5), 80)
+    assert queue.peek() == (90, "c")
+
+
+def test_satisfy_restarts_reminders_no_longer_than_the_absence():
+    queue = make_queue()
+    queue.satisfy(20, 40)
+    assert queue.peek() == (50, "b")  # 30 秒的提醒不算完成
+    queue.remove("b")
+    assert queue.peek() == (140, "a")
+
+
+def make_engine(**kwargs):
+    clock = VirtualClock()
+    options = dict(work_time=100, break_time=20, long_break_time=300, break_interval=4)
+    options.update(kwargs)
+    engine = ScheduleEngine(clock=clock, **options)
+    events = []
+    engine.subscribe(events.append)
+    return engine, clock, events
+
+
+def run_until_next(engine, clock):
+    clock.now = engine.next_wakeup()
+    return engine.advance()
+
+
+def kinds(events, kind):
+    return [event for event in events if event.kind == kind]
+
+
+def test_reminder_interrupts_work_and_work_resumes():
+    engine, clock, events = make_engine(work_time=1000, absorb_window=0)
+    engine.set_reminders([Reminder("micro", 300, 10)])
+    engine.start()
+    assert run_until_next(engine, clock)
+    assert clock.now == 300
+    assert engine.break_kind() == "micro"
+    assert run_until_next(engine, clock)
+    assert engine.is_working
+    assert engine.remaining() == pytest.approx(700)  # 工作剩余时间保留
+    assert events[-1] == (310, WORK_STARTED, pytest.approx(700), None)
+
+
+def test_reminder_due_near_main_break_is_absorbed():
+    engine, _, _ = make_engine(work_time=1000, break_time=60)
+    engine.set_reminders([Reminder("micro", 950, 10)])
+    trace = engine.simulate(days=0.05)
+    first = kinds(trace, BREAK_STARTED)[0]
+    assert first.detail == "short"
+    assert first.time == 950
+
+
+def test_reminder_absorbed_during_a_break_rearms_the_driver():
+    engine, clock, events = make_engine(break_time=200)
+    engine.set_reminders(parse_reminders("micro:4"))
+    rearms = []
+    engine.on_reschedule = lambda: rearms.append(engine.next_wakeup())
+    engine.start()
+    while not kinds(events, BREAK_STARTED):
+        run_until_next(engine, clock)
+    assert engine.break_kind() == "short"
+    break_ends = engine.deadline
+
+    # 休息中提醒到期并被吸收：驱动层只在 advance 返回 False 时自行重新挂起，引擎须通知它
+    rearms.clear()
+    clock.now = engine.next_wakeup()
+    assert clock.now < break_ends
+    assert engine.advance()
+    assert events[-1].kind == ABSORBED
+    assert rearms and rearms[-1] == engine.next_wakeup()
+    assert engine.next_wakeup() <= break_ends
+
+    while clock.now < break_ends:
+        run_until_next(engine, clock)
+    assert engine.is_working
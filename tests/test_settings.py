@@ -0,0 +1,26 @@
+"""设置的解析与校验"""
+from settings import Settings
+
+
+def test_from_dict_ignores_unknown_keys_and_wrong_types():
+    settings = Settings.from_dict({"work_time": "1500", "is_dark": 1, "break_interval": True, "bogus": 3,
+                                   "break_time": 30})
+    assert settings == Settings(break_time=30)
+
+
+def test_from_dict_skips_values_below_the_minimum():
+    settings = Settings.from_dict({"break_interval": 0, "work_time": -100, "long_break_time": 0,
+                                   "prefetch_seconds": -1, "overlay_fade_ms": 0, "break_time": 1})
+    defaults = Settings()
+    assert settings.break_interval == defaults.break_interval
+    assert settings.work_time == defaults.work_time
+    assert settings.long_break_time == defaults.long_break_time
+    assert settings.prefetch_seconds == defaults.prefetch_seconds
+    assert settings.overlay_fade_ms == 0
+    assert settings.break_time == 1
+
+
+def test_round_trip_and_changed_fields():
+    settings = Settings(work_time=600, schedule="allow daily 09:00-18:00")
+    assert Settings.from_dict(settings.to_dict()) == settings
+    assert settings.changed_fields(settings.replace(work_time=900, is_dark=True)) == {"work_time", "is_dark"}
@@ -0,0 +1,98 @@
+"""作息规则解析与允许区间查询"""
+import datetime
+
+import pytest
+
+from timetable import DAY_SECONDS, Timetable, load_timetable, local_time, parse_rules, parse_time_range, parse_weekdays
+
+MONDAY = datetime.date(2026, 10, 12)
+SATURDAY = datetime.date(2026, 10, 17)
+
+
+def at(day, hours, minutes=0):
+    return local_time(day, hours * 3600 + minutes * 60)
+
+
+def test_parse_weekdays():
+    assert parse_weekdays("mon-fri") == {0, 1, 2, 3, 4}
+    assert parse_weekdays("sat-mon,wed") == {5, 6, 0, 2}
+    with pytest.raises(ValueError):
+        parse_weekdays("monday")
+
+
+def test_parse_time_range():
+    assert parse_time_range("09:00-18:00") == (9 * 3600, 18 * 3600)
+    assert parse_time_range("22:00-07:00") == (22 * 3600, DAY_SECONDS + 7 * 3600)
+    assert parse_time_range("00:00-24:00") == (0, DAY_SECONDS)
+    for text in ("9-18", "25:00-26:00", "10:60-11:00", "10:00-24:30"):
+        with pytest.raises(ValueError):
+            parse_time_range(text)
+
+
+def test_parse_rules_reports_the_rule_number():
+    rules = parse_rules("allow mon-fri 09:00-18:00 # 上班\n\ndeny 2026-10-01..2026-10-07; deny daily 12:00-13:00")
+    assert [rule.allow for rule in rules] == [True, False, False]
+    assert rules[1].dates == (datetime.date(2026, 10, 1), datetime.date(2026, 10, 7))
+    with pytest.raises(ValueError, match="第 2 条"):
+        parse_rules("allow daily\nblock mon")
+
+
+def test_no_rules_means_no_timetable():
+    assert Timetable.parse("  # 只有注释") is None
+    assert load_timetable("bogus") is None
+
+
+def test_workday_with_lunch_break():
+    table = Timetable.parse("allow mon-fri 09:00-18:00\ndeny mon-fri 12:00-13:00")
+    assert not table.allowed(at(MONDAY, 8, 59))
+    assert table.allowed(at(MONDAY, 9))
+    assert not table.allowed(at(MONDAY, 12, 30))
+    assert table.allowed_until(at(MONDAY, 10)) == at(MONDAY, 12)
+    assert table.next_allowed(at(MONDAY, 12, 30)) == at(MONDAY, 13)
+    assert table.next_allowed(at(MONDAY, 18)) == at(MONDAY + datetime.timedelta(days=1), 9)
+    # 周末整天不允许，下一次是周一早上
+    assert not table.allowed(at(SATURDAY, 10))
+    assert table.next_allowed(at(SATURDAY, 10)) == at(SATURDAY + datetime.timedelta(days=2), 9)
+
+
+def test_deny_only_rules_allow_everything_else():
+    table = Timetable.parse("deny daily 22:00-07:00")
+    assert table.allowed(at(MONDAY, 12))
+    assert not table.allowed(at(MONDAY, 23))
+    assert not table.allowed(at(MONDAY, 3))
+    assert table.next_allowed(at(MONDAY, 23)) == at(MONDAY + datetime.timedelta(days=1), 7)
+
+
+def test_dated_rules_override_weekday_rules():
+    table = Timetable.parse("allow mon-fri 09:00-18:00\nallow 2026-10-17 10:00-16:00\ndeny 2026-10-13")
+    assert table.allowed(at(SATURDAY, 11))  # 调休
+    assert not table.allowed(at(SATURDAY, 9, 30))
+    assert not table.allowed(at(MONDAY + datetime.timedelta(days=1), 10))  # 假期
+
+
+def test_lookups_beyond_the_compiled_horizon_recompile():
+    table = Timetable(parse_rules("allow daily 09:00-10:00"), horizon_days=3)
+    far = MONDAY + datetime.timedelta(days=30)
+    assert table.allowed(at(far, 9, 30))
+    assert table.next_allowed(at(far, 11)) == at(far + datetime.timedelta(days=1), 9)
+
+
+def test_engine_goes_off_duty_outside_the_timetable():
+    from engine import OFF_DUTY, ScheduleEngine, VirtualClock
+
+    clock = VirtualClock()
+    start = at(MONDAY, 17, 50)
+    engine = ScheduleEngine(work_time=30 * 60, clock=clock, wall_clock=lambda: start + clock())
+    engine.set_timetable(Timetable.parse("allow mon-fri 09:00-18:00"))
+    events = []
+    engine.subscribe(events.append)
+    engine.start()
+    assert not engine.is_off_duty()
+    assert engine.next_wakeup() == pytest.approx(600)  # 18:00 时段结束
+
+    clock.now = engine.next_wakeup()
+    engine.advance()
+    assert engine.is_off_duty()
+    assert events[-1].kind == OFF_DUTY
+    assert engine.next_wakeup() == pytest.approx(at(MONDAY + datetime.timedelta(days=1), 9) - start)
+    assert engine.upcoming_break() is None
@@ -0,0 +1,97 @@
+"""文字排版缓存
+
+用 QTextLayout 按 Unicode 断行规则换行：中日韩文字可在字间断开，拉丁文字只在
+词边界断开（单词比行还长时才硬断），emoji 等代理对字符不会被拆开。结果按
+(文字, 字体, 行宽, DPI) 缓存，同样的建议和鼓励语每次休息不再重新测量。
+缓存带锁，可在后台线程中预先排版（见 prefetch.py）。
+"""
+import threading
+from collections import OrderedDict, namedtuple
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QFontMetrics, QTextLayout, QTextOption
+
+LAYOUT_CACHE_SIZE = 1024
+
+TextLine = namedtuple("TextLine", ["text", "width"])
+# lines: TextLine 元组；width: 最宽一行；height: 总高度；line_height: 行距
+TextBlock = namedtuple("TextBlock", ["lines", "width", "height", "line_height"])
+
+
+def screen_dpi():
+    """主屏逻辑 DPI（字体测量所用的分辨率）"""
+    screen = QApplication.primaryScreen()
+    return screen.logicalDotsPerInchY() if screen is not None else 96.0
+
+
+def break_lines(text, font, width):
+    """把一段文字按行宽断行，返回 TextLine 列表"""
+    # QTextLayout 的位置以 UTF-16 码元计，按码元切片才能正确处理 emoji
+    utf16 = text.encode("utf-16-le")
+    option = QTextOption()
+    option.setWrapMode(QTextOption.WrapAtWordBoundaryOrAnywhere)
+    layout = QTextLayout(text, font)
+    layout.setTextOption(option)
+
+    lines = []
+    layout.beginLayout()
+    while True:
+        line = layout.createLine()
+        if not line.isValid():
+            break
+        line.setLineWidth(width)
+        start, length = line.textStart(), line.textLength()
+        segment = utf16[start * 2:(start + length) * 2].decode("utf-16-le").rstrip()
+        lines.append(TextLine(segment, line.naturalTextWidth()))
+    layout.endLayout()
+    return lines or [TextLine("", 0.0)]
+
+
+class TextLayoutCache:
+    """排版结果与字体度量的 LRU 缓存（线程安全）"""
+
+    def __init__(self, max_entries=LAYOUT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.blocks = OrderedDict()
+        self.metrics = {}
+        self.lock = threading.RLock()
+
+    def font_metrics(self, font, dpi=None):
+        """取得字体度量（缓存）"""
+        key = (font.key(), dpi or screen_dpi())
+        with self.lock:
+            metrics = self.metrics.get(key)
+            if metrics is None:
+                metrics = self.metrics[key] = QFontMetrics(font)
+            return metrics
+
+    def layout(self, text, font, width, dpi=None):
+        """排版一段文字（换行符处强制换行），返回 TextBlock"""
+        dpi = dpi or screen_dpi()
+        key = (text, font.key(), width, dpi)
+        with self.lock:
+            block = self.blocks.get(key)
+            if block is not None:
+                self.blocks.move_to_end(key)
+                return block
+
+        lines = []
+        for paragraph in text.split("\n"):
+            lines.extend(break_lines(paragraph, font, width))
+        line_height = self.font_metrics(font, dpi).lineSpacing()
+        block = TextBlock(tuple(lines), max(line.width for line in lines), line_height * len(lines), line_height)
+
+        with self.lock:
+            self.blocks[key] = block
+            if len(self.blocks) > self.max_entries:
+                self.blocks.popitem(last=False)
+        return block
+
+    def clear(self):
+        with self.lock:
+            self.blocks.clear()
+            self.metrics.clear()
+
+
+# 全局共享的排版缓存
+text_layouts = TextLayoutCache()
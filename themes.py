@@ -0,0 +1,220 @@
+"""主题引擎：主题定义在 themes/*.json，按 (主题, 强调色) 编译一次并缓存
+
+切换主题只应用预编译好的样式表和调色板；可选的文件监视在主题文件
+修改后（去抖）重新编译并只通知使用该主题的窗口。
+"""
+import json
+import os
+import sys
+from collections import namedtuple
+from functools import lru_cache
+
+from PyQt5.QtCore import QObject, QTimer, QFileSystemWatcher, pyqtSignal
+from PyQt5.QtGui import QColor, QPalette
+
+THEME_DIR = os.path.join(getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__))), "themes")
+RELOAD_DEBOUNCE_MS = 300
+
+# 主题文件缺失时（如打包遗漏）使用的内置主题
+BUILTIN_THEMES = {
+    "light": {"label": "浅色模式", "window": "#f0f0f0", "text": "#464646", "accent": "#4682b4"},
+    "dark": {"label": "深色模式", "window": "#282c34", "text": "#dcdcdc", "accent": "#6495ed"},
+}
+
+MAIN_STYLESHEET = """
+    #MainWidget {{
+        background-color: {window};
+        border-radius: 15px;
+        border: 1px solid {border};
+    }}
+    QProgressBar {{
+        border: 1px solid {frame};
+        border-radius: 4px;
+    }}
+    QProgressBar::chunk {{
+        background-color: {accent};
+        border-radius: 4px;
+    }}
+    QPushButton {{
+        border: 1px solid {frame};
+        border-radius: 5px;
+        padding: 5px;
+        min-width: 80px;
+    }}
+    QPushButton:hover {{
+        background-color: {hover};
+    }}
+"""
+
+OVERLAY_TEXT_COLOR = "#333333"  # 保持深色文字确保可读性
+
+# 休息窗口的面板、图标、标题、鼓励语和建议预渲染为图片（见 overlay.py），
+# 样式表只用于每秒变化的倒计时和可交互的按钮
+OVERLAY_STYLESHEET = """
+    #Countdown {{
+        color: {title};
+        background-color: rgba(255, 255, 255, 0.7);
+        border-radius: 15px;
+        padding: 12px 35px;
+        min-width: 180px;
+    }}
+    #SkipButton {{
+        background-color: {icon};
+        color: white;
+        border-radius: 8px;
+        padding: 8px 16px;
+    }}
+    #SkipButton:hover {{
+        background-color: {hover};
+    }}
+"""
+
+OverlayColors = namedtuple("OverlayColors", ["background", "icon", "title", "hover", "text"])
+
+CompiledTheme = namedtuple("CompiledTheme", ["key", "stylesheet", "palette"])
+
+
+def compile_theme(key, spec, accent=None):
+    """把主题定义编译为样式表和调色板"""
+    window = QColor(spec["window"])
+    text = QColor(spec["text"])
+    accent_color = QColor(accent or spec["accent"])
+
+    palette = QPalette()
+    palette.setColor(QPalette.Window, window)
+    palette.setColor(QPalette.WindowText, text)
+    palette.setColor(QPalette.Button, window.lighter(110))
+    palette.setColor(QPalette.ButtonText, text)
+    palette.setColor(QPalette.Highlight, accent_color)
+
+    stylesheet = MAIN_STYLESHEET.format(
+        window=window.name(),
+        border=window.darker(120).name(),
+        frame=window.darker(130).name(),
+        accent=accent_color.name(),
+        hover=window.lighter(110).name(),
+    )
+    return CompiledTheme(key, stylesheet, palette)
+
+
+@lru_cache(maxsize=32)
+def overlay_colors(rgb):
+    """休息窗口配色，按背景色（QColor.rgb()）计算并缓存"""
+    bg_color = QColor(rgb)
+    background = QColor(bg_color)
+    background.setAlpha(224)
+    return OverlayColors(
+        background=background,
+        icon=bg_color.darker(150),
+        title=bg_color.darker(200),
+        hover=bg_color.darker(180),
+        text=QColor(OVERLAY_TEXT_COLOR),
+    )
+
+
+@lru_cache(maxsize=32)
+def overlay_stylesheet(rgb):
+    """休息窗口样式表，按背景色编译并缓存"""
+    colors = overlay_colors(rgb)
+    return OVERLAY_STYLESHEET.format(
+        icon=colors.icon.name(),
+        title=colors.title.name(),
+        hover=colors.hover.name(),
+    )
+
+
+class ThemeEngine(QObject):
+    """加载、编译并缓存主题"""
+
+    theme_reloaded = pyqtSignal(str)  # 参数：被重新加载的主题名
+
+    def __init__(self, parent=None, theme_dir=THEME_DIR):
+        super().__init__(parent)
+        self.theme_dir = theme_dir
+        self.specs = {}
+        self.compiled = {}
+        self.watcher = None
+        self.pending_reloads = set()
+        self.reload_timer = None
+
+    def theme_path(self, name):
+        return os.path.join(self.theme_dir, f"{name}.json")
+
+    def load_spec(self, name):
+        """读取主题定义，文件不可用时回退到内置主题"""
+        try:
+            with open(self.theme_path(name), encoding="utf-8") as f:
+                spec = dict(BUILTIN_THEMES.get(name, {}), **json.load(f))
+        except (OSError, ValueError) as e:
+            # 文件缺失或正在编辑到一半时，保留上一次的定义
+            spec = self.specs.get(name) or BUILTIN_THEMES.get(name)
+            if spec is None:
+                raise KeyError(f"未知主题: {name}") from e
+        self.specs[name] = spec
+        return spec
+
+    def get(self, name, accent=None):
+        """取得编译好的主题（缓存）"""
+        key = (name, accent)
+        compiled = self.compiled.get(key)
+        if compiled is None:
+            spec = self.specs.get(name) or self.load_spec(name)
+            compiled = compile_theme(key, spec, accent)
+            self.compiled[key] = compiled
+        return compiled
+
+    def apply(self, widget, name, accent=None):
+        """把主题应用到窗口；与当前已应用的主题相同时不做任何事"""
+        compiled = self.get(name, accent)
+        if getattr(widget, "applied_theme", None) is compiled:
+            return False
+        widget.setPalette(compiled.palette)
+        widget.setStyleSheet(compiled.stylesheet)
+        widget.applied_theme = compiled
+        return True
+
+    def enable_hot_reload(self):
+        """监视主题目录，文件修改后去抖重新加载"""
+        if self.watcher is not None:
+            return
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(RELOAD_DEBOUNCE_MS)
+        self.reload_timer.timeout.connect(self.flush_reloads)
+
+        self.watcher = QFileSystemWatcher(self)
+        if os.path.isdir(self.theme_dir):
+            self.watcher.addPath(self.theme_dir)
+            files = [os.path.join(self.theme_dir, f) for f in os.listdir(self.theme_dir) if f.endswith(".json")]
+            if files:
+                self.watcher.addPaths(files)
+        self.watcher.fileChanged.connect(self.on_file_changed)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+
+    def on_file_changed(self, path):
+        # 编辑器常用"写临时文件再改名"保存，需要重新加入监视
+        if os.path.exists(path) and path not in self.watcher.files():
+            self.watcher.addPath(path)
+        self.pending_reloads.add(os.path.splitext(os.path.basename(path))[0])
+        self.reload_timer.start()
+
+    def on_directory_changed(self, path):
+        for f in os.listdir(path):
+            full = os.path.join(path, f)
+            if f.endswith(".json") and full not in self.watcher.files():
+                self.on_file_changed(full)
+
+    def flush_reloads(self):
+        """重新编译有变化的主题并通知"""
+        names, self.pending_reloads = self.pending_reloads, set()
+        for name in names:
+            try:
+                self.load_spec(name)
+            except KeyError:
+                continue
+            except Exception as e:
+                print(f"主题重新加载失败 {name}: {e}")
+                continue
+            for key in [k for k in self.compiled if k[0] == name]:
+                del self.compiled[key]
+            self.theme_reloaded.emit(name)
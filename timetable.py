@@ -0,0 +1,192 @@
+"""作息规则：什么时候允许提醒休息（不依赖 Qt）
+
+规则每行一条（也可用分号分隔），# 之后为注释：
+
+    allow mon-fri 09:00-18:00       工作日上班时间
+    deny mon-fri 12:00-13:00        午休
+    deny 2026-10-01..2026-10-07     假期（整天）
+    allow 2026-10-10 10:00-16:00    调休
+    deny daily 22:00-07:00          结束早于开始表示跨过午夜
+
+日期部分可以是星期（mon..sun，可用 - 表示范围、逗号分隔）、daily、单个日期或
+日期范围，省略为每天；时间部分省略为全天。只要有一条 allow，未被 allow 覆盖的
+时间都不允许；没有 allow 时默认全天允许。指定日期的规则优先于按星期的规则，同类
+规则中后写的优先。
+
+规则按天展开为一张有序的允许区间表（墙上时间），“现在是否允许”和“下一次允许
+的时刻”都是二分查找；超出已展开的范围时再向后展开。
+"""
+import bisect
+import datetime
+import re
+from collections import namedtuple
+
+HORIZON_DAYS = 60  # 一次展开的天数
+DAY_SECONDS = 24 * 3600
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+# weekdays: 星期集合（0 为周一）或 None；dates: (首日, 末日) 或 None；start/end: 当天的秒数，end 可超过一天
+Rule = namedtuple("Rule", ["allow", "weekdays", "dates", "start", "end"])
+# 展开后的一段规则：绝对时间 [start, end)，priority 越大越优先
+Span = namedtuple("Span", ["start", "end", "allow", "priority"])
+
+TIME_RANGE = re.compile(r"^(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})$")
+DATE_RANGE = re.compile(r"^(\d{4}-\d{2}-\d{2})(?:\.\.(\d{4}-\d{2}-\d{2}))?$")
+
+
+def parse_weekdays(text):
+    """mon-fri,sun -> {0, 1, 2, 3, 4, 6}"""
+    days = set()
+    for part in text.split(","):
+        first, sep, last = part.partition("-")
+        if first not in WEEKDAYS or (sep and last not in WEEKDAYS):
+            raise ValueError(f"无效的星期: {part}")
+        i, j = WEEKDAYS.index(first), WEEKDAYS.index(last if sep else first)
+        days.update(range(i, j + 1) if i <= j else list(range(i, 7)) + list(range(0, j + 1)))
+    return frozenset(days)
+
+
+def parse_time_range(text):
+    """09:00-18:00 -> (32400, 64800)；结束早于开始时跨过午夜"""
+    match = TIME_RANGE.match(text)
+    if match is None:
+        raise ValueError(f"无效的时间范围: {text}")
+    h1, m1, h2, m2 = (int(group) for group in match.groups())
+    if h1 > 23 or h2 > 24 or m1 > 59 or m2 > 59 or (h2 == 24 and m2):
+        raise ValueError(f"无效的时间范围: {text}")
+    start, end = h1 * 3600 + m1 * 60, h2 * 3600 + m2 * 60
+    if end <= start:
+        end += DAY_SECONDS
+    return start, end
+
+
+def parse_rule(line):
+    """解析一条规则"""
+    words = line.split()
+    if not words or words[0] not in ("allow", "deny"):
+        raise ValueError(f"规则须以 allow 或 deny 开头: {line}")
+    weekdays = dates = None
+    start, end = 0, DAY_SECONDS
+    for word in words[1:]:
+        match = DATE_RANGE.match(word)
+        if match:
+            first = datetime.date.fromisoformat(match.group(1))
+            last = datetime.date.fromisoformat(match.group(2) or match.group(1))
+            dates = (first, last)
+        elif TIME_RANGE.match(word):
+            start, end = parse_time_range(word)
+        elif word != "daily":
+            weekdays = parse_weekdays(word)
+    return Rule(words[0] == "allow", weekdays, dates, start, end)
+
+
+def parse_rules(text):
+    """解析多条规则，出错时抛出 ValueError（带行号）"""
+    rules = []
+    for number, line in enumerate(re.split(r"[\n;]", text), 1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        try:
+            rules.append(parse_rule(line))
+        except ValueError as e:
+            raise ValueError(f"第 {number} 条规则: {e}") from None
+    return rules
+
+
+def local_time(day, seconds):
+    """某天零点之后 seconds 秒的本地时间戳（正确处理夏令时）"""
+    return (datetime.datetime.combine(day, datetime.time()) + datetime.timedelta(seconds=seconds)).timestamp()
+
+
+class Timetable:
+    """编译后的允许区间表"""
+
+    def __init__(self, rules, horizon_days=HORIZON_DAYS):
+        self.rules = rules
+        self.horizon_days = horizon_days
+        self.default_allow = not any(rule.allow for rule in rules)
+        self.starts = []
+        self.ends = []
+        self.origin = self.horizon = None  # 已展开范围 [origin, horizon)
+
+    @classmethod
+    def parse(cls, text):
+        """由规则文本构建；没有规则时返回 None（不限制）"""
+        rules = parse_rules(text or "")
+        return cls(rules) if rules else None
+
+    def matches(self, rule, day):
+        if rule.dates is not None and not rule.dates[0] <= day <= rule.dates[1]:
+            return False
+        return rule.weekdays is None or day.weekday() in rule.weekdays
+
+    def day_spans(self, day):
+        """与某天相交的规则（含前一天跨过午夜的部分），裁剪到当天"""
+        day_start, day_end = local_time(day, 0), local_time(day, DAY_SECONDS)
+        spans = []
+        for index, rule in enumerate(self.rules):
+            priority = (rule.dates is not None, index)
+            for origin in (day - datetime.timedelta(days=1), day):
+                if not self.matches(rule, origin):
+                    continue
+                start = max(day_start, local_time(origin, rule.start))
+                end = min(day_end, local_time(origin, rule.end))
+                if start < end:
+                    spans.append(Span(start, end, rule.allow, priority))
+        return day_start, day_end, spans
+
+    def compile(self, first_day):
+        """从 first_day 起展开 horizon_days 天"""
+        starts, ends = [], []
+        for offset in range(self.horizon_days):
+            day_start, day_end, spans = self.day_spans(first_day + datetime.timedelta(days=offset))
+            points = sorted({day_start, day_end, *(s.start for s in spans), *(s.end for s in spans)})
+            for a, b in zip(points, points[1:]):
+                covering = [s for s in spans if s.start <= a and b <= s.end]
+                allow = max(covering, key=lambda s: s.priority).allow if covering else self.default_allow
+                if not allow:
+                    continue
+                if ends and ends[-1] == a:
+                    ends[-1] = b
+                else:
+                    starts.append(a)
+                    ends.append(b)
+        self.starts, self.ends = starts, ends
+        self.origin = local_time(first_day, 0)
+        self.horizon = local_time(first_day + datetime.timedelta(days=self.horizon_days), 0)
+
+    def ensure(self, t):
+        """保证 t 在已展开的范围内（前留一天）"""
+        if self.origin is None or not self.origin <= t < self.horizon:
+            self.compile(datetime.date.fromtimestamp(t) - datetime.timedelta(days=1))
+
+    def allowed(self, t):
+        """时刻 t（Unix 时间）是否允许提醒"""
+        self.ensure(t)
+        i = bisect.bisect_right(self.starts, t) - 1
+        return i >= 0 and t < self.ends[i]
+
+    def next_allowed(self, t):
+        """t 之后（含）第一个允许的时刻；展开范围内没有时返回范围末尾，届时再查"""
+        self.ensure(t)
+        i = bisect.bisect_right(self.starts, t) - 1
+        if i >= 0 and t < self.ends[i]:
+            return t
+        return self.starts[i + 1] if i + 1 < len(self.starts) else self.horizon
+
+    def allowed_until(self, t):
+        """t 所在允许区间的结束时刻（区间延续到展开范围末尾时返回末尾，届时再查）"""
+        self.ensure(t)
+        i = bisect.bisect_right(self.starts, t) - 1
+        return self.ends[i] if i >= 0 and t < self.ends[i] else t
+
+
+def load_timetable(text):
+    """由设置里的规则文本构建作息表；规则无效时打印错误并不做限制"""
+    try:
+        return Timetable.parse(text)
+    except ValueError as e:
+        print(f"作息规则无效，已忽略: {e}")
+        return None
@@ -0,0 +1,139 @@
+"""事件循环延迟与槽函数耗时跟踪
+
+开启后记录三类事件：
+  - 关键槽函数（用 @traced 标记：界面刷新、休息倒计时、切换模式、显示休息窗口、
+    切换主题、调度器唤醒）每次执行的耗时
+  - 定时器实际触发比预定时刻晚了多少（调度器的阶段定时器和各刷新定时器）
+  - 事件循环卡顿：被监视的窗口可见时用心跳定时器检测，心跳迟到超过阈值记为一次卡顿；
+    窗口都隐藏时心跳停止，不增加空闲唤醒
+事件放在固定容量的环形缓冲里，导出为 Chrome trace JSON（chrome://tracing 或 Perfetto
+可直接打开）。未开启时被标记的槽函数只多一次属性判断，可以常开。
+"""
+import functools
+import json
+import os
+import time
+from collections import deque
+
+from PyQt5 import sip
+from PyQt5.QtCore import QEvent, QObject, QTimer, Qt
+
+TRACE_BUFFER_EVENTS = 50000  # 环形缓冲容量（约数 MB）
+HEARTBEAT_MS = 100
+STALL_THRESHOLD_MS = 50  # 心跳迟到超过该值记为卡顿
+
+
+def traced(method):
+    """标记需要跟踪耗时的方法：实例的 tracer 不为 None 时记录每次调用"""
+    name = method.__qualname__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        tracer = self.tracer
+        if tracer is None:
+            return method(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            tracer.complete(name, started, time.perf_counter())
+    return wrapper
+
+
+class Tracer(QObject):
+    """环形缓冲中的跟踪事件，以及可见窗口的卡顿检测"""
+
+    def __init__(self, max_events=TRACE_BUFFER_EVENTS, parent=None):
+        super().__init__(parent)
+        self.events = deque(maxlen=max_events)  # (类型, 名称, 类别, 开始时刻, 时长, 参数)，时刻为 perf_counter
+        self.recorded = 0  # 累计记录数（超出容量的最早事件被丢弃）
+        self.origin = time.perf_counter()
+        self.started_at = time.time()
+        self.visible = set()  # 可见的被监视窗口
+        self.last_beat = None
+
+        self.heartbeat = QTimer(self)
+        self.heartbeat.setTimerType(Qt.PreciseTimer)
+        self.heartbeat.setInterval(HEARTBEAT_MS)
+        self.heartbeat.timeout.connect(self.on_heartbeat)
+
+    def record(self, phase, name, category, start, duration=0.0, args=None):
+        self.events.append((phase, name, category, start, duration, args))
+        self.recorded += 1
+
+    def complete(self, name, start, end, category="slot", args=None):
+        """一段耗时（perf_counter 时刻）"""
+        self.record("X", name, category, start, end - start, args)
+
+    def lateness(self, name, late):
+        """定时器触发时比预定时刻晚了 late 秒（提前触发为负）"""
+        self.record("C", f"{name} 迟到", "timer", time.perf_counter(), args={"ms": round(late * 1000, 3)})
+
+    # ---- 卡顿检测 ----
+
+    def monitor(self, widget):
+        """窗口可见期间运行心跳检测卡顿"""
+        widget.installEventFilter(self)
+        widget.destroyed.connect(self.on_destroyed)  # 连接到方法：跟踪关闭后自动断开
+        if widget.isVisible():
+            self.on_visibility(sip.unwrapinstance(widget), True)
+
+    def on_destroyed(self, obj):
+        self.on_visibility(sip.unwrapinstance(obj), False)
+
+    def eventFilter(self, obj, event):
+        if event.type() in (QEvent.Show, QEvent.Hide):
+            self.on_visibility(sip.unwrapinstance(obj), event.type() == QEvent.Show)
+        return False
+
+    def on_visibility(self, key, visible):
+        if visible:
+            self.visible.add(key)
+        else:
+            self.visible.discard(key)
+        if self.visible and not self.heartbeat.isActive():
+            self.last_beat = time.perf_counter()
+            self.heartbeat.start()
+        elif not self.visible:
+            self.heartbeat.stop()
+
+    def on_heartbeat(self):
+        now = time.perf_counter()
+        late = now - self.last_beat - HEARTBEAT_MS / 1000
+        if late * 1000 >= STALL_THRESHOLD_MS:
+            self.complete("卡顿", now - late, now, "stall")
+        self.last_beat = now
+
+    def stop(self):
+        self.heartbeat.stop()
+        self.visible.clear()
+
+    # ---- 导出 ----
+
+    def chrome_trace(self):
+        """转为 Chrome trace 格式（时间单位微秒）"""
+        pid = os.getpid()
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "EyeCare"}}]
+        for phase, name, category, start, duration, args in list(self.events):
+            event = {"name": name, "cat": category, "ph": phase, "ts": round((start - self.origin) * 1e6, 1),
+                     "pid": pid, "tid": 0}
+            if phase == "X":
+                event["dur"] = round(duration * 1e6, 1)
+            if args:
+                event["args"] = args
+            events.append(event)
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"started_at": self.started_at, "recorded": self.recorded, "kept": len(self.events)},
+        }
+
+    def dump(self, path):
+        """写入跟踪文件，返回是否成功"""
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.chrome_trace(), f, ensure_ascii=False)
+            return True
+        except OSError as e:
+            print(f"写入跟踪文件失败: {e}")
+            return False
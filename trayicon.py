@@ -0,0 +1,95 @@
+"""托盘倒计时图标
+
+托盘图标显示距下一次切换的分钟数，外圈是按 60 分钟一圈的计时盘进度环。
+同一 (设备像素比, 配色, 工作/休息) 下 0–120 分钟的图标画在一张图集里，首次
+用到时一次画完并缓存；切换图标只是从图集里切出一格，每分钟最多一次。
+"""
+import math
+from collections import namedtuple
+
+from PyQt5.QtCore import Qt, QRect, QRectF
+from PyQt5.QtGui import QColor, QFont, QIcon, QPainter, QPalette, QPen, QPixmap
+
+from pixcache import PixmapCache
+
+ICON_SIZE = 32  # 逻辑像素
+MAX_MINUTES = 120
+DIAL_MINUTES = 60  # 进度环一圈代表的分钟数
+RING_WIDTH = 3.5
+BREAK_COLOR = "#3cb371"
+ATLAS_CACHE_BYTES = 8 * 1024 * 1024
+
+# 图标配色（QColor.rgba() 整数，可作缓存键）
+TrayColors = namedtuple("TrayColors", ["background", "text", "accent"])
+
+
+def tray_colors(palette):
+    """由主题调色板取托盘图标配色"""
+    return TrayColors(palette.color(QPalette.Window).rgba(), palette.color(QPalette.WindowText).rgba(),
+                      palette.color(QPalette.Highlight).rgba())
+
+
+def draw_cell(painter, rect, minutes, colors, working):
+    """在 rect 内画一个图标：底盘、进度环和分钟数"""
+    ring = QRectF(rect).adjusted(RING_WIDTH / 2 + 1, RING_WIDTH / 2 + 1, -RING_WIDTH / 2 - 1, -RING_WIDTH / 2 - 1)
+    text = QColor.fromRgba(colors.text)
+
+    painter.setPen(Qt.NoPen)
+    painter.setBrush(QColor.fromRgba(colors.background))
+    painter.drawEllipse(QRectF(rect).adjusted(0.5, 0.5, -0.5, -0.5))
+
+    track = QColor(text)
+    track.setAlpha(60)
+    painter.setBrush(Qt.NoBrush)
+    painter.setPen(QPen(track, RING_WIDTH))
+    painter.drawEllipse(ring)
+    span = min(minutes, DIAL_MINUTES) / DIAL_MINUTES
+    if span > 0:
+        color = QColor.fromRgba(colors.accent) if working else QColor(BREAK_COLOR)
+        painter.setPen(QPen(color, RING_WIDTH, Qt.SolidLine, Qt.RoundCap))
+        painter.drawArc(ring, 90 * 16, -round(span * 360 * 16))  # 从 12 点钟方向顺时针
+
+    font = QFont("Arial")
+    font.setBold(True)
+    font.setPixelSize(round(rect.height() * (0.42 if minutes < 100 else 0.34)))
+    painter.setFont(font)
+    painter.setPen(text)
+    painter.drawText(rect, Qt.AlignCenter, str(minutes))
+
+
+def render_atlas(dpr, colors, working, size=ICON_SIZE):
+    """把 0–MAX_MINUTES 分钟的图标横向画成一张图集"""
+    cell = math.ceil(size * dpr)
+    atlas = QPixmap(cell * (MAX_MINUTES + 1), cell)
+    atlas.fill(Qt.transparent)
+    painter = QPainter(atlas)
+    painter.setRenderHints(QPainter.Antialiasing | QPainter.TextAntialiasing)
+    painter.scale(dpr, dpr)
+    for minutes in range(MAX_MINUTES + 1):
+        draw_cell(painter, QRect(round(minutes * cell / dpr), 0, size, size), minutes, colors, working)
+    painter.end()
+    return atlas
+
+
+class TrayIconAtlas:
+    """按需构建并缓存图集，从中切出图标"""
+
+    def __init__(self, size=ICON_SIZE, max_bytes=ATLAS_CACHE_BYTES):
+        self.size = size
+        self.atlases = PixmapCache(max_bytes)
+
+    def atlas(self, dpr, colors, working):
+        key = (dpr, colors, working)
+        atlas = self.atlases.get(key)
+        if atlas is None:
+            atlas = render_atlas(dpr, colors, working, self.size)
+            self.atlases.put(key, atlas)
+        return atlas
+
+    def icon(self, minutes, dpr, colors, working):
+        """剩余 minutes 分钟的图标（超过 MAX_MINUTES 的按 MAX_MINUTES 显示）"""
+        cell = math.ceil(self.size * dpr)
+        minutes = max(0, min(MAX_MINUTES, minutes))
+        pixmap = self.atlas(dpr, colors, working).copy(minutes * cell, 0, cell, cell)
+        pixmap.setDevicePixelRatio(dpr)
+        return QIcon(pixmap)